@@ -11,8 +11,7 @@ from alembic import context
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the Base and models
-from app.db.base import Base
-from app.models import user, maintenance  # noqa
+from app.models import Base  # noqa: registers every model on Base.metadata
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,58 @@
+"""Add query indexes
+
+Revision ID: 20261017_query_indexes
+Revises: 20231017_initial
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_query_indexes'
+down_revision: Union[str, Sequence[str], None] = '20231017_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexes declared on the models; create_all never adds them to existing tables
+INDEXES = [
+    ('ix_models_type_active_trained', 'models', ['model_type', 'is_active', 'trained_at']),
+    # Per-machine time ranges and keyset pages
+    ('idx_sensor_data_machine_timestamp', 'sensor_data', ['machine_id', 'timestamp']),
+    ('idx_alerts_machine_timestamp', 'alerts', ['machine_id', 'timestamp']),
+    ('idx_predictions_machine_time', 'predictions', ['machine_id', 'prediction_time']),
+]
+
+# Also created by the initial migration, so downgrading leaves it in place
+INITIAL_INDEXES = {'idx_sensor_data_machine_timestamp'}
+
+
+def _missing(inspector, table, name, columns):
+    """True if table exists with all columns but not yet the index"""
+    if not inspector.has_table(table):
+        return False
+    existing = {column['name'] for column in inspector.get_columns(table)}
+    if not set(columns) <= existing:
+        return False
+    return name not in {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if _missing(inspector, table, name, columns):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in reversed(INDEXES):
+        if name in INITIAL_INDEXES:
+            continue
+        if inspector.has_table(table) and name in {index['name'] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
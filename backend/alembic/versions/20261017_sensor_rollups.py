@@ -0,0 +1,49 @@
+"""Add sensor rollup tables
+
+Revision ID: 20261017_sensor_rollups
+Revises: 20261017_query_indexes
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_sensor_rollups'
+down_revision: Union[str, Sequence[str], None] = '20261017_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Minute, hour and day aggregates, see app/models/sensor_rollup.py
+ROLLUP_TABLES = ['sensor_rollup_minute', 'sensor_rollup_hour', 'sensor_rollup_day']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for table in ROLLUP_TABLES:
+        # Databases created by create_all since the rollups shipped already have them
+        if inspector.has_table(table):
+            continue
+        op.create_table(
+            table,
+            sa.Column('machine_id', sa.Integer(), nullable=False),
+            sa.Column('sensor', sa.String(length=32), nullable=False),
+            sa.Column('bucket', sa.DateTime(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('sum', sa.Float(), nullable=False),
+            sa.Column('min', sa.Float(), nullable=True),
+            sa.Column('max', sa.Float(), nullable=True),
+            sa.PrimaryKeyConstraint('machine_id', 'sensor', 'bucket')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for table in reversed(ROLLUP_TABLES):
+        if inspector.has_table(table):
+            op.drop_table(table)
@@ -0,0 +1,51 @@
+"""Normalize SQLite listing timestamps
+
+Revision ID: 20261017_sqlite_timestamps
+Revises: 20261017_sensor_rollups
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_sqlite_timestamps'
+down_revision: Union[str, Sequence[str], None] = '20261017_sensor_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columns listings page by; new rows get this format from app/db/timestamps.py
+COLUMNS = [
+    ('sensor_data', 'timestamp'),
+    ('alerts', 'timestamp'),
+    ('predictions', 'prediction_time'),
+]
+
+# 'YYYY-MM-DD HH:MM:SS.ffffff', the format SQLAlchemy binds datetimes with
+CANONICAL = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9].[0-9][0-9][0-9][0-9][0-9][0-9]'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    inspector = sa.inspect(bind)
+    for table, column in COLUMNS:
+        if not inspector.has_table(table):
+            continue
+        # Rewrite CURRENT_TIMESTAMP-style and offset values as the same instant in UTC
+        op.execute(
+            f"UPDATE {table} SET {column} = strftime('%Y-%m-%d %H:%M:%f', {column}) || '000' "
+            f"WHERE {column} IS NOT NULL AND {column} NOT GLOB '{CANONICAL}' "
+            f"AND strftime('%Y-%m-%d %H:%M:%f', {column}) IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The normalized values are still valid for the previous revision
+    pass
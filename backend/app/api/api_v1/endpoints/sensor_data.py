@@ -1,10 +1,18 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+from anyio import from_thread
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.db.pagination import InvalidCursorError, page_response
+from app.services.aggregation_service import aggregation_service
+from app.services.anomaly_stream import anomaly_stream
+from app.services.ingest_service import SENSOR_FIELDS
+from app.services.live_state import live_state
+from app.services.rollup_service import rollup_service
+from app.ws.streaming import sensor_stream
 from app.schemas.sensor_data import (
     SensorDataCreate,
     SensorDataUpdate,
@@ -41,6 +49,18 @@ def create_sensor_data(
     # (Implement your access control logic here)
     
     data = crud.sensor_data.create(db, data_in=data_in)
+    rollup_service.apply_readings(db, [data_in.dict()])
+    db.commit()
+    # Long-format readings hold one sensor each; reload the machine's live state
+    live_state.invalidate(data_in.machine_id)
+    
+    # Score the reading on the event loop and push anomalies to subscribers
+    from_thread.run(anomaly_stream.publish_readings, [data_in.dict()])
+    from_thread.run(
+        sensor_stream.publish_samples,
+        data_in.machine_id,
+        [(data_in.timestamp, {data_in.sensor_type: data_in.value})]
+    )
     return {"data": data}
 
 @router.post("/batch", response_model=List[SensorDataResponse], status_code=status.HTTP_201_CREATED)
@@ -70,6 +90,20 @@ def create_sensor_data_batch(
     # (Implement your access control logic here)
     
     data_list = crud.sensor_data.create_sensor_data_batch(db, data_in=data_in)
+    
+    readings = sorted((data.dict() for data in data_in), key=lambda reading: reading['timestamp'])
+    rollup_service.apply_readings(db, readings)
+    db.commit()
+    for machine_id in machine_ids:
+        live_state.invalidate(machine_id)
+    from_thread.run(anomaly_stream.publish_readings, readings)
+    
+    # Live streams get one sample per machine and timestamp, all sensors together
+    samples: Dict[int, Dict[datetime, Dict[str, float]]] = {}
+    for reading in readings:
+        samples.setdefault(reading['machine_id'], {}).setdefault(reading['timestamp'], {})[reading['sensor_type']] = reading['value']
+    for machine_id, by_time in samples.items():
+        from_thread.run(sensor_stream.publish_samples, machine_id, list(by_time.items()))
     return [{"data": data} for data in data_list]
 
 @router.get("/{data_id}", response_model=SensorDataResponse)
@@ -107,11 +141,22 @@ def read_sensor_data_list(
     ),
     skip: int = 0,
     limit: int = Query(100, le=1000),
+    cursor: Optional[str] = Query(
+        None,
+        description="next_cursor from the previous page"
+    ),
+    include_total: bool = Query(
+        True,
+        description="Count matching readings (cached briefly)"
+    ),
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve sensor data with filtering.
+    Retrieve sensor data with filtering, newest first.
+    
+    Pass next_cursor back as cursor to page through large result sets; skip
+    is still accepted for the first page.
     """
     # If no machine_id is provided, only admins can query all machines
     if machine_id is None and not crud.user.is_superuser(current_user):
@@ -131,6 +176,12 @@ def read_sensor_data_list(
         # Check if user has access to this machine
         # (Implement your access control logic here)
     
+    if sensor_type is not None and sensor_type not in SENSOR_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sensor type. Expected one of: {', '.join(SENSOR_FIELDS)}",
+        )
+    
     # Build query parameters
     query_params = {
         "machine_id": machine_id,
@@ -138,15 +189,22 @@ def read_sensor_data_list(
         "start_time": start_time,
         "end_time": end_time,
         "limit": limit,
-        "offset": skip
+        "offset": skip,
+        "cursor": cursor,
+        "include_total": include_total
     }
     
     # Execute query
-    items, total = crud.sensor_data.query_sensor_data(db, **query_params)
+    try:
+        page = crud.sensor_data.query_sensor_data(db, **query_params)
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     
     return {
-        "items": items,
-        "total": total,
+        **page_response(page, skip, limit),
         "skip": skip,
         "limit": limit,
     }
@@ -198,6 +256,15 @@ def read_aggregated_sensor_data(
         AggregationInterval.WEEK: 365 * 3, # 3 years for weekly data
         AggregationInterval.MONTH: 365 * 10, # 10 years for monthly data
     }
+    if aggregation_service.serves_from_rollups(interval, [function.value]):
+        # Rollups read one row per bucket and sensor instead of every reading
+        max_days = {
+            AggregationInterval.MINUTE: 31,
+            AggregationInterval.HOUR: 366,
+            AggregationInterval.DAY: 365 * 10,
+            AggregationInterval.WEEK: 365 * 10,
+            AggregationInterval.MONTH: 365 * 30,
+        }
     
     max_range = timedelta(days=max_days.get(interval, 30))
     if (end_time - start_time) > max_range:
@@ -206,6 +273,12 @@ def read_aggregated_sensor_data(
             detail=f"Time range too large for {interval.value} interval. Maximum is {max_range.days} days.",
         )
     
+    if sensor_type not in SENSOR_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sensor type. Expected one of: {', '.join(SENSOR_FIELDS)}",
+        )
+    
     # Get aggregated data
     data = crud.sensor_data.get_aggregated_sensor_data(
         db=db,
@@ -4,13 +4,16 @@ from datetime import datetime
 from pathlib import Path
 from typing import List
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
 
-from app import crud, models, schemas
+from app import models, schemas
 from app.api import deps
 from app.core.config import settings
-from app.schemas.upload import FileUploadResponse
+from app.db.session import SessionLocal
+from app.schemas.upload import FileUploadResponse, UploadJobStatus
+from app.services.machine_service import machine_service
+from app.services.upload_service import upload_pipeline
 
 router = APIRouter()
 
@@ -47,7 +50,7 @@ async def upload_image(
     Upload an image for a specific machine.
     """
     # Verify machine exists and user has access
-    machine = crud.machine.get(db, id=machine_id)
+    machine = machine_service.get_machine(db, machine_id)
     if not machine:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,20 +69,20 @@ async def upload_image(
         file_path = save_upload_file(file, IMAGE_UPLOAD_DIR)
         
         # Create image record in database
-        image_data = {
-            "machine_id": machine_id,
-            "file_path": file_path,
-            "label": label,
-            "uploaded_by": current_user.id
-        }
-        
-        db_image = crud.image_data.create(db, obj_in=image_data)
+        image_id = db.execute(
+            models.ImageData.__table__.insert().values(
+                machine_id=machine_id,
+                file_path=file_path,
+                label=label
+            )
+        ).inserted_primary_key[0]
+        db.commit()
         
         return {
             "success": True,
             "message": "Image uploaded successfully",
             "file_path": file_path,
-            "id": db_image.id
+            "id": image_id
         }
     except Exception as e:
         raise HTTPException(
@@ -87,18 +90,22 @@ async def upload_image(
             detail=f"Error uploading file: {str(e)}"
         )
 
-@router.post("/csv", response_model=FileUploadResponse)
+@router.post("/csv", response_model=FileUploadResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_csv(
     machine_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
     """
     Upload sensor data in CSV format for a specific machine.
+    
+    The file is streamed to disk in chunks and then ingested into sensor data
+    by a background job; poll the returned job for progress.
     """
     # Verify machine exists and user has access
-    machine = crud.machine.get(db, id=machine_id)
+    machine = machine_service.get_machine(db, machine_id)
     if not machine:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -113,20 +120,39 @@ async def upload_csv(
         )
     
     try:
-        # Save the file
-        file_path = save_upload_file(file, CSV_UPLOAD_DIR)
+        # Save the file without blocking the event loop
+        saved_path = await upload_pipeline.save_upload(file, CSV_UPLOAD_DIR)
+        file_path = str(saved_path.relative_to(settings.UPLOAD_DIR))
         
-        # Here you would typically parse the CSV and store the sensor data
-        # For now, we'll just return success
+        # Ingest in the background after the response is sent
+        job = upload_pipeline.create_job(machine_id, saved_path)
+        background_tasks.add_task(upload_pipeline.run, job, SessionLocal)
         
         return {
             "success": True,
-            "message": "CSV uploaded successfully",
+            "message": "CSV uploaded successfully, ingestion started",
             "file_path": file_path,
-            "next_steps": ["Process CSV data", "Import sensor readings"]
+            "next_steps": [f"Poll {settings.API_V1_STR}/uploads/csv/jobs/{job.id} for progress"],
+            "metadata": {"job_id": job.id, "size": job.total_bytes}
         }
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error uploading file: {str(e)}"
         )
+
+@router.get("/csv/jobs/{job_id}", response_model=UploadJobStatus)
+def get_csv_upload_job(
+    job_id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+):
+    """
+    Get progress of a CSV ingest job: bytes read, rows written and throughput.
+    """
+    job = upload_pipeline.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload job not found",
+        )
+    return job.to_dict()
@@ -10,53 +10,12 @@ from sqlalchemy.orm import Session
 from app import models, schemas, crud
 from app.api import deps
 from app.services.websocket_service import websocket_manager
-from app.core.security import get_current_user_ws
+from app.ws.streaming import sensor_stream
 
 router = APIRouter()
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.machine_subscriptions: Dict[int, set] = {}
-
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            # Remove from all machine subscriptions
-            for machine_id, clients in list(self.machine_subscriptions.items()):
-                if client_id in clients:
-                    clients.remove(client_id)
-                if not clients:
-                    del self.machine_subscriptions[machine_id]
-            # Remove the connection
-            del self.active_connections[client_id]
-
-    async def subscribe_to_machine(self, client_id: str, machine_id: int):
-        if machine_id not in self.machine_subscriptions:
-            self.machine_subscriptions[machine_id] = set()
-        self.machine_subscriptions[machine_id].add(client_id)
-
-    async def unsubscribe_from_machine(self, client_id: str, machine_id: int):
-        if machine_id in self.machine_subscriptions:
-            self.machine_subscriptions[machine_id].discard(client_id)
-            if not self.machine_subscriptions[machine_id]:
-                del self.machine_subscriptions[machine_id]
-
-    async def broadcast_to_machine(self, machine_id: int, message: Dict[str, Any]):
-        if machine_id in self.machine_subscriptions:
-            for client_id in list(self.machine_subscriptions[machine_id]):
-                if client_id in self.active_connections:
-                    try:
-                        await self.active_connections[client_id].send_json(message)
-                    except Exception as e:
-                        print(f"Error sending to client {client_id}: {e}")
-                        self.disconnect(client_id)
-
-# Global WebSocket manager instance
-manager = ConnectionManager()
+# Shared with the rest of the app so broadcasts reach every worker
+manager = websocket_manager
 
 @router.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str, db: Session = Depends(deps.get_db)):
@@ -65,11 +24,15 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str, db: Session =
     
     Expected message format:
     {
-        "type": "subscribe|unsubscribe|command",
-        "machine_id": int,  # Required for subscribe/unsubscribe
+        "type": "subscribe|unsubscribe|stream|stream_stop|command",
+        "machine_id": int,  # Required for subscribe/unsubscribe/stream/stream_stop
         "command": str,     # For command type
         "data": any         # Optional data
     }
+    
+    A "stream" message also carries "sensors" (list of str),
+    "points_per_second" (float) and optionally "delta" (bool). The stream is
+    then sent as binary frames, see app.ws.streaming for the layout.
     """
     # Accept the WebSocket connection
     await manager.connect(websocket, client_id)
@@ -87,7 +50,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str, db: Session =
                     # Subscribe to machine updates
                     machine_id = message["machine_id"]
                     await manager.subscribe_to_machine(client_id, machine_id)
-                    await websocket.send_json({
+                    await manager.send_personal_message(client_id, {
                         "type": "subscription_update",
                         "status": "subscribed",
                         "machine_id": machine_id,
@@ -98,37 +61,67 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str, db: Session =
                     # Unsubscribe from machine updates
                     machine_id = message["machine_id"]
                     await manager.unsubscribe_from_machine(client_id, machine_id)
-                    await websocket.send_json({
+                    await manager.send_personal_message(client_id, {
                         "type": "subscription_update",
                         "status": "unsubscribed",
                         "machine_id": machine_id,
                         "timestamp": datetime.utcnow().isoformat()
                     })
                     
+                elif message_type == "stream" and "machine_id" in message:
+                    # Start a decimated binary sensor stream
+                    subscription = await sensor_stream.subscribe(
+                        client_id,
+                        message["machine_id"],
+                        message.get("sensors") or [],
+                        message.get("points_per_second", 20),
+                        delta=bool(message.get("delta", False))
+                    )
+                    await manager.send_personal_message(client_id, {
+                        "type": "stream_update",
+                        "status": "streaming",
+                        "machine_id": subscription.machine_id,
+                        "sensors": subscription.sensors,
+                        "points_per_second": subscription.points_per_second,
+                        "delta": subscription.delta,
+                        "timestamp": datetime.utcnow().isoformat()
+                    })
+                    
+                elif message_type == "stream_stop" and "machine_id" in message:
+                    sensor_stream.unsubscribe(client_id, message["machine_id"])
+                    await manager.send_personal_message(client_id, {
+                        "type": "stream_update",
+                        "status": "stopped",
+                        "machine_id": message["machine_id"],
+                        "timestamp": datetime.utcnow().isoformat()
+                    })
+                    
                 elif message_type == "command":
                     # Handle different commands
                     command = message.get("command")
                     if command == "ping":
-                        await websocket.send_json({
+                        await manager.send_personal_message(client_id, {
                             "type": "pong",
                             "timestamp": datetime.utcnow().isoformat()
                         })
                     
             except json.JSONDecodeError:
-                await websocket.send_json({
+                await manager.send_personal_message(client_id, {
                     "type": "error",
                     "message": "Invalid JSON format"
                 })
             except Exception as e:
-                await websocket.send_json({
+                await manager.send_personal_message(client_id, {
                     "type": "error",
                     "message": str(e)
                 })
                 
     except WebSocketDisconnect:
+        sensor_stream.unsubscribe(client_id)
         manager.disconnect(client_id)
     except Exception as e:
         print(f"WebSocket error: {e}")
+        sensor_stream.unsubscribe(client_id)
         manager.disconnect(client_id)
 
 # Helper function to broadcast machine updates
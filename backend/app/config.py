@@ -19,6 +19,19 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./toolwear.db"
     TEST_DATABASE_URL: str = "sqlite:///./test_toolwear.db"
+    DB_POOL_SIZE: int = 10  # Connections kept open in the pool
+    DB_MAX_OVERFLOW: int = 20  # Extra connections allowed under load
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Reconnect server connections older than this
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait this long for the write lock
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection
+    SQLITE_MMAP_SIZE_MB: int = 256  # Memory-mapped I/O window
+    PAGINATION_COUNT_CACHE_SECONDS: int = 30  # Reuse listing totals this long while paging
+    ALERT_STATS_CACHE_SECONDS: int = 300  # Reuse alert counts for closed hours this long
+    LIVE_STATE_TTL_SECONDS: int = 300  # Reload a machine's live dashboard state after this long
+    LIVE_STATE_WINDOW_SIZE: int = 1000  # Readings per machine behind live sensor statistics
+    RESPONSE_CACHE_ENABLED: bool = True  # Cache serialized listings polled by dashboards
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048  # Distinct listing responses held per worker
     
     # Email
     SMTP_TLS: bool = True
@@ -36,12 +49,58 @@ class Settings(BaseSettings):
     
     # Model paths
     MODEL_DIR: str = "/app/models"
+    MODEL_CACHE_MAX_MB: int = 1024  # Memory budget for loaded model artifacts
+    MODEL_LATEST_TTL_SECONDS: int = 30  # How long a resolved "latest" version is reused
+    PREDICTION_BATCH_SIZE: int = 32  # Max sensor requests per batched inference call
+    PREDICTION_BATCH_WAIT_MS: float = 5.0  # Max time a request waits for its batch to fill
     
     # File upload settings
     MAX_UPLOAD_SIZE_MB: int = 50  # 50MB
     ALLOWED_IMAGE_TYPES: List[str] = ["image/jpeg", "image/png"]
+    ALLOWED_IMAGE_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png"]
     UPLOAD_DIR: str = "/app/uploads"
-    
+
+    # Image prediction worker pool
+    IMAGE_WORKERS: int = 4  # Concurrent decode/inference workers
+    IMAGE_QUEUE_SIZE: int = 8  # Requests allowed to wait before answering 429
+    IMAGE_USE_PROCESSES: bool = False  # Decode in a process pool instead of threads
+    IMAGE_BATCH_MAX_FILES: int = 200  # Max images accepted by the batch prediction endpoint
+
+    # Sensor data ingestion
+    INGEST_CHUNK_SIZE: int = 50000  # CSV rows parsed and written per batch
+    SENSOR_ROLLUPS_ENABLED: bool = True  # Serve aggregates from minute/hour/day rollup tables
+    SENSOR_HOT_MONTHS: int = 0  # SQLite: months kept in the main table before moving to per-month files (0 disables)
+    SENSOR_RETENTION_MONTHS: int = 0  # Archive and drop months older than this (0 keeps everything)
+    SENSOR_PARTITIONS_AHEAD: int = 2  # PostgreSQL: monthly partitions created ahead of time
+    SENSOR_PARTITION_DIR: str = "./data/partitions"  # SQLite per-month partition files
+    SENSOR_PARTITION_MAX_ATTACHED: int = 8  # SQLite: partition files one query attaches; wider ranges are read in batches (SQLite caps this at 10)
+    SENSOR_ARCHIVE_DIR: str = "./data/archive"  # Parquet archive, partitioned by machine and date
+    SENSOR_ARCHIVE_EXPORT_ENABLED: bool = False  # Copy each completed day to the archive for training and reports
+    SENSOR_PARTITION_MAINTENANCE_SECONDS: int = 6 * 3600  # How often partitions and retention are maintained
+
+    # Anomaly detection
+    ANOMALY_STATE_DIR: str = "/app/anomaly_state"  # Detector snapshots, restored lazily after restarts
+    ANOMALY_MAX_DETECTORS: int = 10000  # Max (machine, sensor) detectors held in memory
+    ANOMALY_DETECTOR_TTL_SECONDS: int = 24 * 3600  # Evict detectors idle this long
+
+    # Rate limiting
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REQUESTS: int = 100  # Requests per client per window on routes without their own limit
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_ROUTES: Dict[str, str] = {"/api/auth/login": "10/60"}  # Path prefix -> "<requests>/<seconds>"
+    RATE_LIMIT_BACKEND: str = "memory"  # "redis" to share limits across workers and hosts
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Client buckets held per worker
+    RATE_LIMIT_REDIS_TIMEOUT_SECONDS: float = 0.25  # Connect/read timeout for a Redis bucket update
+    RATE_LIMIT_REDIS_RETRY_SECONDS: float = 30.0  # After a Redis failure, limit locally this long before retrying
+
+    # Websockets
+    WS_SEND_QUEUE_SIZE: int = 100  # Messages buffered per client before the oldest are dropped
+    WS_STALL_TIMEOUT_SECONDS: float = 10.0  # Disconnect clients whose queue is full and not draining
+    WS_BROKER: str = "memory"  # "redis" to fan broadcasts out across workers and hosts
+    REDIS_URL: str = "redis://localhost:6379/0"
+    WS_STREAM_FLUSH_MS: int = 100  # How often decimated sensor stream frames are sent
+    WS_STREAM_MAX_POINTS_PER_SECOND: float = 1000.0  # Upper bound on a client's requested rate
+
     # Logging
     LOG_LEVEL: str = "INFO"
     
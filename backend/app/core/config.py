@@ -47,7 +47,9 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_IMAGE_TYPES: List[str] = ["image/jpeg", "image/png", "image/tiff"]
     ALLOWED_CSV_TYPES: List[str] = ["text/csv", "application/vnd.ms-excel"]
-    
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB read/write chunks for streamed uploads
+    UPLOAD_JOB_HISTORY: int = 100  # Finished CSV ingest jobs kept for status queries
+
     @validator("UPLOAD_DIR", pre=True)
     def create_upload_dir(cls, v: str) -> str:
         """Ensure upload directory exists."""
@@ -0,0 +1,195 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from ..config import settings
+
+CacheKey = Tuple[str, str, str, str]
+
+
+class CachedResponse(NamedTuple):
+    namespace: str
+    expires: float
+    etag: str
+    body: bytes
+    status_code: int
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Serialized JSON responses of read-heavy GET endpoints.
+
+    Entries are keyed by namespace, path, query string and the caller's role
+    and carry a weak ETag, so polling clients revalidate with If-None-Match
+    and get a bodiless 304 while nothing changed. Service write paths call
+    invalidate() for the namespaces they affect. Other workers see a write
+    only once their entry's ttl runs out, so ttls are kept short.
+    """
+
+    def __init__(self, max_entries: int = 2048, enabled: bool = True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: Dict[CacheKey, CachedResponse] = {}
+        # Bumped by invalidate(), so a response computed across a write is not stored
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def key(self, namespace: str, request: Request, role: Optional[str]) -> CacheKey:
+        query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+        return namespace, request.url.path, query, role or "anonymous"
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.expires < time.monotonic():
+            return None
+        return entry
+
+    def generation(self, namespace: str) -> int:
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def store(
+        self,
+        key: CacheKey,
+        body: bytes,
+        ttl: float,
+        generation: int,
+        status_code: int = 200
+    ) -> CachedResponse:
+        """Cache body unless its namespace was invalidated since generation was read"""
+        namespace = key[0]
+        etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        entry = CachedResponse(namespace, time.monotonic() + ttl, etag, body, status_code)
+        with self._lock:
+            if self._generations.get(namespace, 0) != generation:
+                return entry
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v.expires >= now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = entry
+        return entry
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Drop every cached response in namespaces, after a write to what they list"""
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._entries = {k: v for k, v in self._entries.items() if v.namespace not in namespaces}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        """The cached body, or 304 Not Modified if the client already has it"""
+        headers = {
+            "ETag": entry.etag,
+            # Responses vary by user, and must be revalidated before reuse
+            "Cache-Control": "private, no-cache",
+            "Vary": "Authorization",
+        }
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=entry.body,
+            status_code=entry.status_code,
+            media_type=JSONResponse.media_type,
+            headers=headers
+        )
+
+
+# Create a singleton instance
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    enabled=settings.RESPONSE_CACHE_ENABLED
+)
+
+
+def cached_response(namespace: str, ttl: float = 30.0) -> Callable:
+    """
+    Cache a GET endpoint's response in response_cache for ttl seconds.
+
+    Apply below the router decorator. The endpoint's dependencies, including
+    authentication, still run on every request; only the endpoint body and
+    response serialization are skipped on a hit. A current_user argument, if
+    the endpoint takes one, puts the user's role in the cache key.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        signature = inspect.signature(endpoint)
+        is_coroutine = asyncio.iscoroutinefunction(endpoint)
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, _cache_request: Request, **kwargs) -> Any:
+            if not response_cache.enabled:
+                if is_coroutine:
+                    return await endpoint(*args, **kwargs)
+                return await run_in_threadpool(endpoint, *args, **kwargs)
+
+            user = kwargs.get("current_user")
+            role = getattr(getattr(user, "role", None), "value", getattr(user, "role", None))
+            key = response_cache.key(namespace, _cache_request, role and str(role))
+
+            entry = response_cache.get(key)
+            if entry is None:
+                generation = response_cache.generation(namespace)
+                if is_coroutine:
+                    result = await endpoint(*args, **kwargs)
+                else:
+                    result = await run_in_threadpool(endpoint, *args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+
+                # Serialize exactly as the route would have
+                route = _cache_request.scope["route"]
+                content = await serialize_response(
+                    field=route.response_field,
+                    response_content=result,
+                    include=route.response_model_include,
+                    exclude=route.response_model_exclude,
+                    by_alias=route.response_model_by_alias,
+                    exclude_unset=route.response_model_exclude_unset,
+                    exclude_defaults=route.response_model_exclude_defaults,
+                    exclude_none=route.response_model_exclude_none,
+                    is_coroutine=is_coroutine
+                )
+                body = JSONResponse(content).body
+                entry = response_cache.store(key, body, ttl, generation, route.status_code or 200)
+            return response_cache.respond(_cache_request, entry)
+
+        request_parameter = inspect.Parameter(
+            "_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+        )
+        wrapper.__signature__ = signature.replace(
+            parameters=[*signature.parameters.values(), request_parameter]
+        )
+        return wrapper
+
+    return decorator
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
+from app.core.response_cache import response_cache
 from app.models.maintenance import (
     MaintenanceSchedule, 
     MaintenanceTask, 
@@ -58,6 +59,7 @@ def create_maintenance_schedule(
     )
     db.add(log)
     db.commit()
+    response_cache.invalidate("maintenance")
     
     return db_schedule
 
@@ -84,6 +86,7 @@ def update_maintenance_schedule(
     
     db.commit()
     db.refresh(db_schedule)
+    response_cache.invalidate("maintenance")
     return db_schedule
 
 def delete_maintenance_schedule(db: Session, schedule_id: int, user_id: int):
@@ -99,6 +102,7 @@ def delete_maintenance_schedule(db: Session, schedule_id: int, user_id: int):
         db.add(log)
         db.delete(db_schedule)
         db.commit()
+        response_cache.invalidate("maintenance")
     return db_schedule
 
 def create_maintenance_task(
@@ -124,6 +128,7 @@ def create_maintenance_task(
     
     db.commit()
     db.refresh(db_task)
+    response_cache.invalidate("maintenance")
     return db_task
 
 def update_maintenance_task(
@@ -151,6 +156,7 @@ def update_maintenance_task(
     
     db.commit()
     db.refresh(db_task)
+    response_cache.invalidate("maintenance")
     return db_task
 
 def add_maintenance_part(
@@ -165,6 +171,7 @@ def add_maintenance_part(
     db.add(db_part)
     db.commit()
     db.refresh(db_part)
+    response_cache.invalidate("maintenance")
     return db_part
 
 def get_maintenance_logs(
@@ -1,10 +1,13 @@
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, and_, or_, select
 import logging
 
+from app.db.pagination import Page, keyset_select, row_counter, split_page
 from app.models.sensor_data import SensorData
+from app.services.aggregation_service import aggregation_service
+from app.services.partition_service import partition_service
 from app.schemas.sensor_data import (
     SensorDataCreate, 
     SensorDataUpdate, 
@@ -66,36 +69,64 @@ def query_sensor_data(
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
     limit: int = 1000,
-    offset: int = 0
-) -> Tuple[List[SensorData], int]:
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = True
+) -> Page:
     """
-    Query sensor data with multiple filters.
-    Returns a tuple of (results, total_count).
-    """
-    query = db.query(SensorData)
+    Query sensor data with multiple filters, newest first.
     
-    # Apply filters
-    if machine_id is not None:
-        query = query.filter(SensorData.machine_id == machine_id)
-    if sensor_type is not None:
-        query = query.filter(SensorData.sensor_type == sensor_type)
-    if start_time is not None:
-        query = query.filter(SensorData.timestamp >= start_time)
-    if end_time is not None:
-        query = query.filter(SensorData.timestamp <= end_time)
+    Pages are keyed on (timestamp, id): pass the returned next_cursor as
+    cursor to continue, which the (machine_id, timestamp) index serves without
+    scanning the skipped rows. offset is only applied without a cursor.
+    Returns a Page of (items, total, next_cursor); total is None unless
+    include_total is set.
     
-    # Get total count before pagination
-    total = query.count()
+    The time filters also select partitions: PostgreSQL prunes them itself,
+    and on SQLite only the partition files the range reaches are read. Those
+    are attached in batches of SENSOR_PARTITION_MAX_ATTACHED months, newest
+    first; older batches are only read for the rest of a page or the total.
+    """
+    rows: List[SensorData] = []
+    total = 0 if include_total else None
+    skip = offset if cursor is None else 0
     
-    # Apply ordering and pagination
-    results = (
-        query.order_by(SensorData.timestamp.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    for batch in partition_service.sensor_batches(db, start_time, end_time):
+        wanted = limit + 1 - len(rows)
+        if wanted <= 0 and not include_total:
+            break
+        with partition_service.sensor_reader(db, batch) as (reader, source):
+            entity = SensorData if source is SensorData.__table__ else aliased(SensorData, source)
+            sort_key = (entity.timestamp, entity.id)
+            
+            stmt = select(entity).where(*batch.bounds(entity.timestamp))
+            
+            # Apply filters
+            if machine_id is not None:
+                stmt = stmt.where(entity.machine_id == machine_id)
+            if sensor_type is not None:
+                # Readings are stored wide; sensor_type names a column
+                stmt = stmt.where(getattr(entity, sensor_type).isnot(None))
+            if start_time is not None:
+                stmt = stmt.where(entity.timestamp >= start_time)
+            if end_time is not None:
+                stmt = stmt.where(entity.timestamp <= end_time)
+            
+            count = row_counter.count(reader, stmt) if include_total or skip else None
+            if include_total:
+                total += count
+            if wanted <= 0:
+                continue
+            if skip and count <= skip:
+                # Offset paging skips whole batches by their count
+                skip -= count
+                continue
+            rows += reader.scalars(keyset_select(stmt, sort_key, cursor, wanted - 1, skip=skip)).all()
+            skip = 0
+    
+    results, next_cursor = split_page(rows, (SensorData.timestamp, SensorData.id), limit)
     
-    return results, total
+    return Page(results, total, next_cursor)
 
 def create_sensor_data(
     db: Session, 
@@ -169,62 +200,26 @@ def get_aggregated_sensor_data(
 ) -> List[Dict[str, Any]]:
     """
     Get aggregated sensor data for a specific machine and sensor type.
-    """
-    # Define the truncation function based on interval
-    if interval == AggregationInterval.MINUTE:
-        trunc_func = func.date_trunc('minute', SensorData.timestamp)
-    elif interval == AggregationInterval.HOUR:
-        trunc_func = func.date_trunc('hour', SensorData.timestamp)
-    elif interval == AggregationInterval.DAY:
-        trunc_func = func.date_trunc('day', SensorData.timestamp)
-    elif interval == AggregationInterval.WEEK:
-        trunc_func = func.date_trunc('week', SensorData.timestamp)
-    elif interval == AggregationInterval.MONTH:
-        trunc_func = func.date_trunc('month', SensorData.timestamp)
-    else:
-        trunc_func = func.date_trunc('hour', SensorData.timestamp)
-    
-    # Define the aggregation function
-    if agg_function == AggregationFunction.AVG:
-        value_func = func.avg(SensorData.value)
-    elif agg_function == AggregationFunction.MIN:
-        value_func = func.min(SensorData.value)
-    elif agg_function == AggregationFunction.MAX:
-        value_func = func.max(SensorData.value)
-    elif agg_function == AggregationFunction.SUM:
-        value_func = func.sum(SensorData.value)
-    elif agg_function == AggregationFunction.COUNT:
-        value_func = func.count(SensorData.value)
-    else:
-        value_func = func.avg(SensorData.value)
     
-    # Build the query
-    query = db.query(
-        trunc_func.label("timestamp"),
-        value_func.label("value"),
-        func.count(SensorData.id).label("count")
-    ).filter(
-        SensorData.machine_id == machine_id,
-        SensorData.sensor_type == sensor_type,
-        SensorData.timestamp >= start_time,
-        SensorData.timestamp <= end_time
+    sensor_type names one of the wide sensor columns (e.g. "temperature").
+    Readings carry no unit column, so unit is accepted for compatibility only.
+    """
+    buckets = aggregation_service.aggregate(
+        db,
+        machine_id=machine_id,
+        start_time=start_time,
+        end_time=end_time,
+        interval=interval,
+        sensors=[sensor_type],
+        functions=[agg_function.value]
     )
     
-    if unit is not None:
-        query = query.filter(SensorData.unit == unit)
-    
-    # Group by the truncated timestamp
-    query = query.group_by(trunc_func).order_by(trunc_func)
-    
-    # Execute the query
-    results = query.all()
-    
-    # Convert to list of dicts
     return [
         {
-            "timestamp": row.timestamp,
-            "value": float(row.value) if row.value is not None else None,
-            "count": row.count
+            "timestamp": bucket["timestamp"],
+            "value": bucket["values"][sensor_type][agg_function.value],
+            "count": bucket["count"]
         }
-        for row in results
+        for bucket in buckets
+        if bucket["values"][sensor_type][agg_function.value] is not None
     ]
@@ -1,19 +1,34 @@
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
+import logging
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# SQLite database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./toolwear.db"
+from .config import settings
+from .db.engine import create_async_db_engine, create_db_engine
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+logger = logging.getLogger(__name__)
+
+# Database URL from settings (defaults to SQLite)
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for handlers that should not block the event loop. Objects stay
+# loaded after commit so responses can be built without another round trip.
+try:
+    async_engine = create_async_db_engine(SQLALCHEMY_DATABASE_URL)
+except ImportError as e:
+    logger.warning(f"Async database driver unavailable, async endpoints disabled: {e}")
+    async_engine = None
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -22,3 +37,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    if async_engine is None:
+        raise RuntimeError("Async database driver is not installed (aiosqlite/asyncpg)")
+    async with AsyncSessionLocal() as db:
+        yield db
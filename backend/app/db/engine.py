@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# asyncio drivers used for the async engine, by backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Prometheus metrics
+POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting for a connection from the database pool',
+    ['engine'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    'db_pool_checkout_timeouts_total',
+    'Connection checkouts that gave up after the pool timeout',
+    ['engine']
+)
+
+POOL_CONNECTIONS_IN_USE = Gauge(
+    'db_pool_connections_in_use',
+    'Database connections currently checked out of the pool',
+    ['engine']
+)
+
+POOL_UTILIZATION = Gauge(
+    'db_pool_utilization_ratio',
+    'Checked out connections as a fraction of pool_size + max_overflow',
+    ['engine']
+)
+
+
+class _TimedCheckout:
+    """Records how long each checkout waited, labelled by metrics_label"""
+
+    metrics_label = "sync"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(engine=self.metrics_label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(engine=self.metrics_label).observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _track_utilization(engine: Engine, label: str) -> None:
+    pool = engine.pool
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    # The checkin event fires before the pool updates its own counters
+    in_use = [0]
+    lock = threading.Lock()
+    connections_in_use = POOL_CONNECTIONS_IN_USE.labels(engine=label)
+    utilization = POOL_UTILIZATION.labels(engine=label)
+
+    def update(delta: int) -> None:
+        with lock:
+            in_use[0] += delta
+            connections_in_use.set(in_use[0])
+            utilization.set(in_use[0] / capacity if capacity else 0.0)
+
+    event.listen(pool, "checkout", lambda *args: update(1))
+    event.listen(pool, "checkin", lambda *args: update(-1))
+
+
+def _apply_sqlite_pragmas(engine: Engine) -> None:
+    pragmas = {
+        # Readers no longer block on the writer, and commits skip most fsyncs
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        # Negative cache_size is in KiB
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,
+        "mmap_size": settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "temp_store": "MEMORY",
+    }
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _engine_options(database_url: URL, pool_class: type) -> Dict[str, Any]:
+    is_sqlite = database_url.get_backend_name() == "sqlite"
+    if is_sqlite and database_url.database in (None, "", ":memory:"):
+        # One shared connection, or every checkout would see an empty database
+        return {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+
+    options: Dict[str, Any] = {
+        "poolclass": pool_class,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    if is_sqlite:
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000.0
+        }
+    else:
+        # Drop connections the server or a proxy closed while idle
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = settings.DB_POOL_RECYCLE_SECONDS
+    return options
+
+
+def _instrument(engine: Engine, label: str) -> None:
+    if engine.dialect.name == "sqlite":
+        _apply_sqlite_pragmas(engine)
+    if isinstance(engine.pool, QueuePool):
+        _track_utilization(engine, label)
+
+
+def create_db_engine(url: str, **kwargs: Any) -> Engine:
+    """
+    Create an engine with pooling and connection settings tuned for the backend.
+
+    PostgreSQL (and other server databases) get a pre-pinged, recycled
+    QueuePool sized from settings. File-based SQLite gets the same pool plus
+    WAL mode, memory-mapped I/O and a busy timeout so concurrent writers wait
+    for the lock instead of failing. In-memory SQLite uses a single shared
+    connection. Pool checkout wait and utilization are exported to Prometheus.
+    """
+    database_url = make_url(url)
+    options = _engine_options(database_url, InstrumentedQueuePool)
+    options.update(kwargs)
+
+    engine = create_engine(database_url, **options)
+    _instrument(engine, InstrumentedQueuePool.metrics_label)
+
+    logger.info(f"Database engine created for {database_url.render_as_string(hide_password=True)}")
+    return engine
+
+
+def async_database_url(url: str) -> URL:
+    """Swap the driver of a database URL for its asyncio counterpart"""
+    database_url = make_url(url)
+    driver = ASYNC_DRIVERS.get(database_url.get_backend_name())
+    if driver is None or database_url.drivername == driver:
+        return database_url
+    return database_url.set(drivername=driver)
+
+
+def create_async_db_engine(url: str, **kwargs: Any) -> AsyncEngine:
+    """
+    Create an asyncio engine (aiosqlite / asyncpg) for the same database.
+
+    Pool sizing, SQLite pragmas and metrics match create_db_engine; the
+    metrics carry engine="async".
+    """
+    database_url = async_database_url(url)
+    options = _engine_options(database_url, InstrumentedAsyncQueuePool)
+    options.update(kwargs)
+
+    engine = create_async_engine(database_url, **options)
+    _instrument(engine.sync_engine, InstrumentedAsyncQueuePool.metrics_label)
+
+    logger.info(f"Async database engine created for {database_url.render_as_string(hide_password=True)}")
+    return engine
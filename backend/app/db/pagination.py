@@ -0,0 +1,190 @@
+import base64
+import binascii
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import DateTime, func, literal, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class Page(NamedTuple):
+    """One page of a keyset-paginated listing"""
+    items: List[Any]
+    total: Optional[int]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[ColumnElement]) -> List[Any]:
+    """Decode a cursor back into sort key values typed like columns"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, payload)
+        ]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {e}") from e
+
+
+def keyset_select(
+    stmt: Select,
+    columns: Sequence[ColumnElement],
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    descending: bool = True,
+    skip: int = 0
+) -> Select:
+    """
+    Order stmt by columns and restrict it to the rows after cursor.
+
+    The comparison is a row-value predicate, so an index on the filter
+    columns followed by the sort columns serves each page in O(limit).
+    One extra row is fetched to tell whether another page exists. skip is
+    only honoured without a cursor, for clients still paging by offset.
+    """
+    stmt = stmt.order_by(*(column.desc() if descending else column.asc() for column in columns))
+    if cursor is not None:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        bound = tuple_(*(literal(value, column.type) for column, value in zip(columns, values)))
+        stmt = stmt.where(key < bound if descending else key > bound)
+    elif skip:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit + 1)
+
+
+def split_page(rows: Sequence[T], columns: Sequence[ColumnElement], limit: int) -> Tuple[List[T], Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page"""
+    items = list(rows[:limit])
+    if len(rows) <= limit or not items:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor([getattr(last, column.key) for column in columns])
+
+
+def page_response(page: Page, skip: int, limit: int) -> Dict[str, Any]:
+    """Shape a Page like the PaginatedResponse schemas"""
+    total_pages = None
+    if page.total is not None:
+        total_pages = (page.total + limit - 1) // limit if limit > 0 else 1
+    return {
+        "items": page.items,
+        "total": page.total,
+        "page": (skip // limit) + 1 if limit > 0 else 1,
+        "page_size": limit,
+        "total_pages": total_pages,
+        "next_cursor": page.next_cursor,
+    }
+
+
+class RowCounter:
+    """
+    Totals for paginated listings without a COUNT(*) on every page.
+
+    On PostgreSQL an unfiltered listing reads the planner's reltuples
+    estimate. Everything else runs an exact count whose result is reused
+    for ttl seconds, so paging through a listing counts it once.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def count(self, db: Session, stmt: Select) -> int:
+        """Count the rows stmt selects, estimated or cached where possible"""
+        estimate_stmt = self._estimate_statement(db.get_bind().dialect.name, stmt)
+        if estimate_stmt is not None:
+            estimate = db.scalar(estimate_stmt)
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+
+        key = self._cache_key(stmt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        total = db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery())) or 0
+        self._store(key, total)
+        return total
+
+    async def count_async(self, db: AsyncSession, stmt: Select) -> int:
+        """Count the rows stmt selects, estimated or cached where possible"""
+        estimate_stmt = self._estimate_statement(db.get_bind().dialect.name, stmt)
+        if estimate_stmt is not None:
+            estimate = await db.scalar(estimate_stmt)
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+
+        key = self._cache_key(stmt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        total = await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery())) or 0
+        self._store(key, total)
+        return total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _estimate_statement(self, dialect: str, stmt: Select):
+        if dialect != "postgresql" or stmt.whereclause is not None:
+            return None
+        froms = stmt.get_final_froms()
+        if len(froms) != 1 or not hasattr(froms[0], "fullname"):
+            return None
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        return text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)").bindparams(
+            name=froms[0].fullname
+        )
+
+    def _cache_key(self, stmt: Select) -> Tuple[str, str]:
+        compiled = stmt.compile()
+        return str(compiled), repr(sorted(compiled.params.items()))
+
+    def _lookup(self, key: Tuple[str, str]) -> Optional[int]:
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def _store(self, key: Tuple[str, str], total: int) -> None:
+        with self._lock:
+            if len(self._cache) >= self.max_entries:
+                now = time.monotonic()
+                self._cache = {k: v for k, v in self._cache.items() if v[0] >= now}
+                if len(self._cache) >= self.max_entries:
+                    self._cache.clear()
+            self._cache[key] = (time.monotonic() + self.ttl, total)
+
+
+# Create a singleton instance
+row_counter = RowCounter(ttl=settings.PAGINATION_COUNT_CACHE_SECONDS)
@@ -0,0 +1,33 @@
+"""
+Insert-time defaults for timestamp columns that listings sort by.
+
+SQLite stores datetimes as text and compares them as strings. Values bound
+from Python are written as 'YYYY-MM-DD HH:MM:SS.ffffff', but CURRENT_TIMESTAMP
+server defaults write 'YYYY-MM-DD HH:MM:SS', so equal instants would compare
+unequal. Columns using current_timestamp() as their default get the same
+format as bound values on SQLite and can be compared and indexed as stored.
+"""
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+# The text format SQLAlchemy binds datetimes with on SQLite, in SQLite strftime terms
+# (%f is seconds with milliseconds, padded to microseconds)
+SQLITE_DATETIME_SQL = "strftime('%Y-%m-%d %H:%M:%f', {}) || '000'"
+
+
+class current_timestamp(FunctionElement):
+    """The current time, written in the format bound datetimes are stored in"""
+    name = "current_timestamp"
+    inherit_cache = True
+    type = DateTime(timezone=True)
+
+
+@compiles(current_timestamp)
+def _compile_current_timestamp(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(current_timestamp, "sqlite")
+def _compile_current_timestamp_sqlite(element, compiler, **kw):
+    return f"({SQLITE_DATETIME_SQL.format(repr('now'))})"
@@ -4,6 +4,7 @@
 from .models.machine import Machine  # noqa: F401
 from .models.image_data import ImageData  # noqa: F401
 from .models.sensor_data import SensorData  # noqa: F401
+from .models.sensor_rollup import SensorRollupMinute, SensorRollupHour, SensorRollupDay  # noqa: F401
 from .models.prediction import Prediction  # noqa: F401
 from .models.model import Model  # noqa: F401
 from .models.alert import Alert  # noqa: F401
@@ -11,9 +11,10 @@ from fastapi.responses import JSONResponse, Response
 import uvicorn
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from .config import settings
 from .database import engine, Base, get_db
 from . import models
-from .middleware.rate_limiter import RateLimiter
+from .middleware.rate_limiter import RateLimiter, create_backend
 from .middleware.monitoring import MonitoringMiddleware
 from .core.logging_config import setup_logging
 
@@ -35,9 +36,21 @@ app = FastAPI(
 # Add monitoring middleware
 app.add_middleware(MonitoringMiddleware)
 
-# Add rate limiting middleware (100 requests per minute per IP)
-# TODO: Fix RateLimiter parameter issue
-# app.add_middleware(RateLimiter, requests=100, window=60)
+# Add rate limiting middleware (token buckets per user or IP, per route)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimiter,
+        requests=settings.RATE_LIMIT_REQUESTS,
+        window=settings.RATE_LIMIT_WINDOW_SECONDS,
+        routes=settings.RATE_LIMIT_ROUTES,
+        backend=create_backend(
+            settings.RATE_LIMIT_BACKEND,
+            settings.REDIS_URL,
+            settings.RATE_LIMIT_MAX_KEYS,
+            timeout=settings.RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+            retry_after=settings.RATE_LIMIT_REDIS_RETRY_SECONDS
+        )
+    )
 
 # CORS middleware with more restrictive settings
 app.add_middleware(
@@ -110,6 +123,8 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Import and include routers
 # Import lightweight/safe routers first. ML-heavy routers are imported lazily
 from .routes import auth, machine, sensor, alert, maintenance, metrics
+# The rest of app/api/api_v1 is not ported to this app yet, so api_router is not mounted
+from .api.api_v1.endpoints import uploads, websocket as ws_endpoint
 
 # Try to import ML-heavy routers (they may require large deps like tensorflow/numpy).
 # If they fail to import, skip them so the API can still start in a lightweight mode.
@@ -131,6 +146,9 @@ app.include_router(sensor.router, prefix="/api/sensors", tags=["Sensors"])
 app.include_router(alert.router, prefix="/api/alerts", tags=["Alerts"])
 app.include_router(maintenance.router, prefix="/api/maintenance", tags=["Maintenance"])
 app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
+app.include_router(uploads.router, prefix=f"{settings.API_V1_STR}/uploads", tags=["Uploads"])
+# Subscriptions and binary sensor streams at /ws/{client_id}
+app.include_router(ws_endpoint.router, tags=["WebSocket"])
 
 # Include ML routers if they were available
 if 'prediction' in ml_routes:
@@ -142,6 +160,57 @@ if 'enhanced_prediction' in ml_routes:
 if 'websocket' in ml_routes:
     app.include_router(ml_routes['websocket'].router, prefix="/api/websocket", tags=["Websocket"])
 
+@app.on_event("startup")
+async def start_live_state():
+    # Cross-worker invalidation of the in-memory dashboard state
+    from .services.live_state import live_state
+    live_state.start()
+
+@app.on_event("shutdown")
+async def stop_live_state():
+    # Registered before the broker's hook, so pending invalidations publish before it stops
+    from .services.live_state import live_state
+    await live_state.stop()
+
+@app.on_event("startup")
+async def start_websocket_broker():
+    from .ws.manager import manager as ws_manager
+    await ws_manager.start()
+
+@app.on_event("shutdown")
+async def stop_websocket_broker():
+    from .ws.manager import manager as ws_manager
+    await ws_manager.stop()
+
+@app.on_event("startup")
+async def start_anomaly_engine():
+    # Background refits of the streaming anomaly detectors (needs scikit-learn)
+    try:
+        from .services.anomaly_service import anomaly_engine
+    except Exception as e:
+        logger.warning(f"Anomaly detection unavailable: {e}")
+        return
+    anomaly_engine.start()
+
+@app.on_event("shutdown")
+async def stop_anomaly_engine():
+    try:
+        from .services.anomaly_service import anomaly_engine
+    except Exception:
+        return
+    await anomaly_engine.stop()
+
+@app.on_event("startup")
+async def start_partition_maintenance():
+    # Upcoming partitions, cold-month moves and retention archiving
+    from .services.partition_service import partition_service
+    partition_service.start()
+
+@app.on_event("shutdown")
+async def stop_partition_maintenance():
+    from .services.partition_service import partition_service
+    await partition_service.stop()
+
 @app.get("/")
 async def root():
     return {
@@ -1,47 +1,252 @@
-from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
-from datetime import datetime, timedelta
-from typing import Dict, List
+import logging
+import math
 import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
-class RateLimiter:
-    def __init__(self, requests: int = 100, window: int = 60):
-        self.requests = requests
-        self.window = window
-        self.access_records: Dict[str, List[float]] = {}
-
-    async def __call__(self, request: Request, call_next):
-        client_ip = request.client.host
-        current_time = time.time()
-        
-        # Clean up old records
-        if client_ip in self.access_records:
-            self.access_records[client_ip] = [t for t in self.access_records[client_ip] 
-                                           if current_time - t < self.window]
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+from starlette.datastructures import Headers, MutableHeaders
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Paths never rate limited
+EXEMPT_PREFIXES = ("/metrics", "/docs", "/redoc", "/openapi.json", "/static")
+
+# Atomic token bucket in Redis. Time comes from the Redis server so every
+# worker refills buckets against the same clock.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RateLimitRule(NamedTuple):
+    """requests per window seconds for paths starting with prefix"""
+    prefix: str
+    requests: int
+    window: float
+
+    @property
+    def rate(self) -> float:
+        return self.requests / self.window
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    # Seconds until a request would be allowed, and until the bucket is full
+    retry_after: float
+    reset_after: float
+
+
+def parse_rule(prefix: str, spec: str) -> RateLimitRule:
+    """Parse a "<requests>/<seconds>" limit such as "100/60" """
+    requests, _, window = spec.partition("/")
+    return RateLimitRule(prefix, int(requests), float(window or 1))
+
+
+def _result(allowed: bool, tokens: float, rule: RateLimitRule) -> RateLimitResult:
+    return RateLimitResult(
+        allowed=allowed,
+        remaining=int(tokens),
+        retry_after=0.0 if allowed else (1 - tokens) / rule.rate,
+        reset_after=(rule.requests - tokens) / rule.rate
+    )
+
+
+class MemoryBackend:
+    """
+    Token buckets held by this worker.
+
+    Buckets are kept in least-recently-used order. A bucket left idle until it
+    refills is indistinguishable from a missing one, so such buckets are
+    evicted from the front as requests arrive; max_keys bounds memory under a
+    flood of distinct clients.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> (tokens, updated, full_at)
+        self._buckets: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rule: RateLimitRule) -> RateLimitResult:
+        now = time.monotonic()
+        # Taken out first so only a new client can push another one out,
+        # and reinserted below as the most recently used
+        bucket = self._buckets.pop(key, None)
+        self._evict(now)
+
+        if bucket is None:
+            tokens = float(rule.requests)
         else:
-            self.access_records[client_ip] = []
-        
-        # Check rate limit
-        if len(self.access_records[client_ip]) >= self.requests:
-            retry_after = int(self.window - (current_time - self.access_records[client_ip][0]))
-            headers = {
-                "Retry-After": str(retry_after),
-                "X-RateLimit-Limit": str(self.requests),
-                "X-RateLimit-Remaining": "0",
-                "X-RateLimit-Reset": str(int(current_time + retry_after))
-            }
-            return JSONResponse(
+            tokens = min(rule.requests, bucket[0] + (now - bucket[1]) * rule.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now, now + (rule.requests - tokens) / rule.rate)
+        return _result(allowed, tokens, rule)
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            key, (_, _, full_at) = next(iter(self._buckets.items()))
+            if full_at > now and len(self._buckets) < self.max_keys:
+                break
+            del self._buckets[key]
+
+
+class RedisBackend:
+    """
+    Token buckets shared by every worker through Redis.
+
+    Redis calls time out after timeout seconds. After a failure the backend
+    limits locally with fallback for retry_after seconds before trying Redis
+    again, so an outage costs one timeout per period rather than per request.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        fallback: Optional[MemoryBackend] = None,
+        timeout: float = 0.25,
+        retry_after: float = 30.0
+    ):
+        self.url = url
+        self.fallback = fallback if fallback is not None else MemoryBackend()
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._redis = None
+        self._script = None
+        # time.monotonic() before which Redis is skipped
+        self._down_until = 0.0
+
+    async def take(self, key: str, rule: RateLimitRule) -> RateLimitResult:
+        if time.monotonic() < self._down_until:
+            return await self.fallback.take(key, rule)
+        try:
+            if self._script is None:
+                import redis.asyncio as redis
+
+                self._redis = redis.from_url(
+                    self.url,
+                    socket_connect_timeout=self.timeout,
+                    socket_timeout=self.timeout
+                )
+                self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, tokens = await self._script(keys=[f"ratelimit:{key}"], args=[rule.requests, rule.rate])
+        except Exception as e:
+            # Keep limiting per worker while Redis is unavailable
+            self._down_until = time.monotonic() + self.retry_after
+            logger.error(
+                f"Rate limit backend error, limiting locally for {self.retry_after:g}s: {str(e)}"
+            )
+            return await self.fallback.take(key, rule)
+        return _result(bool(allowed), float(tokens), rule)
+
+
+def create_backend(
+    kind: str,
+    redis_url: Optional[str] = None,
+    max_keys: int = 100000,
+    timeout: float = 0.25,
+    retry_after: float = 30.0
+):
+    """Create the backend named in settings ("memory" or "redis")"""
+    if kind == "redis":
+        return RedisBackend(redis_url, MemoryBackend(max_keys), timeout=timeout, retry_after=retry_after)
+    if kind == "memory":
+        return MemoryBackend(max_keys)
+    raise ValueError(f"Unknown rate limit backend: {kind}")
+
+
+class RateLimiter:
+    """
+    Pure ASGI token-bucket rate limiter.
+
+    Each client gets one bucket per matching rule: authenticated requests are
+    keyed by the user in their bearer token, others by client IP. The longest
+    route prefix in routes wins, falling back to requests per window. Every
+    request costs one dictionary lookup and a little arithmetic.
+    """
+
+    def __init__(
+        self,
+        app,
+        requests: int = 100,
+        window: float = 60,
+        routes: Optional[Dict[str, str]] = None,
+        backend=None
+    ):
+        self.app = app
+        self.default_rule = RateLimitRule("", requests, window)
+        self.rules: List[RateLimitRule] = sorted(
+            (parse_rule(prefix, spec) for prefix, spec in (routes or {}).items()),
+            key=lambda rule: len(rule.prefix),
+            reverse=True
+        )
+        self.backend = backend if backend is not None else MemoryBackend()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'].startswith(EXEMPT_PREFIXES):
+            return await self.app(scope, receive, send)
+
+        rule = self._rule(scope['path'])
+        result = await self.backend.take(f"{rule.prefix}|{self._identity(scope)}", rule)
+        headers = {
+            "X-RateLimit-Limit": str(rule.requests),
+            "X-RateLimit-Remaining": str(result.remaining),
+            "X-RateLimit-Reset": str(int(time.time() + math.ceil(result.reset_after))),
+        }
+
+        if not result.allowed:
+            retry_after = max(1, math.ceil(result.retry_after))
+            response = JSONResponse(
                 status_code=429,
                 content={"detail": f"Too many requests. Please try again in {retry_after} seconds."},
-                headers=headers
+                headers={**headers, "Retry-After": str(retry_after)}
             )
-        
-        # Add current request timestamp
-        self.access_records[client_ip].append(current_time)
-        
-        # Add rate limit headers to response
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(self.requests)
-        response.headers["X-RateLimit-Remaining"] = str(self.requests - len(self.access_records[client_ip]))
-        
-        return response
+            return await response(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _rule(self, path: str) -> RateLimitRule:
+        for rule in self.rules:
+            if path.startswith(rule.prefix):
+                return rule
+        return self.default_rule
+
+    def _identity(self, scope) -> str:
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                # Verified, so a forged subject cannot buy a fresh bucket
+                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                if payload.get("sub") is not None:
+                    return f"user:{payload['sub']}"
+            except JWTError:
+                pass
+        client = scope.get('client')
+        return f"ip:{client[0] if client else 'unknown'}"
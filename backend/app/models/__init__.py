@@ -5,6 +5,7 @@ from ..database import Base
 from .machine import Machine
 from .image_data import ImageData
 from .sensor_data import SensorData
+from .sensor_rollup import SensorRollupMinute, SensorRollupHour, SensorRollupDay
 from .prediction import Prediction
 from .model import Model
 from .alert import Alert
@@ -27,6 +28,9 @@ __all__ = [
     'Machine',
     'ImageData',
     'SensorData',
+    'SensorRollupMinute',
+    'SensorRollupHour',
+    'SensorRollupDay',
     'Prediction',
     'Model',
     'Alert',
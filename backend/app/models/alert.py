@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from ..database import Base
+from ..db.timestamps import current_timestamp
 
 class AlertSeverity(str, enum.Enum):
     INFO = "info"
@@ -16,10 +17,13 @@ class AlertStatus(str, enum.Enum):
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("idx_alerts_machine_timestamp", "machine_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     machine_id = Column(Integer, ForeignKey("machines.id", ondelete="CASCADE"), nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), default=current_timestamp(), server_default=func.now())
     
     # Alert details
     title = Column(String, nullable=False)
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import json
@@ -45,6 +45,8 @@ class Model(Base):
     previous_version_id = Column(Integer, ForeignKey("models.id"), nullable=True)
     
     __table_args__ = (
+        # Resolves the "latest" active model per type without a table scan
+        Index("ix_models_type_active_trained", "model_type", "is_active", "trained_at"),
         # Ensure only one active model per type
         # This is a partial index that only includes rows where is_active is True
         # SQLite doesn't support partial indexes with the syntax we need, so we'll handle this in the application logic
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
+from ..db.timestamps import current_timestamp
 
 class Prediction(Base):
     __tablename__ = "predictions"
+    __table_args__ = (
+        Index("idx_predictions_machine_time", "machine_id", "prediction_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     machine_id = Column(Integer, ForeignKey("machines.id", ondelete="CASCADE"), nullable=False)
@@ -19,7 +23,7 @@ class Prediction(Base):
     
     # Model info
     model_version = Column(String, nullable=False)
-    prediction_time = Column(DateTime(timezone=True), server_default=func.now())
+    prediction_time = Column(DateTime(timezone=True), default=current_timestamp(), server_default=func.now())
     
     # Relationships
     machine = relationship("Machine", back_populates="predictions")
@@ -1,14 +1,19 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
+from ..db.timestamps import current_timestamp
 
 class SensorData(Base):
     __tablename__ = "sensor_data"
+    __table_args__ = (
+        # Serves per-machine time-range scans and keyset pages
+        Index("idx_sensor_data_machine_timestamp", "machine_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     machine_id = Column(Integer, ForeignKey("machines.id", ondelete="CASCADE"), nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), default=current_timestamp(), server_default=func.now())
     temperature = Column(Float, nullable=True)  # in Celsius
     vibration = Column(Float, nullable=True)    # in mm/s²
     pressure = Column(Float, nullable=True)     # in bar
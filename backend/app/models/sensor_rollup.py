@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, PrimaryKeyConstraint
+from ..database import Base
+
+class SensorRollupMixin:
+    """
+    Mergeable aggregates of one sensor column for one machine and time bucket.
+
+    count/sum/min/max can be combined across batches and coarser buckets, so
+    rows are upserted as data arrives and averages are derived as sum / count.
+    """
+    machine_id = Column(Integer, nullable=False)
+    sensor = Column(String(32), nullable=False)
+    bucket = Column(DateTime, nullable=False)  # bucket start, naive UTC
+    count = Column(Integer, nullable=False, default=0)
+    sum = Column(Float, nullable=False, default=0.0)
+    min = Column(Float, nullable=True)
+    max = Column(Float, nullable=True)
+
+class SensorRollupMinute(SensorRollupMixin, Base):
+    __tablename__ = "sensor_rollup_minute"
+    __table_args__ = (PrimaryKeyConstraint("machine_id", "sensor", "bucket"),)
+
+class SensorRollupHour(SensorRollupMixin, Base):
+    __tablename__ = "sensor_rollup_hour"
+    __table_args__ = (PrimaryKeyConstraint("machine_id", "sensor", "bucket"),)
+
+class SensorRollupDay(SensorRollupMixin, Base):
+    __tablename__ = "sensor_rollup_day"
+    __table_args__ = (PrimaryKeyConstraint("machine_id", "sensor", "bucket"),)
+
+# Rollup models by resolution, finest first
+ROLLUP_MODELS = {
+    "minute": SensorRollupMinute,
+    "hour": SensorRollupHour,
+    "day": SensorRollupDay,
+}
@@ -1,18 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..database import get_db
-from ..services import alert_service
+from ..core.response_cache import cached_response
+from ..database import get_async_db, get_db
+from ..db.pagination import InvalidCursorError, page_response
+from ..services.alert_service import alert_service
 from ..api.deps import get_current_active_user
 
 router = APIRouter()
 
 @router.get("/", response_model=schemas.AlertListResponse)
-def list_alerts(
+@cached_response("alerts", ttl=15)
+async def list_alerts(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Count matching alerts (cached briefly)"),
     machine_id: Optional[int] = None,
     status: Optional[str] = None,
     severity: Optional[str] = None,
@@ -22,7 +28,7 @@ def list_alerts(
         description="Filter alerts created in the last X hours"
     ),
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
@@ -34,12 +40,15 @@ def list_alerts(
     - **resolved**: Filter by resolved status
     - **time_range_hours**: Filter by creation time (last X hours)
     - **search**: Search in title and message
+    - **cursor**: Continue after the last alert of the previous page
     """
     try:
-        alerts, total = alert_service.get_alerts(
+        page = await alert_service.get_alerts_async(
             db=db,
             skip=skip,
             limit=limit,
+            cursor=cursor,
+            include_total=include_total,
             machine_id=machine_id,
             status=status,
             severity=severity,
@@ -48,13 +57,10 @@ def list_alerts(
             search=search
         )
         
-        return {
-            "items": alerts,
-            "total": total,
-            "page": (skip // limit) + 1 if limit > 0 else 1,
-            "page_size": limit,
-            "total_pages": (total + limit - 1) // limit if limit > 0 else 1
-        }
+        return page_response(page, skip, limit)
+    except InvalidCursorError as e:
+        # "status" is a filter parameter here, shadowing fastapi.status
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -63,7 +69,7 @@ def list_alerts(
 
 @router.get("/stats", response_model=schemas.AlertStatsResponse)
 def get_alert_stats(
-    time_range_hours: int = Query(24, le=168, description="Time range in hours (max 168)"),
+    time_range_hours: int = Query(24, ge=1, le=168, description="Time range in hours (1-168)"),
     machine_id: Optional[int] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
@@ -87,15 +93,15 @@ def get_alert_stats(
         )
 
 @router.get("/{alert_id}", response_model=schemas.AlertResponse)
-def get_alert(
+async def get_alert(
     alert_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Get a specific alert by ID.
     """
-    alert = alert_service.get_alert(db, alert_id)
+    alert = await alert_service.get_alert_async(db, alert_id)
     if not alert:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -107,9 +113,9 @@ def get_alert(
     return {"data": alert}
 
 @router.post("/", response_model=schemas.AlertResponse, status_code=status.HTTP_201_CREATED)
-def create_alert(
+async def create_alert(
     alert_in: schemas.AlertCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
@@ -120,7 +126,7 @@ def create_alert(
     try:
         # TODO: Add permission check if needed
         
-        alert = alert_service.create_alert(
+        alert = await alert_service.create_alert_async(
             db=db,
             alert_in=alert_in,
             created_by=current_user.id
@@ -128,17 +134,17 @@ def create_alert(
         
         return {"data": alert}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating alert: {str(e)}"
         )
 
 @router.put("/{alert_id}", response_model=schemas.AlertResponse)
-def update_alert(
+async def update_alert(
     alert_id: int,
     alert_in: schemas.AlertUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
@@ -149,7 +155,7 @@ def update_alert(
     try:
         # TODO: Add permission check if needed
         
-        alert = alert_service.update_alert(
+        alert = await alert_service.update_alert_async(
             db=db,
             alert_id=alert_id,
             alert_in=alert_in,
@@ -166,16 +172,16 @@ def update_alert(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating alert: {str(e)}"
         )
 
 @router.post("/{alert_id}/acknowledge", response_model=schemas.AlertResponse)
-def acknowledge_alert(
+async def acknowledge_alert(
     alert_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
@@ -184,7 +190,7 @@ def acknowledge_alert(
     Marks the alert as acknowledged by the current user.
     """
     try:
-        alert = alert_service.acknowledge_alert(
+        alert = await alert_service.acknowledge_alert_async(
             db=db,
             alert_id=alert_id,
             user_id=current_user.id
@@ -200,17 +206,17 @@ def acknowledge_alert(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error acknowledging alert: {str(e)}"
         )
 
 @router.post("/{alert_id}/resolve", response_model=schemas.AlertResponse)
-def resolve_alert(
+async def resolve_alert(
     alert_id: int,
     resolution_notes: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
@@ -219,7 +225,7 @@ def resolve_alert(
     Marks the alert as resolved by the current user with optional resolution notes.
     """
     try:
-        alert = alert_service.resolve_alert(
+        alert = await alert_service.resolve_alert_async(
             db=db,
             alert_id=alert_id,
             user_id=current_user.id,
@@ -236,16 +242,17 @@ def resolve_alert(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error resolving alert: {str(e)}"
         )
 
 @router.get("/machine/{machine_id}/active", response_model=List[schemas.Alert])
-def get_active_alerts_for_machine(
+@cached_response("alerts", ttl=15)
+async def get_active_alerts_for_machine(
     machine_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
@@ -254,14 +261,15 @@ def get_active_alerts_for_machine(
     Returns all non-resolved alerts for the specified machine.
     """
     try:
-        alerts, _ = alert_service.get_alerts(
+        page = await alert_service.get_alerts_async(
             db=db,
             machine_id=machine_id,
             status="open",
-            limit=1000  # High limit to get all active alerts
+            limit=1000,  # High limit to get all active alerts
+            include_total=False
         )
         
-        return alerts
+        return page.items
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from .. import models, schemas
+from ..core.response_cache import cached_response
 from ..database import get_db
+from ..db.pagination import InvalidCursorError, page_response
 from ..services import machine_service
+from ..services.live_state import live_state
 
 router = APIRouter(
     prefix="/machines",
@@ -12,20 +15,22 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=schemas.MachineListResponse)
+@cached_response("machines", ttl=60)
 async def list_machines(
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
     """List all machines with pagination"""
-    machines, total = machine_service.get_machines(db, skip=skip, limit=limit)
-    return {
-        "items": machines,
-        "total": total,
-        "page": skip // limit + 1,
-        "page_size": limit,
-        "total_pages": (total + limit - 1) // limit
-    }
+    try:
+        page = machine_service.get_machines(
+            db, skip=skip, limit=limit, cursor=cursor, include_total=include_total
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(page, skip, limit)
 
 @router.post("/", response_model=schemas.MachineResponse, status_code=status.HTTP_201_CREATED)
 async def create_machine(
@@ -41,6 +46,15 @@ async def create_machine(
         )
     return {"data": machine_service.create_machine(db=db, machine=machine)}
 
+@router.get("/health", response_model=schemas.FleetHealthResponse)
+async def get_fleet_health(
+    machine_ids: Optional[List[int]] = Query(None, description="Machines to include; all by default"),
+    db: Session = Depends(get_db)
+):
+    """Get health statistics for the whole fleet, or the given machines"""
+    health_stats = machine_service.get_fleet_health(db, machine_ids=machine_ids)
+    return {"data": list(health_stats.values())}
+
 @router.get("/{machine_id}", response_model=schemas.MachineResponse)
 async def read_machine(
     machine_id: int, 
@@ -89,7 +103,7 @@ async def get_machine_health(
     db: Session = Depends(get_db)
 ):
     """Get health statistics for a machine"""
-    health_stats = machine_service.get_machine_health(db, machine_id=machine_id)
+    health_stats = live_state.health(db, machine_id)
     if not health_stats:
         raise HTTPException(status_code=404, detail="Machine not found")
     return {"data": health_stats}
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 
 from app import models, schemas, crud
 from app.api.deps import get_db, get_current_active_user
+from app.core.response_cache import cached_response
 from app.models.maintenance import MaintenanceStatus, MaintenanceType
 from app.models.user import UserRole
 
@@ -28,6 +29,7 @@ def create_maintenance_schedule(
     return crud.create_maintenance_schedule(db=db, schedule=schedule, user_id=current_user.id)
 
 @router.get("/schedules/", response_model=List[schemas.MaintenanceScheduleInDB])
+@cached_response("maintenance", ttl=60)
 def read_maintenance_schedules(
     skip: int = 0,
     limit: int = 100,
@@ -49,6 +51,7 @@ def read_maintenance_schedules(
     return schedules
 
 @router.get("/schedules/upcoming", response_model=List[schemas.MaintenanceScheduleInDB])
+@cached_response("maintenance", ttl=60)
 def read_upcoming_maintenance(
     days_ahead: int = 7,
     limit: int = 10,
@@ -3,7 +3,12 @@ from typing import List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 
+from sqlalchemy.orm import Session
+
+from app.database import get_db
 from app.services.model_service import ModelService
+from app.services.model_registry import model_registry
+from app.core.response_cache import cached_response
 from app.core.security import get_current_active_user
 from app.schemas.user import User
 
@@ -28,7 +33,7 @@ class ModelResponse(BaseModel):
         from_attributes = True
 
 @router.post("/train", response_model=ModelResponse, status_code=status.HTTP_201_CREATED)
-asdef train_model(
+async def train_model(
     model_data: ModelCreate,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -61,6 +66,7 @@ asdef train_model(
         )
 
 @router.get("/", response_model=List[ModelResponse])
+@cached_response("models", ttl=300)
 async def list_models(
     skip: int = 0,
     limit: int = 100,
@@ -108,15 +114,20 @@ async def delete_model(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Model not found or could not be deleted"
         )
+    model_registry.invalidate()
     return None
 
 @router.post("/{model_id}/rollback")
 async def rollback_to_model(
     model_id: int,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Rollback to a previous model version
+    
+    The target version is loaded before it becomes active, so predictions
+    hot-swap to it without a cold start.
     """
     if not current_user.is_superuser:
         raise HTTPException(
@@ -124,8 +135,17 @@ async def rollback_to_model(
             detail="Only administrators can rollback models"
         )
     
-    # Implementation would update the active model reference
-    return {"status": "success", "message": f"Rolled back to model {model_id}"}
+    try:
+        model = await model_registry.activate(db, model_id)
+    except LookupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    return {
+        "status": "success",
+        "message": f"Rolled back to model {model.name} v{model.version}"
+    }
 
 # Add model prediction endpoint
 @router.post("/{model_id}/predict")
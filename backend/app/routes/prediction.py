@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query, status
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..database import get_db
-from ..services import prediction_service
+from ..database import get_async_db, get_db
+from ..db.pagination import InvalidCursorError, page_response
+from ..services.live_state import live_state
+from ..services.prediction_service import prediction_service
 from ..api.deps import get_current_active_user
 
 router = APIRouter()
 
-@router.post("/image/{machine_id}", response_model=schemas.PredictionInDB)
+@router.post("/image/{machine_id}", response_model=schemas.PredictionRecord)
 async def predict_from_image_endpoint(
     machine_id: int,
     image: UploadFile = File(...),
@@ -43,7 +46,45 @@ async def predict_from_image_endpoint(
             detail=f"Error processing prediction: {str(e)}"
         )
 
-@router.post("/sensor/{machine_id}", response_model=schemas.PredictionInDB)
+@router.post("/image/{machine_id}/batch", response_model=schemas.BatchImagePredictionResponse)
+async def predict_from_images_endpoint(
+    machine_id: int,
+    images: List[UploadFile] = File(...),
+    model_version: str = "latest",
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Make predictions for a batch of uploaded images.
+    
+    All images are scored with a single inference call and stored in one
+    transaction. Images that cannot be processed are reported in errors,
+    keyed by their position in the upload.
+    """
+    try:
+        predictions, errors = await prediction_service.predict_from_images(
+            db=db,
+            machine_id=machine_id,
+            image_files=images,
+            model_version=model_version,
+            user_id=current_user.id
+        )
+        return {
+            "predictions": predictions,
+            "total_processed": len(images),
+            "success_count": len(predictions),
+            "failed_count": len(errors),
+            "errors": errors or None
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing batch prediction: {str(e)}"
+        )
+
+@router.post("/sensor/{machine_id}", response_model=schemas.PredictionRecord)
 async def predict_from_sensor_data_endpoint(
     machine_id: int,
     sensor_data: schemas.SensorDataCreate,
@@ -80,33 +121,34 @@ async def predict_from_sensor_data_endpoint(
         )
 
 @router.get("/", response_model=schemas.PredictionListResponse)
-def list_predictions(
+async def list_predictions(
     machine_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Count matching predictions (cached briefly)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     List predictions with optional filtering.
     
-    Returns a paginated list of predictions, optionally filtered by machine_id.
+    Returns a paginated list of predictions, newest first, optionally
+    filtered by machine_id. Pass next_cursor back as cursor for the next page.
     """
     try:
-        predictions, total = prediction_service.get_predictions(
+        page = await prediction_service.get_predictions_async(
             db=db,
             machine_id=machine_id,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total
         )
         
-        return {
-            "items": predictions,
-            "total": total,
-            "page": (skip // limit) + 1,
-            "page_size": limit,
-            "total_pages": (total + limit - 1) // limit if limit > 0 else 0
-        }
+        return page_response(page, skip, limit)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -114,17 +156,15 @@ def list_predictions(
         )
 
 @router.get("/{prediction_id}", response_model=schemas.PredictionInDB)
-def get_prediction(
+async def get_prediction(
     prediction_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Get a specific prediction by ID.
     """
-    prediction = db.query(models.Prediction).filter(
-        models.Prediction.id == prediction_id
-    ).first()
+    prediction = await db.get(models.Prediction, prediction_id)
     
     if not prediction:
         raise HTTPException(
@@ -138,19 +178,15 @@ def get_prediction(
     return prediction
 
 @router.get("/machine/{machine_id}/latest", response_model=schemas.PredictionInDB)
-def get_latest_prediction(
+async def get_latest_prediction(
     machine_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Get the latest prediction for a specific machine.
     """
-    prediction = db.query(models.Prediction).filter(
-        models.Prediction.machine_id == machine_id
-    ).order_by(
-        models.Prediction.created_at.desc()
-    ).first()
+    prediction = await live_state.latest_prediction_async(db, machine_id)
     
     if not prediction:
         raise HTTPException(
@@ -164,10 +200,10 @@ def get_latest_prediction(
     return prediction
 
 @router.get("/machine/{machine_id}/history", response_model=schemas.PredictionListResponse)
-def get_prediction_history(
+async def get_prediction_history(
     machine_id: int,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
@@ -176,7 +212,7 @@ def get_prediction_history(
     Returns the most recent predictions for the specified machine.
     """
     try:
-        predictions, total = prediction_service.get_predictions(
+        page = await prediction_service.get_predictions_async(
             db=db,
             machine_id=machine_id,
             skip=0,
@@ -184,8 +220,8 @@ def get_prediction_history(
         )
         
         return {
-            "items": predictions,
-            "total": total,
+            "items": page.items,
+            "total": page.total,
             "page": 1,
             "page_size": limit,
             "total_pages": 1  # Since we're not implementing pagination for history
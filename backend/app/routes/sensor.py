@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import pandas as pd
 from datetime import datetime
-import io
 
 from .. import models, schemas
-from ..database import get_db
+from ..database import get_async_db, get_db
+from ..services.archive_service import sensor_archive
+from ..services.ingest_service import ingest_service
+from ..services.live_state import live_state
 
 router = APIRouter()
 
-@router.post("/upload/{machine_id}", response_model=schemas.SensorDataResponse)
+@router.post("/upload/{machine_id}", response_model=schemas.SensorIngestResponse)
 async def upload_sensor_data(
     machine_id: int,
     file: UploadFile = File(...),
@@ -19,6 +24,8 @@ async def upload_sensor_data(
     """
     Upload sensor data from a CSV file for a specific machine.
     CSV should contain columns: timestamp, temperature, vibration, pressure, rpm, current, voltage
+
+    The file is parsed and written in chunks, so large uploads are never held in memory at once.
     """
     # Check if machine exists
     db_machine = db.query(models.Machine).filter(models.Machine.id == machine_id).first()
@@ -26,73 +33,69 @@ async def upload_sensor_data(
         raise HTTPException(status_code=404, detail="Machine not found")
     
     try:
-        # Read CSV file
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        # Validate required columns
-        required_columns = ['timestamp', 'temperature', 'vibration', 'pressure', 'rpm', 'current', 'voltage']
-        if not all(col in df.columns for col in required_columns):
-            raise HTTPException(
-                status_code=400,
-                detail=f"CSV must contain these columns: {', '.join(required_columns)}"
-            )
-        
-        # Convert timestamp to datetime if it's not already
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        # Create sensor data records
-        sensor_data_list = []
-        for _, row in df.iterrows():
-            sensor_data = models.SensorData(
-                machine_id=machine_id,
-                timestamp=row['timestamp'],
-                temperature=row['temperature'],
-                vibration=row['vibration'],
-                pressure=row['pressure'],
-                rpm=row['rpm'],
-                current=row['current'],
-                voltage=row['voltage']
-            )
-            sensor_data_list.append(sensor_data)
-        
-        # Bulk insert
-        db.bulk_save_objects(sensor_data_list)
-        db.commit()
+        # Parse, validate and insert chunk by chunk off the event loop
+        stats = await run_in_threadpool(
+            ingest_service.ingest_csv, db, machine_id, file.file
+        )
         
         # Update machine's last_updated timestamp
         db_machine.last_updated = datetime.utcnow()
         db.commit()
         
-        return {"message": f"Successfully uploaded {len(sensor_data_list)} sensor readings"}
+        return {
+            "message": f"Successfully uploaded {stats['rows_inserted']} sensor readings",
+            **stats
+        }
         
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
+@router.get("/archive", response_class=StreamingResponse)
+def read_sensor_archive(
+    machine_id: Optional[int] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    columns: Optional[str] = Query(None, description="Comma-separated columns, default all")
+):
+    """
+    Stream archived sensor history as Apache Arrow IPC (record batches in
+    file order), for reports and training jobs that scan long ranges.
+    """
+    try:
+        stream = sensor_archive.ipc_stream(
+            columns=columns.split(",") if columns else None,
+            machine_ids=[machine_id] if machine_id is not None else None,
+            start_time=start_time,
+            end_time=end_time
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(stream, media_type="application/vnd.apache.arrow.stream")
+
 @router.get("/machine/{machine_id}", response_model=List[schemas.SensorData])
-def get_sensor_data(
+async def get_sensor_data(
     machine_id: int,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get sensor data for a specific machine with optional time range filtering
     """
-    query = db.query(models.SensorData).filter(models.SensorData.machine_id == machine_id)
+    stmt = select(models.SensorData).where(models.SensorData.machine_id == machine_id)
     
     if start_time:
-        query = query.filter(models.SensorData.timestamp >= start_time)
+        stmt = stmt.where(models.SensorData.timestamp >= start_time)
     if end_time:
-        query = query.filter(models.SensorData.timestamp <= end_time)
+        stmt = stmt.where(models.SensorData.timestamp <= end_time)
     
     # Order by most recent first
-    query = query.order_by(models.SensorData.timestamp.desc())
+    stmt = stmt.order_by(models.SensorData.timestamp.desc())
     
     # Apply limit
-    sensor_data = query.limit(limit).all()
+    sensor_data = (await db.scalars(stmt.limit(limit))).all()
     
     if not sensor_data:
         raise HTTPException(
@@ -103,17 +106,14 @@ def get_sensor_data(
     return sensor_data
 
 @router.get("/latest/machine/{machine_id}", response_model=schemas.SensorData)
-def get_latest_sensor_data(
+async def get_latest_sensor_data(
     machine_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the most recent sensor reading for a specific machine
     """
-    latest = db.query(models.SensorData)\
-        .filter(models.SensorData.machine_id == machine_id)\
-        .order_by(models.SensorData.timestamp.desc())\
-        .first()
+    latest = await live_state.latest_reading_async(db, machine_id)
     
     if not latest:
         raise HTTPException(
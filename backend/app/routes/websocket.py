@@ -3,14 +3,12 @@ from fastapi.responses import HTMLResponse
 from typing import Optional
 import json
 import uuid
-import asyncio
 from datetime import datetime
 import logging
 
-from ..ws.manager import manager as ws_manager
-from ..services.anomaly_service import detect_anomalies, get_recent_sensor_readings
-from ..models.anomaly import AnomalyCreate, AnomalySeverity
-from ..database import get_db
+from ..ws.manager import manager as websocket_manager
+# Importing the stream registers its push to machine subscribers
+from ..services.anomaly_stream import anomaly_stream
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -45,14 +43,14 @@ async def websocket_test_page():
 @router.websocket("/ws/anomaly-detection")
 async def websocket_anomaly_detection(
     websocket: WebSocket,
-    machine_id: str = Query(..., description="Machine ID to monitor"),
+    machine_id: int = Query(..., description="Machine ID to monitor"),
     token: Optional[str] = Query(None, description="Authentication token"),
 ):
     """
     WebSocket endpoint for real-time anomaly detection.
     
-    This endpoint maintains a persistent WebSocket connection to send real-time
-    anomaly detection updates for the specified machine.
+    The connection is subscribed to the machine and anomalies are pushed as
+    readings are ingested; nothing is polled per connection.
     """
     client_id = str(uuid.uuid4())
     
@@ -68,65 +66,41 @@ async def websocket_anomaly_detection(
             await websocket.close(code=1008, reason="Invalid token")
             return
     
-    # Accept the WebSocket connection
-    await ws_manager.connect(websocket, client_id, user_id)
+    # Accept the WebSocket connection and subscribe it to the machine's anomalies
+    await websocket_manager.connect(websocket, client_id, user_id)
+    await websocket_manager.subscribe_to_machine(client_id, machine_id)
     
     try:
         # Send a welcome message
-        await ws_manager.send_personal_message(
-            json.dumps({
+        await websocket_manager.send_personal_message(
+            client_id,
+            {
                 "type": "connection_established",
                 "message": "Connected to anomaly detection service",
                 "machine_id": machine_id,
                 "timestamp": datetime.utcnow().isoformat()
-            }),
-            client_id
+            }
         )
         
-        # Main loop to send real-time updates
+        # Anomalies are pushed by the stream; only wait for the client to leave
         while True:
-            # Get the latest sensor data (in a real app, this would be from a message queue or database)
-            db = next(get_db())
-            sensor_data = get_recent_sensor_readings(db, machine_id, limit=10)
-            
-            # Detect anomalies in the sensor data
-            anomalies = await detect_anomalies(sensor_data)
-            
-            # Send the anomalies to the client
-            if anomalies:
-                await ws_manager.send_personal_message(
-                    json.dumps({
-                        "type": "anomaly_detected",
-                        "machine_id": machine_id,
-                        "anomalies": [
-                            {
-                                "id": str(anomaly.id),
-                                "sensor_type": anomaly.sensor_type,
-                                "value": anomaly.value,
-                                "severity": anomaly.severity,
-                                "timestamp": anomaly.timestamp.isoformat(),
-                                "suggested_action": anomaly.suggested_action
-                            }
-                            for anomaly in anomalies
-                        ],
-                        "timestamp": datetime.utcnow().isoformat()
-                    }),
-                    client_id
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket_manager.send_personal_message(
+                    client_id,
+                    {"type": "pong", "timestamp": datetime.utcnow().isoformat()}
                 )
             
-            # Wait before the next update (e.g., every 5 seconds)
-            await asyncio.sleep(5)
-            
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected: {client_id}")
-        ws_manager.disconnect(client_id)
+        websocket_manager.disconnect(client_id)
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
         try:
             await websocket.close()
         except:
             pass
-        ws_manager.disconnect(client_id)
+        websocket_manager.disconnect(client_id)
 
 # Add broadcast endpoint for server-initiated messages
 @router.post("/ws/broadcast/{user_id}")
@@ -139,7 +113,7 @@ async def broadcast_message(
     
     This endpoint allows the server to push notifications to specific users.
     """
-    await ws_manager.broadcast_to_user(user_id, json.dumps(message))
+    await websocket_manager.send_to_user(user_id, message)
     return {"status": "message_sent", "user_id": user_id, "message": message}
 
 # Add this router to your main FastAPI app
@@ -76,7 +76,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
             
             # Handle incoming messages (if needed)
             # For now, just echo the message back
-            await ws_manager.send_personal_message(f"Echo: {data}", client_id)
+            await ws_manager.send_personal_message(client_id, f"Echo: {data}")
             
     except WebSocketDisconnect:
         ws_manager.disconnect(client_id)
@@ -44,6 +44,7 @@ class AlertResponse(ResponseBase):
 
 class AlertListResponse(ResponseBase):
     data: List[Alert]
+    next_cursor: Optional[str] = None
 
 class AlertStats(BaseModel):
     total: int
@@ -43,10 +43,11 @@ class ResponseBase(ModelBase):
 
 class PaginatedResponse(ResponseBase):
     """Base response model for paginated results"""
-    total: int
+    total: Optional[int] = Field(None, description="Matching rows; omitted when include_total is false")
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page")
 
 class TokenData(ModelBase):
     """Token data model for JWT authentication"""
@@ -55,6 +55,10 @@ class MachineHealthStats(ModelBase):
         default_factory=lambda: {"critical": 0, "warning": 0, "info": 0},
         description="Count of alerts by severity"
     )
+    open_alert_count: Optional[Dict[str, int]] = Field(
+        None,
+        description="Count of open alerts by severity"
+    )
     sensor_stats: Optional[Dict[str, Dict[str, float]]] = Field(
         None,
         description="Statistics for sensor readings (min, max, avg, std)"
@@ -63,6 +67,9 @@ class MachineHealthStats(ModelBase):
 class MachineHealthResponse(ResponseBase):
     data: MachineHealthStats
 
+class FleetHealthResponse(ResponseBase):
+    data: List[MachineHealthStats]
+
 # Maintenance schemas
 class MaintenanceType(str, Enum):
     PREVENTIVE = "preventive"
@@ -64,6 +64,23 @@ class PredictionInDB(PredictionBase):
     class Config:
         from_attributes = True
 
+class PredictionRecord(ModelBase):
+    """Schema for a row of the predictions table, as returned by the prediction endpoints"""
+    id: int
+    machine_id: int
+    image_data_id: Optional[int] = None
+    sensor_data_id: Optional[int] = None
+    rul_hours: float
+    wear_category: str
+    confidence: float
+    summary: Optional[str] = None
+    model_version: str
+    prediction_time: Optional[datetime] = None
+    
+    class Config:
+        # pydantic 1.x name for from_attributes; rows are read by attribute
+        orm_mode = True
+
 # Response schemas
 class PredictionResponse(ResponseBase):
     """Response schema for a single prediction"""
@@ -124,6 +141,17 @@ class BatchPredictionResponse(ResponseBase):
         description="Mapping of machine IDs to error messages for failed predictions"
     )
 
+class BatchImagePredictionResponse(ResponseBase):
+    """Response schema for batch image predictions"""
+    predictions: List[PredictionRecord]
+    total_processed: int
+    success_count: int
+    failed_count: int
+    errors: Optional[Dict[int, str]] = Field(
+        None,
+        description="Mapping of upload positions to error messages for images that were skipped"
+    )
+
 # Prediction statistics
 class PredictionStats(ModelBase):
     """Schema for prediction statistics"""
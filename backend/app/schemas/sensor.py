@@ -42,6 +42,16 @@ class SensorDataResponse(BaseModel):
     message: str
     data: Optional[SensorData] = None
 
+class SensorIngestResponse(BaseModel):
+    """Response schema for chunked CSV ingestion"""
+    message: str
+    rows_read: int
+    rows_inserted: int
+    rows_rejected: int
+    chunks: int
+    elapsed_seconds: float
+    rows_per_second: float
+
 class SensorDataBulkCreate(BaseModel):
     """Schema for creating multiple sensor data records at once"""
     sensor_data: List[SensorDataCreate]
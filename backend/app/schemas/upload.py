@@ -1,4 +1,5 @@
 from pydantic import BaseModel, HttpUrl
+from datetime import datetime
 from typing import List, Optional, Dict, Any
 
 class FileUploadResponse(BaseModel):
@@ -21,3 +22,21 @@ class FileUploadResponse(BaseModel):
                 "metadata": {"size": 12345, "type": "image/jpeg"}
             }
         }
+
+class UploadJobStatus(BaseModel):
+    """Progress of a background CSV ingest job."""
+    job_id: str
+    machine_id: int
+    status: str
+    total_bytes: int
+    bytes_read: int
+    rows_read: int
+    rows_written: int
+    rows_committed: int
+    rows_rejected: int
+    batches_written: int
+    elapsed_seconds: float
+    rows_per_second: float
+    bytes_per_second: float
+    error: Optional[str] = None
+    created_at: datetime
@@ -0,0 +1,457 @@
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from sqlalchemy import Integer, cast, extract, func, literal_column, select, text
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..models.sensor_rollup import ROLLUP_MODELS
+from .ingest_service import SENSOR_FIELDS
+from .partition_service import SensorBatch, partition_service
+
+logger = logging.getLogger(__name__)
+
+# Fixed-width intervals in seconds; "month" is calendar based
+INTERVAL_SECONDS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+}
+
+# The unix epoch is a Thursday; weeks start on Monday like date_trunc('week')
+WEEK_OFFSET_SECONDS = 4 * 86400
+
+# Aggregates every backend computes in SQL; rollups can serve all of them
+SQL_FUNCTIONS = ("avg", "min", "max", "sum", "count")
+DEFAULT_FUNCTIONS = ("avg", "min", "max", "count", "p95")
+
+PERCENTILE_PATTERN = re.compile(r"^p(\d{1,2}(?:\.\d+)?)$")
+
+Interval = Union[str, int, float, timedelta]
+
+
+def _percentile(function: str) -> Optional[float]:
+    match = PERCENTILE_PATTERN.match(function)
+    return float(match.group(1)) if match else None
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class AggregationService:
+    """
+    Time-bucketed downsampling of the wide sensor_data table.
+
+    Requests the rollup tables can answer (whole-minute multiples and
+    avg/min/max/sum/count) read the coarsest rollup that divides the interval.
+    Otherwise one query groups raw rows into buckets and computes every
+    requested aggregate for every requested sensor column in a single scan.
+    Buckets are computed
+    with epoch arithmetic (strftime) on SQLite and date_trunc / time_bucket on
+    PostgreSQL. Aggregates the database cannot compute, such as percentiles on
+    SQLite, fall back to streaming the rows in timestamp order and bucketing
+    them with NumPy, holding at most one bucket and one chunk in memory, as do
+    SQLite ranges spanning more partition files than one query can attach.
+    """
+
+    def __init__(self, chunk_size: int = 50000):
+        self.chunk_size = chunk_size
+        self.table = models.SensorData.__table__
+        self._timescale: Dict[str, bool] = {}
+
+    def aggregate(
+        self,
+        db: Session,
+        machine_id: Optional[int],
+        start_time: datetime,
+        end_time: datetime,
+        interval: Interval = "hour",
+        sensors: Optional[Sequence[str]] = None,
+        functions: Sequence[str] = DEFAULT_FUNCTIONS,
+        use_rollups: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate sensor readings into time buckets.
+
+        When served from a rollup, rollup buckets overlapping the time range
+        are included whole, and "count" per bucket is the largest per-sensor
+        count rather than the number of raw rows.
+
+        Args:
+            machine_id: Machine to aggregate, or None for all machines
+            interval: "minute", "hour", "day", "week", "month" or a bucket
+                width in seconds / as a timedelta
+            sensors: Sensor columns to aggregate (default: all)
+            functions: Any of avg, min, max, sum, count and percentiles
+                written as pNN (e.g. p95)
+            use_rollups: Set False to always scan raw rows
+
+        Returns:
+            One dict per non-empty bucket, oldest first:
+            {"timestamp": bucket start (naive UTC), "count": rows in bucket,
+             "values": {sensor: {function: value}}}
+        """
+        sensors = list(sensors or SENSOR_FIELDS)
+        unknown = [sensor for sensor in sensors if sensor not in SENSOR_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown sensor(s): {', '.join(unknown)}")
+        for function in functions:
+            if function not in SQL_FUNCTIONS and _percentile(function) is None:
+                raise ValueError(f"Unsupported aggregate function: {function}")
+        interval = self._normalize_interval(interval)
+
+        dialect = db.get_bind().dialect.name
+        resolution = self._rollup_resolution(interval, functions) if use_rollups else None
+        if resolution is not None and dialect in ("sqlite", "postgresql"):
+            return self._aggregate_rollup(
+                db, dialect, resolution, machine_id, start_time, end_time, interval, sensors, functions
+            )
+        # Raw rows may span SQLite partition files; a range needing more than
+        # one batch is streamed through NumPy, whose buckets carry across batches
+        batches = partition_service.sensor_batches(db, start_time, end_time)
+        if len(batches) == 1 and self._sql_supports(dialect, functions):
+            with partition_service.sensor_reader(db, batches[0]) as (reader, source):
+                return self._aggregate_sql(
+                    reader, dialect, source, machine_id, start_time, end_time, interval, sensors, functions
+                )
+        return self._aggregate_numpy(db, batches, machine_id, start_time, end_time, interval, sensors, functions)
+
+    def _normalize_interval(self, interval: Interval) -> Union[str, int]:
+        if isinstance(interval, timedelta):
+            interval = interval.total_seconds()
+        if isinstance(interval, (int, float)):
+            seconds = int(interval)
+            if seconds <= 0:
+                raise ValueError("Bucket width must be positive")
+            return seconds
+        interval = getattr(interval, "value", interval)
+        if interval != "month" and interval not in INTERVAL_SECONDS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        return interval
+
+    def serves_from_rollups(self, interval: Interval, functions: Sequence[str]) -> bool:
+        """Whether a request with this interval and these functions reads rollups"""
+        return self._rollup_resolution(self._normalize_interval(interval), functions) is not None
+
+    def _rollup_resolution(self, interval: Union[str, int], functions: Sequence[str]) -> Optional[str]:
+        """Coarsest rollup whose buckets tile the requested interval"""
+        if not settings.SENSOR_ROLLUPS_ENABLED:
+            return None
+        if any(function not in SQL_FUNCTIONS for function in functions):
+            return None
+        if interval in ("week", "month"):
+            return "day"
+        width = interval if isinstance(interval, int) else INTERVAL_SECONDS[interval]
+        for resolution in ("day", "hour", "minute"):
+            if width % INTERVAL_SECONDS[resolution] == 0:
+                return resolution
+        return None
+
+    def _sql_supports(self, dialect: str, functions: Sequence[str]) -> bool:
+        if dialect == "postgresql":
+            return True
+        if dialect == "sqlite":
+            return all(function in SQL_FUNCTIONS for function in functions)
+        return False
+
+    def _filters(self, source, machine_id: Optional[int], start_time: datetime, end_time: datetime) -> List[Any]:
+        columns = source.c
+        conditions = [columns.timestamp >= start_time, columns.timestamp <= end_time]
+        if machine_id is not None:
+            conditions.append(columns.machine_id == machine_id)
+        return conditions
+
+    def _has_timescale(self, db: Session) -> bool:
+        url = str(db.get_bind().url)
+        if url not in self._timescale:
+            try:
+                found = db.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+                ).first()
+                self._timescale[url] = found is not None
+            except Exception:
+                self._timescale[url] = False
+        return self._timescale[url]
+
+    def _bucket_expression(self, db: Session, dialect: str, interval: Union[str, int], column=None):
+        # Constants are rendered inline so the GROUP BY expression is identical
+        # to the selected one even with server-side parameter binding
+        if column is None:
+            column = self.table.c.timestamp
+
+        if dialect == "postgresql":
+            if isinstance(interval, str):
+                return func.date_trunc(literal_column(f"'{interval}'"), column)
+            if self._has_timescale(db):
+                return func.time_bucket(text(f"interval '{interval} seconds'"), column)
+            width = literal_column(str(interval))
+            return func.to_timestamp(func.floor(extract("epoch", column) / width) * width)
+
+        # SQLite: integer unix seconds
+        if interval == "month":
+            return cast(func.strftime(literal_column("'%s'"), column, literal_column("'start of month'")), Integer)
+        epoch = cast(func.strftime(literal_column("'%s'"), column), Integer)
+        width = literal_column(str(interval if isinstance(interval, int) else INTERVAL_SECONDS[interval]), Integer)
+        if interval == "week":
+            offset = literal_column(str(WEEK_OFFSET_SECONDS), Integer)
+            return (epoch - offset) // width * width + offset
+        return epoch // width * width
+
+    def _aggregate_sql(
+        self,
+        db: Session,
+        dialect: str,
+        source,
+        machine_id: Optional[int],
+        start_time: datetime,
+        end_time: datetime,
+        interval: Union[str, int],
+        sensors: List[str],
+        functions: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        columns = source.c
+        bucket = self._bucket_expression(db, dialect, interval, column=columns.timestamp).label("bucket")
+
+        aggregates = []
+        for sensor in sensors:
+            column = columns[sensor]
+            for function in functions:
+                percentile = _percentile(function)
+                if percentile is not None:
+                    expression = func.percentile_cont(percentile / 100.0).within_group(column)
+                else:
+                    expression = getattr(func, function)(column)
+                aggregates.append(expression.label(f"{sensor}__{function}"))
+
+        stmt = (
+            select(bucket, func.count().label("n_rows"), *aggregates)
+            .where(*self._filters(source, machine_id, start_time, end_time))
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+
+        results = []
+        for row in db.execute(stmt).mappings():
+            timestamp = row["bucket"]
+            if isinstance(timestamp, (int, float)):
+                timestamp = datetime.utcfromtimestamp(timestamp)
+            else:
+                timestamp = _to_naive_utc(timestamp)
+            results.append({
+                "timestamp": timestamp,
+                "count": row["n_rows"],
+                "values": {
+                    sensor: {
+                        function: self._number(row[f"{sensor}__{function}"], function)
+                        for function in functions
+                    }
+                    for sensor in sensors
+                }
+            })
+        return results
+
+    def _aggregate_rollup(
+        self,
+        db: Session,
+        dialect: str,
+        resolution: str,
+        machine_id: Optional[int],
+        start_time: datetime,
+        end_time: datetime,
+        interval: Union[str, int],
+        sensors: List[str],
+        functions: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        table = ROLLUP_MODELS[resolution].__table__
+        columns = table.c
+        bucket = self._bucket_expression(db, dialect, interval, column=columns.bucket).label("bucket")
+
+        # Rollup buckets that overlap the range, i.e. start no earlier than one
+        # rollup width before start_time
+        first_bucket = start_time - timedelta(seconds=INTERVAL_SECONDS[resolution] - 1)
+        stmt = (
+            select(
+                bucket,
+                columns.sensor,
+                func.sum(columns.count).label("count"),
+                func.sum(columns.sum).label("sum"),
+                func.min(columns.min).label("min"),
+                func.max(columns.max).label("max"),
+            )
+            .where(
+                columns.sensor.in_(sensors),
+                columns.bucket >= _to_naive_utc(first_bucket),
+                columns.bucket <= _to_naive_utc(end_time),
+            )
+            .group_by(bucket, columns.sensor)
+            .order_by(bucket)
+        )
+        if machine_id is not None:
+            stmt = stmt.where(columns.machine_id == machine_id)
+
+        results: List[Dict[str, Any]] = []
+        by_bucket: Dict[Any, Dict[str, Any]] = {}
+        for row in db.execute(stmt).mappings():
+            entry = by_bucket.get(row["bucket"])
+            if entry is None:
+                timestamp = row["bucket"]
+                if isinstance(timestamp, (int, float)):
+                    timestamp = datetime.utcfromtimestamp(timestamp)
+                else:
+                    timestamp = _to_naive_utc(timestamp)
+                entry = {
+                    "timestamp": timestamp,
+                    "count": 0,
+                    "values": {
+                        sensor: {function: (0 if function == "count" else None) for function in functions}
+                        for sensor in sensors
+                    }
+                }
+                by_bucket[row["bucket"]] = entry
+                results.append(entry)
+
+            count = int(row["count"] or 0)
+            entry["count"] = max(entry["count"], count)
+            aggregates = {
+                "count": count,
+                "sum": float(row["sum"]) if count else None,
+                "avg": float(row["sum"]) / count if count else None,
+                "min": self._number(row["min"], "min"),
+                "max": self._number(row["max"], "max"),
+            }
+            entry["values"][row["sensor"]] = {function: aggregates[function] for function in functions}
+        return results
+
+    def _number(self, value: Any, function: str) -> Any:
+        if value is None:
+            return None
+        return int(value) if function == "count" else float(value)
+
+    def _aggregate_numpy(
+        self,
+        db: Session,
+        batches: List[SensorBatch],
+        machine_id: Optional[int],
+        start_time: datetime,
+        end_time: datetime,
+        interval: Union[str, int],
+        sensors: List[str],
+        functions: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        dialect = db.get_bind().dialect.name
+        # Let SQLite compute the bucket as an integer; parsing datetimes in
+        # Python costs more than the aggregation itself
+        sql_buckets = dialect == "sqlite"
+
+        results: List[Dict[str, Any]] = []
+        pending_key: Optional[int] = None
+        pending: List[np.ndarray] = []
+
+        # Batches come newest first and cover disjoint windows, so reading
+        # them in reverse keeps rows in timestamp order
+        for batch in reversed(batches):
+            with partition_service.sensor_reader(db, batch) as (reader, source):
+                columns = source.c
+                key_column = (
+                    self._bucket_expression(reader, dialect, interval, column=columns.timestamp)
+                    if sql_buckets else columns.timestamp
+                )
+                stmt = (
+                    select(key_column, *(columns[sensor] for sensor in sensors))
+                    .where(*self._filters(source, machine_id, start_time, end_time))
+                    .where(*batch.bounds(columns.timestamp))
+                    .order_by(columns.timestamp)
+                )
+                if not sql_buckets:
+                    stmt = stmt.execution_options(yield_per=self.chunk_size)
+
+                for rows in self._chunks(reader.execute(stmt), raw=sql_buckets):
+                    first, *sensor_columns = zip(*rows)
+                    keys = np.array(first, dtype=np.int64) if sql_buckets else self._bucket_keys(first, interval)
+                    values = np.array(sensor_columns, dtype=np.float64).reshape(len(sensors), len(rows)).T
+                    # Rows arrive in timestamp order, so each bucket is a contiguous run
+                    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+                    ends = np.append(starts[1:], len(keys))
+                    for start, end in zip(starts, ends):
+                        key = int(keys[start])
+                        if pending and key != pending_key:
+                            results.append(self._finish_bucket(pending_key, np.concatenate(pending), sensors, functions))
+                            pending = []
+                        pending_key = key
+                        pending.append(values[start:end])
+
+        if pending:
+            results.append(self._finish_bucket(pending_key, np.concatenate(pending), sensors, functions))
+        return results
+
+    def _chunks(self, result, raw: bool) -> Iterator[Sequence[Tuple[Any, ...]]]:
+        if not raw:
+            yield from result.partitions(self.chunk_size)
+            return
+        # Every column is a plain int/float, so skip building Row objects. The
+        # result must not use yield_per, which buffers rows ahead of the cursor
+        cursor = result.cursor
+        try:
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            result.close()
+
+    def _bucket_keys(self, timestamps: Sequence[datetime], interval: Union[str, int]) -> np.ndarray:
+        """Bucket start (unix seconds) for each timestamp"""
+        stamps = np.array([_to_naive_utc(value) for value in timestamps], dtype="datetime64[s]")
+        if interval == "month":
+            return stamps.astype("datetime64[M]").astype("datetime64[s]").astype(np.int64)
+        width = interval if isinstance(interval, int) else INTERVAL_SECONDS[interval]
+        offset = WEEK_OFFSET_SECONDS if interval == "week" else 0
+        return (stamps.astype(np.int64) - offset) // width * width + offset
+
+    def _finish_bucket(
+        self,
+        key: int,
+        values: np.ndarray,
+        sensors: List[str],
+        functions: Sequence[str]
+    ) -> Dict[str, Any]:
+        summary: Dict[str, Dict[str, Any]] = {}
+        for index, sensor in enumerate(sensors):
+            column = values[:, index]
+            column = column[~np.isnan(column)]
+            summary[sensor] = {
+                function: self._numpy_aggregate(column, function) for function in functions
+            }
+        return {
+            "timestamp": datetime.utcfromtimestamp(key),
+            "count": int(values.shape[0]),
+            "values": summary
+        }
+
+    def _numpy_aggregate(self, column: np.ndarray, function: str) -> Any:
+        if function == "count":
+            return int(column.size)
+        if column.size == 0:
+            return None
+        if function == "avg":
+            return float(column.mean())
+        if function == "min":
+            return float(column.min())
+        if function == "max":
+            return float(column.max())
+        if function == "sum":
+            return float(column.sum())
+        # Linear interpolation matches PostgreSQL's percentile_cont
+        return float(np.percentile(column, _percentile(function)))
+
+# Create a singleton instance
+aggregation_service = AggregationService()
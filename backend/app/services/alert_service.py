@@ -1,15 +1,23 @@
 import logging
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, select
 
 from .. import models, schemas
+from ..core.response_cache import response_cache
+from .alert_stats import alert_stats
 from .base_service import BaseService
+from .live_state import live_state
 from ..config import settings
+from ..db.pagination import Page, keyset_select, row_counter, split_page
 
 logger = logging.getLogger(__name__)
 
+# Listing order; (machine_id, timestamp) is indexed
+ALERT_SORT_KEY = (models.Alert.timestamp, models.Alert.id)
+
 class AlertService:
     """Service class for alert-related operations"""
     
@@ -24,57 +32,85 @@ class AlertService:
         """Get an alert by ID"""
         return self.base_service.get(db, alert_id)
     
-    def get_alerts(
+    async def get_alert_async(self, db: AsyncSession, alert_id: int) -> Optional[models.Alert]:
+        """Get an alert by ID"""
+        return await self.base_service.get_async(db, alert_id)
+    
+    def _alert_filters(
         self,
-        db: Session,
-        skip: int = 0,
-        limit: int = 100,
         machine_id: Optional[int] = None,
         status: Optional[str] = None,
         severity: Optional[str] = None,
         resolved: Optional[bool] = None,
         time_range_hours: Optional[int] = None,
         search: Optional[str] = None,
-    ) -> Tuple[List[models.Alert], int]:
-        """Get alerts with filtering and pagination"""
-        query = db.query(models.Alert)
+    ) -> List[Any]:
+        """Build the WHERE conditions shared by the sync and async listings"""
+        conditions = []
         
-        # Apply filters
         if machine_id is not None:
-            query = query.filter(models.Alert.machine_id == machine_id)
+            conditions.append(models.Alert.machine_id == machine_id)
             
         if status is not None:
-            query = query.filter(models.Alert.status == status)
+            conditions.append(models.Alert.status == status)
             
         if severity is not None:
-            query = query.filter(models.Alert.severity == severity)
+            conditions.append(models.Alert.severity == severity)
             
         if resolved is not None:
             if resolved:
-                query = query.filter(models.Alert.resolved_at.isnot(None))
+                conditions.append(models.Alert.resolved_at.isnot(None))
             else:
-                query = query.filter(models.Alert.resolved_at.is_(None))
+                conditions.append(models.Alert.resolved_at.is_(None))
                 
         if time_range_hours is not None:
-            time_threshold = datetime.utcnow() - timedelta(hours=time_range_hours)
-            query = query.filter(models.Alert.created_at >= time_threshold)
+            # Whole minutes, so successive pages share a cached total
+            time_threshold = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(hours=time_range_hours)
+            conditions.append(models.Alert.timestamp >= time_threshold)
             
         if search:
-            search_filter = or_(
+            conditions.append(or_(
                 models.Alert.title.ilike(f"%{search}%"),
                 models.Alert.message.ilike(f"%{search}%")
-            )
-            query = query.filter(search_filter)
+            ))
+        
+        return conditions
+    
+    def get_alerts(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        **filters
+    ) -> Page:
+        """Get alerts newest first, paged by cursor (or skip for the first page)"""
+        stmt = select(models.Alert).where(*self._alert_filters(**filters))
+        
+        total = row_counter.count(db, stmt) if include_total else None
+        rows = db.scalars(keyset_select(stmt, ALERT_SORT_KEY, cursor, limit, skip=skip)).all()
+        alerts, next_cursor = split_page(rows, ALERT_SORT_KEY, limit)
         
-        # Get total count before pagination
-        total = query.count()
+        return Page(alerts, total, next_cursor)
+    
+    async def get_alerts_async(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        **filters
+    ) -> Page:
+        """Get alerts newest first, paged by cursor (or skip for the first page)"""
+        stmt = select(models.Alert).where(*self._alert_filters(**filters))
         
-        # Apply pagination
-        alerts = query.order_by(
-            models.Alert.created_at.desc()
-        ).offset(skip).limit(limit).all()
+        total = await row_counter.count_async(db, stmt) if include_total else None
+        rows = (await db.scalars(keyset_select(stmt, ALERT_SORT_KEY, cursor, limit, skip=skip))).all()
+        alerts, next_cursor = split_page(rows, ALERT_SORT_KEY, limit)
         
-        return alerts, total
+        return Page(alerts, total, next_cursor)
     
     def create_alert(
         self,
@@ -92,23 +128,45 @@ class AlertService:
         db.commit()
         db.refresh(db_alert)
         
+        alert_stats.invalidate(db_alert.machine_id, db_alert.timestamp)
+        response_cache.invalidate("alerts")
+        live_state.record_alert(db_alert)
+        
         # Send real-time notification
         self._send_real_time_notification(db_alert)
         
         return db_alert
     
-    def update_alert(
+    async def create_alert_async(
         self,
-        db: Session,
-        alert_id: int,
+        db: AsyncSession,
+        alert_in: schemas.AlertCreate,
+        created_by: Optional[int] = None
+    ) -> models.Alert:
+        """Create a new alert"""
+        db_alert = models.Alert(
+            **alert_in.dict(exclude_unset=True),
+            created_by=created_by
+        )
+        
+        db.add(db_alert)
+        await db.commit()
+        await db.refresh(db_alert)
+        
+        alert_stats.invalidate(db_alert.machine_id, db_alert.timestamp)
+        response_cache.invalidate("alerts")
+        live_state.record_alert(db_alert)
+        self._send_real_time_notification(db_alert)
+        
+        return db_alert
+    
+    def _apply_update(
+        self,
+        db_alert: models.Alert,
         alert_in: schemas.AlertUpdate,
-        updated_by: Optional[int] = None
-    ) -> Optional[models.Alert]:
-        """Update an existing alert"""
-        db_alert = self.get_alert(db, alert_id)
-        if not db_alert:
-            return None
-            
+        updated_by: Optional[int]
+    ) -> bool:
+        """Apply an update to an alert; returns True if its status changed"""
         update_data = alert_in.dict(exclude_unset=True)
         
         # Handle status changes
@@ -127,12 +185,79 @@ class AlertService:
         db_alert.updated_at = datetime.utcnow()
         db_alert.updated_by = updated_by
         
+        return "status" in update_data
+    
+    def _mark_acknowledged(self, db_alert: models.Alert, user_id: int) -> bool:
+        """Acknowledge an open alert; returns False if it was not open"""
+        if db_alert.status != "open":
+            return False
+            
+        db_alert.status = "acknowledged"
+        db_alert.acknowledged_at = datetime.utcnow()
+        db_alert.acknowledged_by = user_id
+        db_alert.updated_at = datetime.utcnow()
+        db_alert.updated_by = user_id
+        return True
+    
+    def _mark_resolved(self, db_alert: models.Alert, user_id: int, resolution_notes: Optional[str]) -> None:
+        db_alert.status = "resolved"
+        db_alert.resolved_at = datetime.utcnow()
+        db_alert.resolved_by = user_id
+        db_alert.resolution_notes = resolution_notes
+        db_alert.updated_at = datetime.utcnow()
+        db_alert.updated_by = user_id
+    
+    def update_alert(
+        self,
+        db: Session,
+        alert_id: int,
+        alert_in: schemas.AlertUpdate,
+        updated_by: Optional[int] = None
+    ) -> Optional[models.Alert]:
+        """Update an existing alert"""
+        db_alert = self.get_alert(db, alert_id)
+        if not db_alert:
+            return None
+            
+        previous = (db_alert.severity, db_alert.status)
+        status_changed = self._apply_update(db_alert, alert_in, updated_by)
+        
         db.add(db_alert)
         db.commit()
         db.refresh(db_alert)
         
+        alert_stats.invalidate(db_alert.machine_id, db_alert.timestamp)
+        response_cache.invalidate("alerts")
+        live_state.record_alert(db_alert, previous)
+        
         # Send update notification if status changed
-        if "status" in update_data:
+        if status_changed:
+            self._send_real_time_notification(db_alert)
+        
+        return db_alert
+    
+    async def update_alert_async(
+        self,
+        db: AsyncSession,
+        alert_id: int,
+        alert_in: schemas.AlertUpdate,
+        updated_by: Optional[int] = None
+    ) -> Optional[models.Alert]:
+        """Update an existing alert"""
+        db_alert = await self.get_alert_async(db, alert_id)
+        if not db_alert:
+            return None
+            
+        previous = (db_alert.severity, db_alert.status)
+        status_changed = self._apply_update(db_alert, alert_in, updated_by)
+        
+        await db.commit()
+        await db.refresh(db_alert)
+        
+        alert_stats.invalidate(db_alert.machine_id, db_alert.timestamp)
+        response_cache.invalidate("alerts")
+        live_state.record_alert(db_alert, previous)
+        if status_changed:
             self._send_real_time_notification(db_alert)
         
         return db_alert
@@ -148,24 +273,48 @@ class AlertService:
         if not db_alert:
             return None
             
-        if db_alert.status != "open":
+        previous = (db_alert.severity, db_alert.status)
+        if not self._mark_acknowledged(db_alert, user_id):
             return db_alert
-            
-        db_alert.status = "acknowledged"
-        db_alert.acknowledged_at = datetime.utcnow()
-        db_alert.acknowledged_by = user_id
-        db_alert.updated_at = datetime.utcnow()
-        db_alert.updated_by = user_id
         
         db.add(db_alert)
         db.commit()
         db.refresh(db_alert)
         
+        alert_stats.invalidate(db_alert.machine_id, db_alert.timestamp)
+        response_cache.invalidate("alerts")
+        live_state.record_alert(db_alert, previous)
+        
         # Send update notification
         self._send_real_time_notification(db_alert)
         
         return db_alert
     
+    async def acknowledge_alert_async(
+        self,
+        db: AsyncSession,
+        alert_id: int,
+        user_id: int
+    ) -> Optional[models.Alert]:
+        """Mark an alert as acknowledged"""
+        db_alert = await self.get_alert_async(db, alert_id)
+        if not db_alert:
+            return None
+            
+        previous = (db_alert.severity, db_alert.status)
+        if not self._mark_acknowledged(db_alert, user_id):
+            return db_alert
+        
+        await db.commit()
+        await db.refresh(db_alert)
+        
+        alert_stats.invalidate(db_alert.machine_id, db_alert.timestamp)
+        response_cache.invalidate("alerts")
+        live_state.record_alert(db_alert, previous)
+        self._send_real_time_notification(db_alert)
+        
+        return db_alert
+    
     def resolve_alert(
         self,
         db: Session,
@@ -178,78 +327,55 @@ class AlertService:
         if not db_alert:
             return None
             
-        db_alert.status = "resolved"
-        db_alert.resolved_at = datetime.utcnow()
-        db_alert.resolved_by = user_id
-        db_alert.resolution_notes = resolution_notes
-        db_alert.updated_at = datetime.utcnow()
-        db_alert.updated_by = user_id
+        previous = (db_alert.severity, db_alert.status)
+        self._mark_resolved(db_alert, user_id, resolution_notes)
         
         db.add(db_alert)
         db.commit()
         db.refresh(db_alert)
         
+        alert_stats.invalidate(db_alert.machine_id, db_alert.timestamp)
+        response_cache.invalidate("alerts")
+        live_state.record_alert(db_alert, previous)
+        
         # Send update notification
         self._send_real_time_notification(db_alert)
         
         return db_alert
     
+    async def resolve_alert_async(
+        self,
+        db: AsyncSession,
+        alert_id: int,
+        user_id: int,
+        resolution_notes: Optional[str] = None
+    ) -> Optional[models.Alert]:
+        """Mark an alert as resolved"""
+        db_alert = await self.get_alert_async(db, alert_id)
+        if not db_alert:
+            return None
+            
+        previous = (db_alert.severity, db_alert.status)
+        self._mark_resolved(db_alert, user_id, resolution_notes)
+        
+        await db.commit()
+        await db.refresh(db_alert)
+        
+        alert_stats.invalidate(db_alert.machine_id, db_alert.timestamp)
+        response_cache.invalidate("alerts")
+        live_state.record_alert(db_alert, previous)
+        self._send_real_time_notification(db_alert)
+        
+        return db_alert
+    
     def get_alert_stats(
         self,
         db: Session,
         time_range_hours: int = 24,
         machine_id: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Get alert statistics"""
-        time_threshold = datetime.utcnow() - timedelta(hours=time_range_hours)
-        
-        # Base query
-        query = db.query(models.Alert).filter(
-            models.Alert.created_at >= time_threshold
-        )
-        
-        if machine_id is not None:
-            query = query.filter(models.Alert.machine_id == machine_id)
-        
-        # Total alerts
-        total_alerts = query.count()
-        
-        # Alerts by status
-        status_counts = {
-            status[0]: query.filter(models.Alert.status == status[0]).count()
-            for status in db.query(models.Alert.status).distinct().all()
-        }
-        
-        # Alerts by severity
-        severity_counts = {
-            severity[0]: query.filter(models.Alert.severity == severity[0]).count()
-            for severity in db.query(models.Alert.severity).distinct().all()
-        }
-        
-        # Alerts over time (last 24 hours in 1-hour buckets)
-        alerts_over_time = []
-        for i in range(time_range_hours):
-            start_time = time_threshold + timedelta(hours=i)
-            end_time = start_time + timedelta(hours=1)
-            
-            count = query.filter(
-                models.Alert.created_at >= start_time,
-                models.Alert.created_at < end_time
-            ).count()
-            
-            alerts_over_time.append({
-                "time": start_time.isoformat(),
-                "count": count
-            })
-        
-        return {
-            "total_alerts": total_alerts,
-            "status_counts": status_counts,
-            "severity_counts": severity_counts,
-            "alerts_over_time": alerts_over_time,
-            "time_range_hours": time_range_hours,
-            "machine_id": machine_id
-        }
+        """Get alert counts by status and severity, and per hour, in one scan"""
+        return alert_stats.stats(db, time_range_hours=time_range_hours, machine_id=machine_id)
     
     def _send_real_time_notification(self, alert: models.Alert) -> None:
         """Send real-time notification for alert updates"""
@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..models.alert import AlertSeverity, AlertStatus
+
+logger = logging.getLogger(__name__)
+
+STATUSES = [status.value for status in AlertStatus]
+SEVERITIES = [severity.value for severity in AlertSeverity]
+
+# Codes per value; the last slot of each axis collects NULL or unknown values
+STATUS_CODES = {value: code for code, value in enumerate(STATUSES)}
+SEVERITY_CODES = {value: code for code, value in enumerate(SEVERITIES)}
+MATRIX_SHAPE = (len(STATUSES) + 1, len(SEVERITIES) + 1)
+
+HOUR = timedelta(hours=1)
+
+CacheKey = Tuple[Optional[int], datetime]
+
+
+def _hour_floor(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _code(value: Any, codes: Dict[str, int]) -> int:
+    value = getattr(value, "value", value)
+    return codes.get(value, len(codes))
+
+
+class AlertStatsEngine:
+    """
+    Alert counts by status, severity and creation hour in a single scan.
+
+    Each hour is reduced to a status x severity count matrix with one NumPy
+    bincount, from which totals, breakdowns and the hourly histogram are
+    summed. Matrices for closed hours are cached per machine (and for all
+    machines), so a dashboard refresh only reads the current partial hour.
+    Alerts change status after creation, so writers call invalidate() and
+    cached hours also expire after ttl seconds as a backstop for other workers.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_hours: int = 168):
+        self.ttl = ttl
+        self.max_hours = max_hours
+        self._hours: Dict[CacheKey, Tuple[float, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def stats(
+        self,
+        db: Session,
+        time_range_hours: int = 24,
+        machine_id: Optional[int] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Statistics for the last time_range_hours hourly buckets, the newest
+        being the current, partial hour.
+        """
+        current_hour = _hour_floor(now or datetime.utcnow())
+        window_start = current_hour - (time_range_hours - 1) * HOUR
+        hours = [window_start + i * HOUR for i in range(time_range_hours)]
+
+        cached = self._cached(machine_id, hours[:-1])
+        missing = [hour for hour in hours[:-1] if hour not in cached]
+        scan_start = missing[0] if missing else current_hour
+
+        fresh = self._scan(db, machine_id, scan_start, current_hour + HOUR)
+        self._store(machine_id, {hour: matrix for hour, matrix in fresh.items() if hour < current_hour})
+
+        empty = np.zeros(MATRIX_SHAPE, dtype=np.int64)
+        matrices = [cached.get(hour, fresh.get(hour, empty)) for hour in hours]
+        hourly = np.stack(matrices)
+        combined = hourly.sum(axis=0)
+        status_totals = combined.sum(axis=1)
+        severity_totals = combined.sum(axis=0)
+
+        return {
+            "total_alerts": int(combined.sum()),
+            "status_counts": {status: int(status_totals[code]) for status, code in STATUS_CODES.items()},
+            "severity_counts": {severity: int(severity_totals[code]) for severity, code in SEVERITY_CODES.items()},
+            "alerts_over_time": [
+                {"time": hour.isoformat(), "count": int(count)}
+                for hour, count in zip(hours, hourly.sum(axis=(1, 2)))
+            ],
+            "time_range_hours": time_range_hours,
+            "machine_id": machine_id
+        }
+
+    def invalidate(self, machine_id: Optional[int], timestamp: Optional[datetime]) -> None:
+        """Forget the cached hour an alert was created in, after it changed"""
+        if timestamp is None:
+            return
+        hour = _hour_floor(timestamp)
+        with self._lock:
+            self._hours.pop((machine_id, hour), None)
+            self._hours.pop((None, hour), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hours.clear()
+
+    def _cached(self, machine_id: Optional[int], hours) -> Dict[datetime, np.ndarray]:
+        now = time.monotonic()
+        with self._lock:
+            entries = {hour: self._hours.get((machine_id, hour)) for hour in hours}
+        return {hour: entry[1] for hour, entry in entries.items() if entry is not None and entry[0] > now}
+
+    def _store(self, machine_id: Optional[int], matrices: Dict[datetime, np.ndarray]) -> None:
+        if not matrices:
+            return
+        expires = time.monotonic() + self.ttl
+        oldest = max(matrices) - self.max_hours * HOUR
+        with self._lock:
+            for hour, matrix in matrices.items():
+                self._hours[(machine_id, hour)] = (expires, matrix)
+            # Hours that have slid out of every window are never read again
+            for key in [key for key in self._hours if key[1] < oldest]:
+                del self._hours[key]
+
+    def _scan(
+        self,
+        db: Session,
+        machine_id: Optional[int],
+        start: datetime,
+        end: datetime
+    ) -> Dict[datetime, np.ndarray]:
+        """Count matrices for every hour in [start, end) from one query"""
+        alert = models.Alert.__table__
+        stmt = select(alert.c.timestamp, alert.c.status, alert.c.severity).where(
+            alert.c.timestamp >= start, alert.c.timestamp < end
+        )
+        if machine_id is not None:
+            stmt = stmt.where(alert.c.machine_id == machine_id)
+        rows = db.execute(stmt).all()
+
+        n_hours = int((end - start) / HOUR)
+        matrices = np.zeros((n_hours,) + MATRIX_SHAPE, dtype=np.int64)
+        if rows:
+            timestamps, statuses, severities = zip(*rows)
+            stamps = pd.to_datetime(pd.Series(timestamps), utc=True).dt.tz_localize(None)
+            hour_index = ((stamps - start) // HOUR).to_numpy(dtype=np.int64)
+            status_codes = np.fromiter((_code(value, STATUS_CODES) for value in statuses), np.int64, len(rows))
+            severity_codes = np.fromiter((_code(value, SEVERITY_CODES) for value in severities), np.int64, len(rows))
+
+            cells = MATRIX_SHAPE[0] * MATRIX_SHAPE[1]
+            flat = hour_index * cells + status_codes * MATRIX_SHAPE[1] + severity_codes
+            matrices = np.bincount(flat, minlength=n_hours * cells).reshape(matrices.shape)
+
+        return {start + i * HOUR: matrices[i] for i in range(n_hours)}
+
+
+# Create a singleton instance
+alert_stats = AlertStatsEngine(ttl=settings.ALERT_STATS_CACHE_SECONDS)
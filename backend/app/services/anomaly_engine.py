@@ -0,0 +1,485 @@
+import asyncio
+import logging
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sklearn.ensemble import IsolationForest
+
+logger = logging.getLogger(__name__)
+
+DetectorKey = Tuple[Any, str]
+
+# Resolution of the precomputed IsolationForest score table
+SCORE_TABLE_SIZE = 512
+
+# Scale factor making the MAD a consistent estimator of the standard deviation
+MAD_TO_STD = 1.4826
+
+
+class FittedModel(NamedTuple):
+    """
+    Immutable result of a background refit.
+
+    An IsolationForest on a single feature is a step function of the value, so
+    its decision function is sampled once on a grid at fit time. Live scoring
+    is then a table lookup instead of a forest traversal.
+    """
+    median: float
+    robust_scale: float
+    grid_start: float
+    grid_inv_step: float
+    scores: Tuple[float, ...]
+    n_samples: int
+    fitted_at: float
+
+
+class Score(NamedTuple):
+    """Result of scoring one reading"""
+    value: float
+    timestamp: float
+    is_anomaly: bool
+    anomaly_score: float
+    zscore: float
+    robust_zscore: float
+    ewma: float
+
+
+class SensorDetector:
+    """
+    Streaming state for one (machine, sensor) pair.
+
+    Readings go into a fixed-size NumPy ring buffer while the sliding-window
+    mean and squared deviations (Welford), the EWMA and the EWMA variance are
+    updated incrementally; the window statistics are recomputed exactly once
+    per pass over the buffer. Scoring only reads these and the current
+    FittedModel, so each update is amortized O(1). Until
+    the first model is fitted, readings are flagged by window z-score.
+    """
+
+    def __init__(
+        self,
+        key: DetectorKey,
+        window_size: int,
+        ewma_alpha: float,
+        min_samples: int = 10,
+        zscore_threshold: float = 3.5
+    ):
+        self.key = key
+        self.window_size = window_size
+        self.ewma_alpha = ewma_alpha
+        self.min_samples = min_samples
+        self.zscore_threshold = zscore_threshold
+        self.values = np.zeros(window_size, dtype=np.float64)
+        self.timestamps = np.zeros(window_size, dtype=np.float64)
+        self.position = 0
+        self.count = 0
+        # Window mean and sum of squared deviations (Welford)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = 0.0
+        self.ewma_var = 0.0
+        self.last_timestamp = -math.inf
+        self.samples_since_fit = 0
+        self.model: Optional[FittedModel] = None
+        self.last_seen = time.monotonic()
+        # Changed since the last snapshot was written
+        self.dirty = False
+
+    def update(self, value: float, timestamp: float) -> Optional[Score]:
+        """Add a reading and score it; readings not newer than the last one are ignored"""
+        if timestamp <= self.last_timestamp or not math.isfinite(value):
+            return None
+        self.last_timestamp = timestamp
+        self.last_seen = time.monotonic()
+        self.dirty = True
+
+        previous_mean = self.mean
+        if self.count == self.window_size:
+            # Replace the evicted value in place of a separate remove and add
+            evicted = self.values[self.position]
+            self.mean += (value - evicted) / self.count
+            self.m2 += (value - evicted) * (value - self.mean + evicted - previous_mean)
+        else:
+            self.count += 1
+            self.mean += (value - previous_mean) / self.count
+            self.m2 += (value - previous_mean) * (value - self.mean)
+        self.values[self.position] = value
+        self.timestamps[self.position] = timestamp
+        self.position = (self.position + 1) % self.window_size
+        if self.position == 0:
+            # Recompute once per pass over the ring so rounding cannot accumulate
+            self._recompute()
+
+        if self.count == 1:
+            self.ewma = value
+        else:
+            delta = value - self.ewma
+            self.ewma += self.ewma_alpha * delta
+            self.ewma_var = (1.0 - self.ewma_alpha) * (self.ewma_var + self.ewma_alpha * delta * delta)
+        self.samples_since_fit += 1
+
+        return self._score(value, timestamp)
+
+    @property
+    def std(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(max(self.m2, 0.0) / self.count)
+
+    def window(self) -> np.ndarray:
+        """Copy of the buffered values in arrival order"""
+        if self.count < self.window_size:
+            return self.values[:self.count].copy()
+        return np.roll(self.values, -self.position)
+
+    def set_model(self, model: FittedModel) -> None:
+        """Swap in a newly fitted model"""
+        self.model = model
+        self.dirty = True
+
+    def to_state(self) -> Dict[str, Any]:
+        """Copy the detector state into arrays suitable for np.savez"""
+        state = {
+            "values": self.values.copy(),
+            "timestamps": self.timestamps.copy(),
+            "counters": np.array([
+                self.position, self.count, self.mean, self.m2, self.ewma,
+                self.ewma_var, self.last_timestamp, self.samples_since_fit
+            ], dtype=np.float64),
+        }
+        if self.model is not None:
+            model = self.model
+            state["model"] = np.array([
+                model.median, model.robust_scale, model.grid_start,
+                model.grid_inv_step, model.n_samples, model.fitted_at
+            ], dtype=np.float64)
+            state["scores"] = np.asarray(model.scores, dtype=np.float64)
+        return state
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        """Restore a snapshot written by to_state"""
+        if len(state["values"]) == self.window_size:
+            self.values[:] = state["values"]
+            self.timestamps[:] = state["timestamps"]
+            (position, count, _, _, self.ewma,
+             self.ewma_var, self.last_timestamp, samples_since_fit) = state["counters"].tolist()
+            self.position = int(position)
+            self.count = int(count)
+            self.samples_since_fit = int(samples_since_fit)
+            # Derived from the buffer, so older snapshots with running sums load too
+            self._recompute()
+        if "model" in state:
+            median, robust_scale, grid_start, grid_inv_step, n_samples, fitted_at = state["model"].tolist()
+            self.model = FittedModel(
+                median=median,
+                robust_scale=robust_scale,
+                grid_start=grid_start,
+                grid_inv_step=grid_inv_step,
+                scores=tuple(state["scores"].tolist()),
+                n_samples=int(n_samples),
+                fitted_at=fitted_at
+            )
+
+    def _recompute(self) -> None:
+        """Exact window mean and m2 from the ring buffer"""
+        if not self.count:
+            self.mean = self.m2 = 0.0
+            return
+        window = self.values[:self.count]
+        self.mean = math.fsum(window) / self.count
+        self.m2 = math.fsum(np.square(window - self.mean))
+
+    def _score(self, value: float, timestamp: float) -> Score:
+        std = self.std
+        zscore = (value - self.mean) / std if std > 0 else 0.0
+
+        model = self.model
+        if model is None:
+            # Same sign convention as the forest: negative means anomalous
+            anomaly_score = 0.5 * (1.0 - abs(zscore) / self.zscore_threshold)
+            is_anomaly = self.count >= self.min_samples and anomaly_score < 0
+            return Score(value, timestamp, is_anomaly, anomaly_score, zscore, 0.0, self.ewma)
+
+        robust_zscore = (value - model.median) / model.robust_scale if model.robust_scale > 0 else 0.0
+        index = int((value - model.grid_start) * model.grid_inv_step)
+        if index < 0:
+            index = 0
+        elif index >= len(model.scores):
+            index = len(model.scores) - 1
+        anomaly_score = model.scores[index]
+        return Score(value, timestamp, anomaly_score < 0, anomaly_score, zscore, robust_zscore, self.ewma)
+
+
+class DetectorStore:
+    """
+    Bounded map of detectors with on-disk snapshots.
+
+    Detectors are kept in LRU order, capped at max_detectors and expired after
+    ttl seconds without readings. Evicted and changed detectors are written as
+    one .npz file each by flush(), which runs in a worker thread. A detector
+    that is not in memory is restored from its snapshot on first access, so a
+    restart only costs one small file read per sensor instead of a cold window.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[DetectorKey], SensorDetector],
+        max_detectors: int = 10000,
+        ttl: float = 86400.0,
+        snapshot_dir: Optional[str] = None
+    ):
+        self.factory = factory
+        self.max_detectors = max_detectors
+        self.ttl = ttl
+        self.snapshot_dir = snapshot_dir
+        self._detectors: "OrderedDict[DetectorKey, SensorDetector]" = OrderedDict()
+        # States of evicted detectors waiting for the next flush
+        self._unsaved: Dict[DetectorKey, Dict[str, Any]] = {}
+        self._restored = 0
+        self._evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._detectors)
+
+    def get(self, key: DetectorKey) -> SensorDetector:
+        """Get a detector, restoring it from its snapshot or creating it if needed"""
+        detector = self._detectors.get(key)
+        if detector is not None:
+            self._detectors.move_to_end(key)
+            return detector
+
+        detector = self.factory(key)
+        state = self._unsaved.pop(key, None)
+        if state is not None:
+            # Evicted before its snapshot was written, so it still needs one
+            detector.load_state(state)
+            detector.dirty = True
+        else:
+            state = self._read(key)
+            if state is not None:
+                detector.load_state(state)
+                self._restored += 1
+
+        self._detectors[key] = detector
+        while len(self._detectors) > self.max_detectors:
+            self._evict(next(iter(self._detectors)))
+        return detector
+
+    def values(self) -> List[SensorDetector]:
+        return list(self._detectors.values())
+
+    def expire(self) -> int:
+        """Evict detectors that have not received a reading within the TTL"""
+        cutoff = time.monotonic() - self.ttl
+        expired = [key for key, detector in self._detectors.items() if detector.last_seen < cutoff]
+        for key in expired:
+            self._evict(key)
+        return len(expired)
+
+    async def flush(self) -> int:
+        """Expire idle detectors and write snapshots of everything that changed"""
+        self.expire()
+        states = self._unsaved
+        self._unsaved = {}
+        for key, detector in self._detectors.items():
+            if detector.dirty:
+                states[key] = detector.to_state()
+                detector.dirty = False
+
+        if states and self.snapshot_dir:
+            await run_in_threadpool(self._write_many, states)
+        return len(states)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "detectors": len(self._detectors),
+            "max_detectors": self.max_detectors,
+            "memory_bytes": sum(
+                detector.values.nbytes + detector.timestamps.nbytes
+                for detector in self._detectors.values()
+            ),
+            "restored": self._restored,
+            "evicted": self._evicted,
+            "unsaved": len(self._unsaved),
+        }
+
+    def _evict(self, key: DetectorKey) -> None:
+        detector = self._detectors.pop(key)
+        if detector.dirty and self.snapshot_dir:
+            self._unsaved[key] = detector.to_state()
+        self._evicted += 1
+
+    def _path(self, key: DetectorKey) -> str:
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{key[0]}__{key[1]}")
+        return os.path.join(self.snapshot_dir, f"{name}.npz")
+
+    def _read(self, key: DetectorKey) -> Optional[Dict[str, np.ndarray]]:
+        if not self.snapshot_dir:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return {name: data[name] for name in data.files}
+        except Exception as e:
+            logger.error(f"Could not restore anomaly detector {key} from {path}: {str(e)}")
+            return None
+
+    def _write_many(self, states: Dict[DetectorKey, Dict[str, Any]]) -> None:
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        for key, state in states.items():
+            path = self._path(key)
+            # Write to a temporary file first so a crash never leaves a torn snapshot
+            try:
+                with open(f"{path}.tmp", "wb") as f:
+                    np.savez(f, **state)
+                os.replace(f"{path}.tmp", path)
+            except Exception as e:
+                logger.error(f"Could not snapshot anomaly detector {key}: {str(e)}")
+
+
+class AnomalyEngine:
+    """
+    Owns the per-sensor detectors and refits their models in the background.
+
+    Scoring never trains anything. Detectors with enough new samples are marked
+    due, and a periodic worker fits a fresh IsolationForest on a snapshot of
+    each due window in a worker thread, then swaps the result in with a single
+    attribute assignment. The same worker flushes detector snapshots to disk.
+    """
+
+    def __init__(
+        self,
+        window_size: int = 100,
+        min_samples: int = 10,
+        contamination: float = 0.1,
+        ewma_alpha: float = 0.1,
+        zscore_threshold: float = 3.5,
+        refit_interval: float = 300.0,
+        max_detectors: int = 10000,
+        detector_ttl: float = 86400.0,
+        snapshot_dir: Optional[str] = None
+    ):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.contamination = contamination
+        self.ewma_alpha = ewma_alpha
+        self.zscore_threshold = zscore_threshold
+        self.refit_interval = refit_interval
+        self.detectors = DetectorStore(
+            self._create_detector,
+            max_detectors=max_detectors,
+            ttl=detector_ttl,
+            snapshot_dir=snapshot_dir
+        )
+        self._refit_task: Optional[asyncio.Task] = None
+        self._refits = 0
+
+    def get_detector(self, machine_id: Any, sensor_type: str) -> SensorDetector:
+        """Get the detector for a sensor, restoring or creating it on first use"""
+        # Machine IDs arrive as int from ingest and as str from query strings
+        return self.detectors.get((str(machine_id), sensor_type))
+
+    def update(self, machine_id: Any, sensor_type: str, value: float, timestamp: float) -> Optional[Score]:
+        """Feed one reading to its detector and return its score"""
+        return self.get_detector(machine_id, sensor_type).update(value, timestamp)
+
+    def is_due(self, detector: SensorDetector) -> bool:
+        if detector.count < self.min_samples:
+            return False
+        if detector.model is None:
+            return True
+        # Refit once the window has turned over since the last fit
+        return detector.samples_since_fit >= min(detector.count, self.window_size)
+
+    async def refit_due(self) -> int:
+        """Refit every detector that is due; returns the number refitted"""
+        due = [detector for detector in list(self.detectors.values()) if self.is_due(detector)]
+        for detector in due:
+            # The snapshot is taken on the event loop, so it is consistent
+            window = detector.window()
+            detector.samples_since_fit = 0
+            try:
+                detector.set_model(await run_in_threadpool(self.fit, window))
+                self._refits += 1
+            except Exception as e:
+                logger.error(f"Anomaly model refit failed for {detector.key}: {str(e)}", exc_info=True)
+        return len(due)
+
+    def fit(self, window: np.ndarray) -> FittedModel:
+        """Fit an IsolationForest and robust statistics on a window of values"""
+        median = float(np.median(window))
+        robust_scale = float(np.median(np.abs(window - median))) * MAD_TO_STD
+
+        forest = IsolationForest(contamination=self.contamination, random_state=42)
+        forest.fit(window.reshape(-1, 1))
+
+        # Cover the observed range plus a margin so out-of-range values saturate
+        low, high = float(window.min()), float(window.max())
+        margin = max(high - low, abs(median) * 0.1, 1e-6)
+        grid = np.linspace(low - margin, high + margin, SCORE_TABLE_SIZE)
+        scores = forest.decision_function(grid.reshape(-1, 1))
+
+        return FittedModel(
+            median=median,
+            robust_scale=robust_scale,
+            grid_start=float(grid[0]),
+            grid_inv_step=(SCORE_TABLE_SIZE - 1) / float(grid[-1] - grid[0]),
+            scores=tuple(scores.tolist()),
+            n_samples=len(window),
+            fitted_at=time.time()
+        )
+
+    def start(self) -> None:
+        """Start the periodic refit worker on the running event loop"""
+        if self._refit_task is None or self._refit_task.done():
+            self._refit_task = asyncio.get_running_loop().create_task(self._refit_loop())
+
+    async def stop(self) -> None:
+        """Stop the refit worker and write final snapshots"""
+        if self._refit_task is not None:
+            self._refit_task.cancel()
+            try:
+                await self._refit_task
+            except asyncio.CancelledError:
+                pass
+            self._refit_task = None
+        await self.detectors.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Detector counts for monitoring"""
+        return {
+            **self.detectors.stats(),
+            "fitted": sum(1 for detector in self.detectors.values() if detector.model is not None),
+            "refits": self._refits,
+            "refit_interval": self.refit_interval,
+        }
+
+    def _create_detector(self, key: DetectorKey) -> SensorDetector:
+        return SensorDetector(
+            key,
+            self.window_size,
+            self.ewma_alpha,
+            min_samples=self.min_samples,
+            zscore_threshold=self.zscore_threshold
+        )
+
+    async def _refit_loop(self) -> None:
+        while True:
+            try:
+                refitted = await self.refit_due()
+                if refitted:
+                    logger.info(f"Refitted {refitted} anomaly detectors")
+                await self.detectors.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Anomaly refit loop error: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.refit_interval)
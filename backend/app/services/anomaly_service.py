@@ -1,26 +1,87 @@
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
-import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-import pandas as pd
+from datetime import datetime, timedelta, timezone
 import logging
 
 from sqlalchemy.orm import Session
 from .. import models, schemas
+from ..config import settings
+from .anomaly_engine import AnomalyEngine, Score
 
 logger = logging.getLogger(__name__)
 
 # Configuration
 ANOMALY_DETECTION_WINDOW = 100  # Number of samples to consider for anomaly detection
 ANOMALY_CONTAMINATION = 0.1  # Expected proportion of anomalies in the data
+ANOMALY_MIN_SAMPLES = 10  # Samples needed before readings are scored
+ANOMALY_EWMA_ALPHA = 0.1  # Smoothing factor of the exponentially weighted mean
+ANOMALY_ZSCORE_THRESHOLD = 3.5  # Z-score flagged as anomalous before the first model fit
+ANOMALY_REFIT_INTERVAL_SECONDS = 60  # How often due detectors are refitted in the background
 
-# In-memory cache for models (in production, use a proper cache like Redis)
-anomaly_models = {}
+# Streaming detectors, one per machine and sensor type, snapshotted to disk
+anomaly_engine = AnomalyEngine(
+    window_size=ANOMALY_DETECTION_WINDOW,
+    min_samples=ANOMALY_MIN_SAMPLES,
+    contamination=ANOMALY_CONTAMINATION,
+    ewma_alpha=ANOMALY_EWMA_ALPHA,
+    zscore_threshold=ANOMALY_ZSCORE_THRESHOLD,
+    refit_interval=ANOMALY_REFIT_INTERVAL_SECONDS,
+    max_detectors=settings.ANOMALY_MAX_DETECTORS,
+    detector_ttl=settings.ANOMALY_DETECTOR_TTL_SECONDS,
+    snapshot_dir=settings.ANOMALY_STATE_DIR
+)
+
+def score_reading(reading: dict) -> Optional[dict]:
+    """
+    Feed one reading to its streaming detector.
+    
+    Returns:
+        Anomaly record if the reading is anomalous, otherwise None
+    """
+    timestamp = reading['timestamp']
+    if isinstance(timestamp, datetime):
+        # Naive timestamps are stored as UTC
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        timestamp = timestamp.timestamp()
+    score = anomaly_engine.update(
+        reading['machine_id'],
+        reading['sensor_type'],
+        float(reading['value']),
+        float(timestamp)
+    )
+    if score is None or not score.is_anomaly:
+        return None
+    return build_anomaly(reading['machine_id'], reading['sensor_type'], score)
+
+def build_anomaly(machine_id: Any, sensor_type: str, score: Score) -> dict:
+    """Create an anomaly record from a detector score."""
+    severity = (
+        'high' if score.anomaly_score < -0.5 else
+        'medium' if score.anomaly_score < -0.2 else 'low'
+    )
+    timestamp = datetime.utcfromtimestamp(score.timestamp)
+    return {
+        'id': f"anom_{machine_id}_{sensor_type}_{score.timestamp}",
+        'machine_id': machine_id,
+        'sensor_type': sensor_type,
+        'value': score.value,
+        'expected_range': get_expected_range(sensor_type),
+        'severity': severity,
+        'anomaly_score': score.anomaly_score,
+        'zscore': score.zscore,
+        'robust_zscore': score.robust_zscore,
+        'timestamp': timestamp,
+        'status': 'new',
+        'description': f"Abnormal {sensor_type} reading detected",
+        'suggested_action': get_suggested_action(severity, sensor_type)
+    }
 
 async def detect_anomalies(sensor_readings: List[dict]) -> List[dict]:
     """
-    Detect anomalies in sensor readings using Isolation Forest algorithm.
+    Detect anomalies in sensor readings using the streaming detectors.
+    
+    Readings are scored incrementally in timestamp order; readings a detector
+    has already seen are skipped, so overlapping batches are not double counted.
     
     Args:
         sensor_readings: List of sensor readings to analyze
@@ -32,97 +93,14 @@ async def detect_anomalies(sensor_readings: List[dict]) -> List[dict]:
         return []
     
     try:
-        # Convert to DataFrame for easier processing
-        df = pd.DataFrame(sensor_readings)
-        
-        # Group by sensor type and machine
-        anomalies = []
-        
-        for (machine_id, sensor_type), group in df.groupby(['machine_id', 'sensor_type']):
-            # Get or create model for this sensor
-            model_key = f"{machine_id}_{sensor_type}"
-            
-            if model_key not in anomaly_models:
-                anomaly_models[model_key] = {
-                    'model': IsolationForest(
-                        contamination=ANOMALY_CONTAMINATION,
-                        random_state=42
-                    ),
-                    'scaler': StandardScaler(),
-                    'window': []
-                }
-            
-            model_data = anomaly_models[model_key]
-            model = model_data['model']
-            scaler = model_data['scaler']
-            window = model_data['window']
-            
-            # Add new readings to the window
-            window.extend([{
-                'value': row['value'],
-                'timestamp': row['timestamp']
-            } for _, row in group.iterrows()])
-            
-            # Keep only the most recent readings
-            window = window[-ANOMALY_DETECTION_WINDOW:]
-            model_data['window'] = window
-            
-            if len(window) < 10:  # Not enough data yet
-                continue
-                
-            # Prepare data for the model
-            values = np.array([item['value'] for item in window]).reshape(-1, 1)
-            timestamps = [item['timestamp'] for item in window]
-            
-            # Scale the data
-            if len(window) == ANOMALY_DETECTION_WINDOW:  # Only fit on full window
-                scaled_values = scaler.fit_transform(values)
-            else:
-                scaled_values = scaler.transform(values)
-            
-            # Train or update the model
-            if len(window) == ANOMALY_DETECTION_WINDOW:
-                model.fit(scaled_values)
-            
-            # Predict anomalies (-1 for anomalies, 1 for normal)
-            predictions = model.predict(scaled_values)
-            
-            # Get anomaly scores (the lower, the more anomalous)
-            scores = model.decision_function(scaled_values)
-            
-            # Process predictions for the latest readings
-            for i in range(len(group), 0, -1):
-                idx = -i
-                if predictions[idx] == -1:  # Anomaly detected
-                    anomaly_score = scores[idx]
-                    severity = (
-                        'high' if anomaly_score < -0.5 else
-                        'medium' if anomaly_score < -0.2 else 'low'
-                    )
-                    
-                    # Get the actual reading that caused the anomaly
-                    reading = window[idx]
-                    
-                    # Create anomaly record
-                    anomaly = {
-                        'id': f"anom_{machine_id}_{sensor_type}_{timestamps[idx].timestamp()}",
-                        'machine_id': machine_id,
-                        'sensor_type': sensor_type,
-                        'value': float(reading['value']),
-                        'expected_range': get_expected_range(sensor_type),
-                        'severity': severity,
-                        'timestamp': timestamps[idx],
-                        'status': 'new',
-                        'description': f"Abnormal {sensor_type} reading detected",
-                        'suggested_action': get_suggested_action(severity, sensor_type)
-                    }
-                    
-                    anomalies.append(anomaly)
-                    
-                    # Only report the most recent anomaly per sensor type to avoid flooding
-                    break
+        # Only report the most recent anomaly per sensor to avoid flooding
+        latest: Dict[tuple, dict] = {}
+        for reading in sorted(sensor_readings, key=lambda r: r['timestamp']):
+            anomaly = score_reading(reading)
+            if anomaly is not None:
+                latest[(anomaly['machine_id'], anomaly['sensor_type'])] = anomaly
         
-        return anomalies
+        return list(latest.values())
         
     except Exception as e:
         logger.error(f"Error in anomaly detection: {str(e)}", exc_info=True)
@@ -196,14 +174,10 @@ async def process_real_time_reading(reading: dict) -> Optional[dict]:
     """
     Process a single real-time sensor reading for anomalies.
     
-    This is a simplified version that can be called from a message queue consumer.
+    This can be called from a message queue consumer; scoring is O(1).
     """
     try:
-        # In a real implementation, this would add the reading to a window
-        # and check for anomalies using the same logic as detect_anomalies
-        # For now, we'll just pass it through the detect_anomalies function
-        anomalies = await detect_anomalies([reading])
-        return anomalies[0] if anomalies else None
+        return score_reading(reading)
     except Exception as e:
         logger.error(f"Error processing real-time reading: {str(e)}")
         return None
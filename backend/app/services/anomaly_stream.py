@@ -0,0 +1,101 @@
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+
+from .anomaly_service import score_reading
+from .ingest_service import SENSOR_FIELDS
+from .websocket_service import websocket_manager
+
+logger = logging.getLogger(__name__)
+
+# Receives (machine_id, message) for every published anomaly batch
+Subscriber = Callable[[int, Dict[str, Any]], Awaitable[None]]
+
+
+class AnomalyStream:
+    """
+    In-process pub/sub of anomalies keyed by machine.
+
+    Ingest paths publish each stored reading exactly once. The reading is scored
+    by its streaming detector and any anomalies are pushed to the subscribers,
+    so websocket clients no longer poll the database or re-run detection.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    async def publish_readings(self, readings: List[dict]) -> List[dict]:
+        """
+        Score readings (dicts with machine_id, sensor_type, value and timestamp)
+        and push the anomalies found, one message per machine.
+
+        Returns:
+            The detected anomalies
+        """
+        by_machine: Dict[int, List[dict]] = {}
+        for reading in readings:
+            try:
+                anomaly = score_reading(reading)
+            except Exception as e:
+                logger.error(f"Error scoring reading for machine {reading.get('machine_id')}: {str(e)}")
+                continue
+            if anomaly is not None:
+                by_machine.setdefault(reading['machine_id'], []).append(anomaly)
+
+        for machine_id, anomalies in by_machine.items():
+            await self.publish(machine_id, {
+                "type": "anomaly_detected",
+                "machine_id": machine_id,
+                "anomalies": [
+                    {
+                        "id": anomaly['id'],
+                        "sensor_type": anomaly['sensor_type'],
+                        "value": anomaly['value'],
+                        "severity": anomaly['severity'],
+                        "timestamp": anomaly['timestamp'].isoformat(),
+                        "suggested_action": anomaly['suggested_action']
+                    }
+                    for anomaly in anomalies
+                ],
+                "timestamp": datetime.utcnow().isoformat()
+            })
+
+        return [anomaly for anomalies in by_machine.values() for anomaly in anomalies]
+
+    async def publish_sensor_data(
+        self,
+        machine_id: int,
+        values: Mapping[str, Any],
+        timestamp: Optional[datetime] = None
+    ) -> List[dict]:
+        """Publish one wide SensorData row (one column per sensor)"""
+        timestamp = timestamp or datetime.utcnow()
+        return await self.publish_readings([
+            {
+                'machine_id': machine_id,
+                'sensor_type': sensor_type,
+                'value': values[sensor_type],
+                'timestamp': timestamp
+            }
+            for sensor_type in SENSOR_FIELDS
+            if values.get(sensor_type) is not None
+        ])
+
+    async def publish(self, machine_id: int, message: Dict[str, Any]) -> None:
+        """Deliver a message to every subscriber"""
+        for subscriber in list(self._subscribers):
+            try:
+                await subscriber(machine_id, message)
+            except Exception as e:
+                logger.error(f"Anomaly subscriber failed for machine {machine_id}: {str(e)}", exc_info=True)
+
+# Create a singleton instance, pushing to websocket clients subscribed to each machine
+anomaly_stream = AnomalyStream()
+anomaly_stream.subscribe(websocket_manager.broadcast_to_machine)
@@ -0,0 +1,342 @@
+import io
+import logging
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import DateTime, Float, Integer, Table, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import FromClause
+
+from .. import models
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 100000
+
+# Marker holding the end of the last completed export (exclusive)
+WATERMARK_FILE = "_exported_until"
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive datetimes are stored as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+class SensorArchiveService:
+    """
+    Columnar archive of sensor_data as Hive-partitioned Parquet.
+
+    Files live at <root>/machine_id=<id>/date=<YYYY-MM-DD>/part-0.parquet,
+    zstd-compressed and sorted by timestamp. Reads go through pyarrow.dataset
+    over memory-mapped files: machine and date filters prune directories,
+    timestamp filters are pushed down to row-group statistics, and only the
+    requested columns are decoded. Results come back as Arrow tables or
+    NumPy arrays without passing through a database driver.
+    """
+
+    def __init__(self, archive_dir: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+        self.root = Path(archive_dir) / "sensor_data"
+        self.chunk_size = chunk_size
+        self.table: Table = models.SensorData.__table__
+        self.float_columns = [column.name for column in self.table.columns if isinstance(column.type, Float)]
+
+    # Writes
+
+    def export(
+        self,
+        connection: Connection,
+        start_time: datetime,
+        end_time: datetime,
+        machine_id: Optional[int] = None,
+        source: Optional[FromClause] = None
+    ) -> int:
+        """
+        Export readings in [start_time, end_time) to the archive; returns the row count.
+
+        Rows already archived for the same machine and day are merged by id,
+        so re-exporting a range (or late readings for it) never duplicates.
+        """
+        source = self.table if source is None else source
+        stmt = select(*(source.c[column.name] for column in self.table.columns)).where(
+            source.c.timestamp >= start_time, source.c.timestamp < end_time
+        )
+        if machine_id is not None:
+            stmt = stmt.where(source.c.machine_id == machine_id)
+        # Each machine/day group arrives contiguously and is written once
+        stmt = stmt.order_by(source.c.machine_id, source.c.timestamp)
+
+        columns = [column.name for column in self.table.columns]
+        pending_key = None
+        pending: List[pd.DataFrame] = []
+        rows = 0
+
+        result = connection.execute(stmt.execution_options(yield_per=self.chunk_size))
+        for chunk in result.partitions(self.chunk_size):
+            frame = self._normalize(pd.DataFrame.from_records(chunk, columns=columns))
+            rows += len(frame)
+            for key, group in frame.groupby([frame["machine_id"], frame["timestamp"].dt.date], sort=False):
+                if key != pending_key and pending:
+                    self._write_partition(pending_key, pd.concat(pending, ignore_index=True))
+                    pending = []
+                pending_key = key
+                pending.append(group)
+        if pending:
+            self._write_partition(pending_key, pd.concat(pending, ignore_index=True))
+
+        if rows:
+            logger.info(f"Archived {rows} sensor readings from {start_time} to {end_time}")
+        return rows
+
+    def export_pending(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Export every completed day since the last export and advance the watermark"""
+        end = datetime.combine((now or datetime.utcnow()).date(), datetime.min.time())
+        start = self.watermark()
+        if start is None:
+            oldest = db.scalar(select(self.table.c.timestamp).order_by(self.table.c.timestamp).limit(1))
+            if oldest is None:
+                return 0
+            start = datetime.combine(oldest.date(), datetime.min.time())
+        if start >= end:
+            return 0
+
+        rows = self.export(db.connection(), start, end)
+        db.commit()
+        self._set_watermark(end)
+        return rows
+
+    def watermark(self) -> Optional[datetime]:
+        """Everything before this time has been exported, or None before the first export"""
+        try:
+            return datetime.fromisoformat((self.root / WATERMARK_FILE).read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    # Reads
+
+    def scan(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        machine_ids: Optional[Sequence[int]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ):
+        """
+        Read archived readings as a pyarrow.Table, sorted by machine and time.
+
+        columns defaults to all; machine_id and timestamp are always included.
+        end_time is exclusive.
+        """
+        dataset = self._dataset()
+        if dataset is None:
+            return self._empty_table(columns)
+        return dataset.to_table(
+            columns=self._projection(columns),
+            filter=self._filter(machine_ids, start_time, end_time)
+        ).sort_by([("machine_id", "ascending"), ("timestamp", "ascending")])
+
+    def batches(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        machine_ids: Optional[Sequence[int]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        """Stream archived readings as pyarrow.RecordBatches, file by file"""
+        dataset = self._dataset()
+        if dataset is None:
+            return iter(())
+        return dataset.to_batches(
+            columns=self._projection(columns),
+            filter=self._filter(machine_ids, start_time, end_time),
+            batch_size=self.chunk_size
+        )
+
+    def ipc_stream(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        machine_ids: Optional[Sequence[int]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Iterator[bytes]:
+        """Archived readings as an Arrow IPC stream, one message per record batch"""
+        import pyarrow as pa
+
+        # Validate eagerly; the generator body only runs once the response starts
+        projection = self._projection(columns)
+        schema = self._empty_table(projection).schema
+
+        def generate() -> Iterator[bytes]:
+            buffer = io.BytesIO()
+            with pa.ipc.new_stream(pa.PythonFile(buffer, mode="w"), schema) as writer:
+                for batch in self.batches(projection, machine_ids, start_time, end_time):
+                    if batch.schema != schema:
+                        batch = pa.Table.from_batches([batch]).cast(schema).combine_chunks().to_batches()[0]
+                    writer.write_batch(batch)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+
+        return generate()
+
+    def to_numpy(self, *args, **kwargs) -> Dict[str, np.ndarray]:
+        """scan() as one NumPy array per column (NULLs become NaN)"""
+        table = self.scan(*args, **kwargs).combine_chunks()
+        return {
+            name: table.column(name).to_numpy(zero_copy_only=False)
+            for name in table.column_names
+        }
+
+    def read_frame(
+        self,
+        db: Session,
+        columns: Optional[Sequence[str]] = None,
+        machine_id: Optional[int] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Historical readings as a DataFrame: the archive, plus rows newer than
+        the export watermark read from the database, including SQLite
+        partition files moved out of the main table.
+        """
+        # partition_service archives through this module
+        from .partition_service import partition_service
+
+        machine_ids = [machine_id] if machine_id is not None else None
+        projection = self._projection(columns)
+        archived = self.scan(projection, machine_ids, start_time, end_time).to_pandas()
+
+        watermark = self.watermark()
+        if watermark is not None and (start_time is None or _utc(start_time) < _utc(watermark)):
+            start_time = watermark
+        records = []
+        for batch in partition_service.sensor_batches(db, start_time, end_time):
+            with partition_service.sensor_reader(db, batch) as (reader, source):
+                stmt = select(*(source.c[name] for name in projection)).where(*batch.bounds(source.c.timestamp))
+                if machine_id is not None:
+                    stmt = stmt.where(source.c.machine_id == machine_id)
+                if start_time is not None:
+                    stmt = stmt.where(source.c.timestamp >= start_time)
+                if end_time is not None:
+                    stmt = stmt.where(source.c.timestamp < end_time)
+                records += reader.execute(stmt).all()
+        recent = self._normalize(pd.DataFrame.from_records(records, columns=projection))
+
+        # Archived rows past the watermark were dropped from the database by
+        # retention, so the two parts never overlap
+        if archived.empty:
+            return recent.sort_values(["machine_id", "timestamp"], kind="stable").reset_index(drop=True)
+        if recent.empty:
+            return archived
+        frame = pd.concat([archived, recent], ignore_index=True)
+        return frame.sort_values(["machine_id", "timestamp"], kind="stable").reset_index(drop=True)
+
+    # Internals
+
+    def _normalize(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True)
+        float_columns = [name for name in self.float_columns if name in frame.columns]
+        # All-NULL sensor columns would otherwise be typed as objects
+        frame[float_columns] = frame[float_columns].astype("float64")
+        return frame
+
+    def _partition_dir(self, machine_id: int, day: date) -> Path:
+        return self.root / f"machine_id={machine_id}" / f"date={day.isoformat()}"
+
+    def _write_partition(self, key: tuple, frame: pd.DataFrame) -> None:
+        machine_id, day = key
+        directory = self._partition_dir(int(machine_id), day)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / "part-0.parquet"
+        # Dot-prefixed files are ignored by dataset discovery until renamed
+        temp_path = directory / ".part-0.parquet.tmp"
+
+        frame = frame.drop(columns=["machine_id"])
+        if path.exists():
+            frame = pd.concat([pd.read_parquet(path), frame], ignore_index=True)
+            frame = frame.drop_duplicates("id", keep="last").sort_values("timestamp", kind="stable")
+        frame.to_parquet(temp_path, index=False, compression="zstd")
+        os.replace(temp_path, path)
+
+    def _set_watermark(self, value: datetime) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        temp_path = self.root / f".{WATERMARK_FILE}.tmp"
+        temp_path.write_text(value.isoformat())
+        os.replace(temp_path, self.root / WATERMARK_FILE)
+
+    def _projection(self, columns: Optional[Sequence[str]]) -> List[str]:
+        names = [column.name for column in self.table.columns]
+        if columns is None:
+            return names
+        unknown = set(columns) - set(names)
+        if unknown:
+            raise ValueError(f"Unknown sensor_data columns: {', '.join(sorted(unknown))}")
+        return ["machine_id", "timestamp"] + [name for name in columns if name not in ("machine_id", "timestamp")]
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        if not self.root.is_dir():
+            return None
+        partitioning = ds.partitioning(
+            pa.schema([("machine_id", pa.int64()), ("date", pa.date32())]), flavor="hive"
+        )
+        return ds.dataset(
+            str(self.root),
+            format="parquet",
+            partitioning=partitioning,
+            filesystem=fs.LocalFileSystem(use_mmap=True)
+        )
+
+    def _filter(
+        self,
+        machine_ids: Optional[Sequence[int]],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime]
+    ):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        conditions = []
+        if machine_ids is not None:
+            conditions.append(ds.field("machine_id").isin([int(machine_id) for machine_id in machine_ids]))
+        if start_time is not None:
+            start = _utc(start_time)
+            conditions.append(ds.field("date") >= start.date())
+            conditions.append(ds.field("timestamp") >= pa.scalar(start, type=pa.timestamp("ns", tz="UTC")))
+        if end_time is not None:
+            end = _utc(end_time)
+            conditions.append(ds.field("date") <= end.date())
+            conditions.append(ds.field("timestamp") < pa.scalar(end, type=pa.timestamp("ns", tz="UTC")))
+        if not conditions:
+            return None
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression = expression & condition
+        return expression
+
+    def _empty_table(self, columns: Optional[Sequence[str]]):
+        import pyarrow as pa
+
+        types = {}
+        for column in self.table.columns:
+            if isinstance(column.type, DateTime):
+                types[column.name] = pa.timestamp("ns", tz="UTC")
+            elif isinstance(column.type, Integer):
+                types[column.name] = pa.int64()
+            else:
+                types[column.name] = pa.float64()
+        return pa.schema([(name, types[name]) for name in self._projection(columns)]).empty_table()
+
+
+# Create a singleton instance
+sensor_archive = SensorArchiveService(settings.SENSOR_ARCHIVE_DIR)
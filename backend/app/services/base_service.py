@@ -1,10 +1,13 @@
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
 import logging
 
 from .. import models, schemas
+from ..db.pagination import Page, keyset_select, row_counter, split_page
 
 ModelType = TypeVar("ModelType", bound=models.Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=schemas.ModelBase)
@@ -52,20 +55,19 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         *,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
         **filters
-    ) -> tuple[List[ModelType], int]:
-        """Get paginated results with total count"""
-        query = db.query(self.model)
+    ) -> Page:
+        """Get records in id order, paged by cursor (or skip for the first page)"""
+        stmt = self._filtered_select(filters, skip_none=True)
+        sort_key = (self.model.id,)
         
-        # Apply filters if any
-        for field, value in filters.items():
-            if value is not None and hasattr(self.model, field):
-                query = query.filter(getattr(self.model, field) == value)
+        total = row_counter.count(db, stmt) if include_total else None
+        rows = db.scalars(keyset_select(stmt, sort_key, cursor, limit, descending=False, skip=skip)).all()
+        items, next_cursor = split_page(rows, sort_key, limit)
         
-        total = query.count()
-        items = query.offset(skip).limit(limit).all()
-        
-        return items, total
+        return Page(items, total, next_cursor)
     
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """Create a new record"""
@@ -118,3 +120,92 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 query = query.filter(getattr(self.model, field) == value)
         
         return query.count()
+    
+    # Async variants for handlers running on an AsyncSession
+    
+    def _filtered_select(self, filters: Dict[str, Any], skip_none: bool = False):
+        stmt = select(self.model)
+        for field, value in filters.items():
+            if skip_none and value is None:
+                continue
+            if hasattr(self.model, field):
+                stmt = stmt.where(getattr(self.model, field) == value)
+        return stmt
+    
+    async def get_async(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """Get a single record by ID"""
+        return await db.get(self.model, id)
+    
+    async def get_multi_async(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        **filters
+    ) -> List[ModelType]:
+        """Get multiple records with optional filtering"""
+        stmt = self._filtered_select(filters).offset(skip).limit(limit)
+        return list((await db.scalars(stmt)).all())
+    
+    async def get_multi_paginated_async(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        **filters
+    ) -> Page:
+        """Get records in id order, paged by cursor (or skip for the first page)"""
+        stmt = self._filtered_select(filters, skip_none=True)
+        sort_key = (self.model.id,)
+        
+        total = await row_counter.count_async(db, stmt) if include_total else None
+        rows = (await db.scalars(keyset_select(stmt, sort_key, cursor, limit, descending=False, skip=skip))).all()
+        items, next_cursor = split_page(rows, sort_key, limit)
+        
+        return Page(items, total, next_cursor)
+    
+    async def create_async(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """Create a new record"""
+        db_obj = self.model(**jsonable_encoder(obj_in))
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+    
+    async def update_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """Update an existing record"""
+        obj_data = jsonable_encoder(db_obj)
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        
+        for field in obj_data:
+            if field in update_data and update_data[field] is not None:
+                setattr(db_obj, field, update_data[field])
+        
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+    
+    async def remove_async(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        """Delete a record"""
+        obj = await db.get(self.model, id)
+        if not obj:
+            return None
+        await db.delete(obj)
+        await db.commit()
+        return obj
+    
+    async def count_async(self, db: AsyncSession, **filters) -> int:
+        """Count records matching filters"""
+        stmt = self._filtered_select(filters)
+        return await db.scalar(select(func.count()).select_from(stmt.subquery()))
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+STAGE_IN_FLIGHT = Gauge(
+    'cpu_stage_in_flight',
+    'Requests admitted to a CPU execution stage (running or queued)',
+    ['stage']
+)
+
+STAGE_REJECTED = Counter(
+    'cpu_stage_rejected_total',
+    'Requests rejected because a CPU execution stage was saturated',
+    ['stage']
+)
+
+
+class StageSaturatedError(Exception):
+    """Raised when a CPU execution stage has no capacity left"""
+
+
+class CPUExecutionStage:
+    """
+    Bounded pool for CPU-heavy work that must not run on the event loop.
+
+    At most max_workers + max_queue units of work (a request, or one image of
+    a batch) are admitted at once; further work is rejected with StageSaturatedError so callers can answer 429
+    instead of piling up latency. Picklable functions run in a thread or
+    process pool depending on use_processes; work that closes over process-local
+    state (such as loaded models) is sent to a thread pool with the same size.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int = 4,
+        max_queue: int = 8,
+        use_processes: bool = False
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self._in_flight = 0
+        self._executor: Optional[Executor] = None
+        self._thread_executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @asynccontextmanager
+    async def admit(self, slots: int = 1) -> AsyncIterator["CPUExecutionStage"]:
+        """
+        Reserve slots for the duration of the block, one per unit of work
+        (such as one image) the caller will submit.
+
+        Raises:
+            StageSaturatedError: If the stage cannot take that many more
+        """
+        if self._in_flight + slots > self.capacity:
+            STAGE_REJECTED.labels(stage=self.name).inc()
+            raise StageSaturatedError(f"{self.name} stage is saturated ({self._in_flight} in flight)")
+
+        self._in_flight += slots
+        STAGE_IN_FLIGHT.labels(stage=self.name).inc(slots)
+        try:
+            yield self
+        finally:
+            self._in_flight -= slots
+            STAGE_IN_FLIGHT.labels(stage=self.name).dec(slots)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a picklable function in the stage's thread or process pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), partial(fn, *args))
+
+    async def run_in_thread(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a function that needs process-local state in the stage's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_thread_executor(), partial(fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "in_flight": self._in_flight,
+            "capacity": self.capacity,
+            "max_workers": self.max_workers,
+            "use_processes": self.use_processes,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pools, waiting for running work to finish"""
+        for executor in {self._executor, self._thread_executor}:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._executor = None
+        self._thread_executor = None
+
+    def _get_executor(self) -> Executor:
+        # Pools are created lazily so importing the module never forks or spawns
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                logger.info(f"Started {self.name} process pool with {self.max_workers} workers")
+            else:
+                self._executor = self._get_thread_executor()
+        return self._executor
+
+    def _get_thread_executor(self) -> ThreadPoolExecutor:
+        if self._thread_executor is None:
+            self._thread_executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self.name
+            )
+        return self._thread_executor
@@ -0,0 +1,113 @@
+"""
+Image decoding and preprocessing for model input.
+
+Functions here are module-level and only take bytes/arrays so they can run in
+either a thread or a process pool.
+"""
+import struct
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Model input size as (width, height)
+MODEL_INPUT_SIZE: Tuple[int, int] = (224, 224)
+
+# JPEG can be decoded directly at 1/2, 1/4 or 1/8 scale (largest first)
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+_PIXEL_SCALE = np.float32(1.0 / 255.0)
+
+# Per-worker scratch buffers reused across calls
+_scratch = threading.local()
+
+
+def jpeg_dimensions(image_data: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG's SOF header without decoding it"""
+    if image_data[:2] != b"\xff\xd8":
+        return None
+
+    offset = 2
+    length = len(image_data)
+    while offset + 9 < length:
+        if image_data[offset] != 0xFF:
+            return None
+        marker = image_data[offset + 1]
+        if marker == 0xFF:  # Fill byte
+            offset += 1
+            continue
+        segment_length = struct.unpack(">H", image_data[offset + 2:offset + 4])[0]
+        # SOF0-SOF15, excluding DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", image_data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + segment_length
+    return None
+
+
+def decode_image(image_data: bytes, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """
+    Decode encoded image bytes to a BGR array straight from the upload buffer.
+
+    When a target size is given and the image is a JPEG at least 2x larger than
+    it, the codec's reduced-resolution decode is used so the full-size image is
+    never materialized.
+
+    Raises:
+        ValueError: If the bytes are not a decodable image
+    """
+    flag = cv2.IMREAD_COLOR
+    if size is not None:
+        dimensions = jpeg_dimensions(image_data)
+        if dimensions is not None:
+            width, height = dimensions
+            for factor, reduced_flag in _REDUCED_DECODE_FLAGS:
+                if width // factor >= size[0] and height // factor >= size[1]:
+                    flag = reduced_flag
+                    break
+
+    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), flag)
+    if image is None:
+        raise ValueError("Could not decode image")
+    return image
+
+
+def preprocess_image(
+    image: np.ndarray,
+    size: Tuple[int, int] = MODEL_INPUT_SIZE,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Convert a BGR image to a normalized float32 RGB array of the model input size.
+
+    Resizing happens first into a reused per-worker buffer; the BGR->RGB swap and
+    the 1/255 scaling are then fused into a single pass that writes into out
+    (for example one slot of a batch tensor), allocated here if not provided.
+    """
+    width, height = size
+    resized = getattr(_scratch, "resized", None)
+    if resized is None or resized.shape != (height, width, 3):
+        resized = np.empty((height, width, 3), dtype=np.uint8)
+        _scratch.resized = resized
+
+    interpolation = cv2.INTER_AREA if image.shape[1] > width else cv2.INTER_LINEAR
+    cv2.resize(image, size, dst=resized, interpolation=interpolation)
+
+    if out is None:
+        out = np.empty((height, width, 3), dtype=np.float32)
+    np.multiply(resized[..., ::-1], _PIXEL_SCALE, out=out, casting="unsafe")
+    return out
+
+
+def decode_and_preprocess(
+    image_data: bytes,
+    size: Tuple[int, int] = MODEL_INPUT_SIZE,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Decode and preprocess in one call to avoid shipping the full-size array between workers"""
+    return preprocess_image(decode_image(image_data, size), size, out)
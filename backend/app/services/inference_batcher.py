@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, List, Set, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+BATCH_SIZE = Histogram(
+    'inference_batch_size',
+    'Number of requests combined into one batched inference call',
+    ['batcher'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+QUEUE_LATENCY = Histogram(
+    'inference_queue_latency_seconds',
+    'Time a request waited in the micro-batch queue before inference started',
+    ['batcher'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+BATCH_ERRORS = Counter(
+    'inference_batch_errors_total',
+    'Number of batched inference calls that raised',
+    ['batcher']
+)
+
+# (input vector, waiting future, enqueue time)
+PendingItem = Tuple[np.ndarray, asyncio.Future, float]
+
+
+class MicroBatcher:
+    """
+    Collects single inference requests into batches.
+
+    Requests sharing a key (normally the loaded model) are queued until either
+    max_batch_size items are waiting or the oldest has waited max_wait_ms. The
+    inputs are then stacked into one matrix and passed to predict_batch in a
+    worker thread, and each caller receives its own row of the result.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[Any, np.ndarray], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "default"
+    ):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._pending: Dict[Hashable, List[PendingItem]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._batches = 0
+        self._items = 0
+
+    async def submit(self, key: Hashable, vector: np.ndarray) -> Any:
+        """Queue one input vector and wait for its batched result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((vector, future, time.perf_counter()))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching counters for monitoring"""
+        return {
+            "name": self.name,
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "queued": sum(len(items) for items in self._pending.values()),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        items = self._pending.pop(key, None)
+        if items:
+            task = asyncio.get_running_loop().create_task(self._run_batch(key, items))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, key: Hashable, items: List[PendingItem]) -> None:
+        started = time.perf_counter()
+        for _, _, enqueued_at in items:
+            QUEUE_LATENCY.labels(batcher=self.name).observe(started - enqueued_at)
+        BATCH_SIZE.labels(batcher=self.name).observe(len(items))
+        self._batches += 1
+        self._items += len(items)
+
+        try:
+            matrix = np.vstack([vector for vector, _, _ in items])
+            results = await run_in_threadpool(self.predict_batch, key, matrix)
+            if len(results) != len(items):
+                raise ValueError(
+                    f"Batch inference returned {len(results)} results for {len(items)} inputs"
+                )
+        except Exception as e:
+            BATCH_ERRORS.labels(batcher=self.name).inc()
+            logger.error(f"Batched inference ({self.name}) failed: {str(e)}", exc_info=True)
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(items, results):
+            # Callers that were cancelled while queued are skipped
+            if not future.done():
+                future.set_result(result)
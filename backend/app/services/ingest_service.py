@@ -0,0 +1,213 @@
+import io
+import logging
+import time
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from .live_state import live_state
+from .rollup_service import rollup_service
+
+logger = logging.getLogger(__name__)
+
+# Wide sensor columns stored on every SensorData row
+SENSOR_FIELDS = ['temperature', 'vibration', 'pressure', 'rpm', 'current', 'voltage']
+REQUIRED_COLUMNS = ['timestamp'] + SENSOR_FIELDS
+
+# Column order used for both executemany inserts and COPY
+INSERT_COLUMNS = ['machine_id'] + REQUIRED_COLUMNS
+
+
+class SensorIngestService:
+    """Chunked, vectorized ingestion of sensor CSV data into the sensor_data table"""
+
+    def __init__(self, chunk_size: Optional[int] = None):
+        self.chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+        self.table = models.SensorData.__table__
+
+    def read_csv_chunks(
+        self,
+        source: Union[str, BinaryIO],
+        chunk_size: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Parse a CSV file in fixed-size chunks.
+
+        Only the required columns are materialized, so peak memory is bounded by
+        the chunk size rather than the file size.
+
+        Raises:
+            ValueError: If the file is empty or its header is missing any
+                required column, before any chunk is returned
+        """
+        handle = open(source, "rb") if isinstance(source, str) else source
+        try:
+            # Validated here rather than on the first chunk, like CsvChunkParser.feed,
+            # so a header-only file with the wrong columns fails before any work
+            header = handle.readline()
+            if not header.strip():
+                raise ValueError("CSV file is empty")
+            columns = [column.strip().strip('"') for column in header.decode("utf-8-sig").strip().split(",")]
+            self.validate_columns(columns)
+        except Exception:
+            if handle is not source:
+                handle.close()
+            raise
+        return self._iter_chunks(handle, handle is not source, columns, chunk_size or self.chunk_size)
+
+    def _iter_chunks(
+        self,
+        handle: BinaryIO,
+        owned: bool,
+        columns: List[str],
+        chunk_size: int
+    ) -> Iterator[pd.DataFrame]:
+        try:
+            reader = pd.read_csv(
+                handle,
+                header=None,
+                names=columns,
+                chunksize=chunk_size,
+                usecols=lambda column: column in REQUIRED_COLUMNS,
+            )
+            yield from reader
+        finally:
+            if owned:
+                handle.close()
+
+    def validate_columns(self, columns: Iterable[str]) -> None:
+        """Ensure all required CSV columns are present"""
+        present = set(columns)
+        missing = [col for col in REQUIRED_COLUMNS if col not in present]
+        if missing:
+            raise ValueError(
+                f"CSV must contain these columns: {', '.join(REQUIRED_COLUMNS)} "
+                f"(missing: {', '.join(missing)})"
+            )
+
+    def prepare_chunk(self, chunk: pd.DataFrame, machine_id: int) -> pd.DataFrame:
+        """
+        Coerce and validate a raw chunk with vectorized operations.
+
+        Unparseable timestamps and numbers become NaT/NaN, infinities are treated
+        as missing, and rows without a timestamp or without any sensor value are
+        dropped.
+        """
+        frame = pd.DataFrame(index=chunk.index)
+        frame['machine_id'] = np.full(len(chunk), machine_id, dtype=np.int64)
+        frame['timestamp'] = pd.to_datetime(chunk['timestamp'], errors='coerce')
+
+        values = chunk[SENSOR_FIELDS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        values[~np.isfinite(values)] = np.nan
+        frame[SENSOR_FIELDS] = values
+
+        valid = frame['timestamp'].notna().to_numpy() & ~np.isnan(values).all(axis=1)
+        return frame.loc[valid, INSERT_COLUMNS]
+
+    def write_chunk(self, db: Session, frame: pd.DataFrame) -> int:
+        """Write a prepared chunk, using COPY on PostgreSQL and executemany elsewhere"""
+        if frame.empty:
+            return 0
+
+        bind = db.get_bind()
+        if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+            self._copy_chunk(db, frame)
+        else:
+            db.execute(self.table.insert(), self._to_records(frame))
+        return len(frame)
+
+    def ingest_frames(
+        self,
+        db: Session,
+        machine_id: int,
+        chunks: Iterable[pd.DataFrame]
+    ) -> Dict[str, Any]:
+        """
+        Ingest an iterable of raw CSV chunks in a single transaction.
+
+        Chunks are written and their rollups merged as they are parsed, but
+        nothing is committed until the last chunk succeeds, so a failed upload
+        leaves no rows behind and can simply be retried.
+
+        Returns:
+            Ingestion statistics including throughput in rows per second
+        """
+        rows_read = 0
+        rows_inserted = 0
+        chunk_count = 0
+        # Newest rows, pushed to the live state once they are committed
+        recent = None
+        start_time = time.perf_counter()
+
+        try:
+            for chunk in chunks:
+                rows_read += len(chunk)
+                frame = self.prepare_chunk(chunk, machine_id)
+                rows_inserted += self.write_chunk(db, frame)
+                rollup_service.apply_frame(db, frame)
+                recent = frame if recent is None else pd.concat([recent, frame]).tail(live_state.window_size)
+                chunk_count += 1
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.error(
+                f"Sensor ingest for machine {machine_id} failed after {rows_read} rows, "
+                f"rolled back",
+                exc_info=True
+            )
+            raise
+
+        if recent is not None:
+            live_state.record_frame(recent)
+
+        elapsed = time.perf_counter() - start_time
+        stats = {
+            "rows_read": rows_read,
+            "rows_inserted": rows_inserted,
+            "rows_rejected": rows_read - rows_inserted,
+            "chunks": chunk_count,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(rows_inserted / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        logger.info(
+            f"Ingested {rows_inserted} sensor rows for machine {machine_id} "
+            f"in {stats['elapsed_seconds']}s ({stats['rows_per_second']} rows/s)"
+        )
+        return stats
+
+    def ingest_csv(
+        self,
+        db: Session,
+        machine_id: int,
+        source: Union[str, BinaryIO],
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Stream a CSV file or file object into the sensor_data table"""
+        return self.ingest_frames(db, machine_id, self.read_csv_chunks(source, chunk_size))
+
+    def _to_records(self, frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Convert a prepared chunk to executemany parameters with NULLs for missing values"""
+        frame = frame.astype(object).where(frame.notna(), None)
+        return frame.to_dict('records')
+
+    def _copy_chunk(self, db: Session, frame: pd.DataFrame) -> None:
+        """Bulk load a prepared chunk with PostgreSQL COPY FROM STDIN"""
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False, date_format='%Y-%m-%d %H:%M:%S.%f')
+        buffer.seek(0)
+
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {self.table.name} ({', '.join(INSERT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+# Create a singleton instance
+ingest_service = SensorIngestService()
@@ -0,0 +1,443 @@
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Mapping, Optional, Set, Tuple, Union
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..config import settings
+from ..models.alert import AlertSeverity, AlertStatus
+from .websocket_service import websocket_manager
+
+logger = logging.getLogger(__name__)
+
+# Channel kind used to tell other workers which machines changed
+INVALIDATION_CHANNEL = "live"
+
+SENSOR_FIELDS = [
+    column.name for column in models.SensorData.__table__.columns
+    if column.name not in ("id", "machine_id", "timestamp")
+]
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _columns(row: Any) -> Dict[str, Any]:
+    """Column values of an ORM object"""
+    return {column.key: getattr(row, column.key, None) for column in row.__table__.columns}
+
+
+def _sort_time(value: Optional[datetime]) -> datetime:
+    """Comparable UTC time; naive datetimes are stored as UTC"""
+    if value is None:
+        return datetime.max
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class RollingWindow:
+    """
+    Min, max, mean and latest of the last size readings of one sensor.
+
+    Every reading takes a slot, including ones where this sensor was NULL.
+    Monotonic deques keep min and max amortized O(1) per push; the mean is
+    updated incrementally (Welford) and recomputed exactly once per window.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.count = 0
+        self.mean = 0.0
+        self._values: deque = deque()
+        self._mins: deque = deque()
+        self._maxs: deque = deque()
+        self._seq = 0
+
+    def push(self, value: Optional[float]) -> None:
+        self._seq += 1
+        self._values.append(value)
+        if value is not None:
+            self.count += 1
+            self.mean += (value - self.mean) / self.count
+            while self._mins and self._mins[-1][1] >= value:
+                self._mins.pop()
+            self._mins.append((self._seq, value))
+            while self._maxs and self._maxs[-1][1] <= value:
+                self._maxs.pop()
+            self._maxs.append((self._seq, value))
+
+        if len(self._values) > self.size:
+            expired = self._values.popleft()
+            if expired is not None:
+                self.count -= 1
+                self.mean = self.mean - (expired - self.mean) / self.count if self.count else 0.0
+            oldest = self._seq - self.size
+            if self._mins and self._mins[0][0] <= oldest:
+                self._mins.popleft()
+            if self._maxs and self._maxs[0][0] <= oldest:
+                self._maxs.popleft()
+
+        # Recompute once per window so rounding cannot accumulate
+        if self._seq % self.size == 0 and self.count:
+            self.mean = math.fsum(v for v in self._values if v is not None) / self.count
+
+    def stats(self) -> Optional[Dict[str, float]]:
+        if not self.count:
+            return None
+        return {
+            "min": self._mins[0][1],
+            "max": self._maxs[0][1],
+            "avg": self.mean,
+            # The newest non-NULL value is always the tail of both deques
+            "latest": self._mins[-1][1]
+        }
+
+
+class LiveMachineState:
+    """What dashboards read about one machine, kept current by the write paths"""
+
+    def __init__(self, machine_id: int, status: str, current_rul_hours: Optional[float], window_size: int):
+        self.machine_id = machine_id
+        self.status = status
+        self.current_rul_hours = current_rul_hours
+        self.last_reading: Optional[Dict[str, Any]] = None
+        # Set when the newest reading was written without its id being known
+        self.reading_stale = False
+        self.last_timestamp: Optional[datetime] = None
+        self.windows = {field: RollingWindow(window_size) for field in SENSOR_FIELDS}
+        self.latest_prediction: Optional[Dict[str, Any]] = None
+        self.alert_counts = {severity.value: 0 for severity in AlertSeverity}
+        self.open_alert_counts = {severity.value: 0 for severity in AlertSeverity}
+        self.loaded_at = time.monotonic()
+
+    def push_reading(self, reading: Mapping[str, Any]) -> None:
+        for field, window in self.windows.items():
+            window.push(reading.get(field))
+        self.last_timestamp = reading.get("timestamp")
+        if reading.get("id") is not None:
+            self.last_reading = dict(reading)
+            self.reading_stale = False
+        else:
+            self.last_reading = None
+            self.reading_stale = True
+
+    def count_alert(self, severity: Any, status: Any, delta: int) -> None:
+        severity = _enum_value(severity)
+        if severity not in self.alert_counts:
+            return
+        self.alert_counts[severity] += delta
+        if _enum_value(status) == AlertStatus.OPEN.value:
+            self.open_alert_counts[severity] += delta
+
+    def health(self) -> schemas.MachineHealthStats:
+        prediction = self.latest_prediction or {}
+        sensor_stats = {}
+        for field, window in self.windows.items():
+            stats = window.stats()
+            if stats is not None:
+                sensor_stats[field] = stats
+        return schemas.MachineHealthStats(
+            machine_id=self.machine_id,
+            status=self.status,
+            # Placeholder until actual uptime data is recorded
+            uptime_percentage=95.0,
+            avg_rul=prediction.get("rul_hours"),
+            last_prediction_time=prediction.get("prediction_time"),
+            alert_count=dict(self.alert_counts),
+            open_alert_count=dict(self.open_alert_counts),
+            sensor_stats=sensor_stats
+        )
+
+
+class LiveStateStore:
+    """
+    In-memory live state per machine, served to the latest-reading,
+    latest-prediction and health endpoints without querying the database.
+
+    A machine is loaded from the database on first read. Ingest, prediction,
+    alert and machine writes then update its entry in place. Writes also
+    publish the machine id on the websocket broker, so other workers drop
+    their copy and reload it on the next read. Entries expire after ttl
+    seconds as a backstop for writes made outside these paths.
+    """
+
+    def __init__(self, ttl: float = 300.0, window_size: int = 1000):
+        self.ttl = ttl
+        self.window_size = window_size
+        self.worker_id = uuid.uuid4().hex
+        self._entries: Dict[int, LiveMachineState] = {}
+        # Bumped by every write, so a load racing a write is not cached
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Remember the event loop that cross-worker invalidations are published from"""
+        self._loop = asyncio.get_running_loop()
+        websocket_manager.register_channel(INVALIDATION_CHANNEL, self._on_invalidation)
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop listening, then let pending invalidations finish publishing (cancelled after timeout)"""
+        websocket_manager.unregister_channel(INVALIDATION_CHANNEL)
+        self._loop = None
+        tasks = set(self._tasks)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    # Reads
+
+    def health(self, db: Session, machine_id: int) -> Optional[schemas.MachineHealthStats]:
+        """Health statistics for a machine, or None if it does not exist"""
+        entry = self._entry(db, machine_id)
+        if entry is None:
+            return None
+        with self._lock:
+            return entry.health()
+
+    async def latest_reading_async(self, db: AsyncSession, machine_id: int) -> Optional[Dict[str, Any]]:
+        """The machine's most recent sensor reading"""
+        entry = await self._entry_async(db, machine_id)
+        if entry is None:
+            return None
+        if entry.reading_stale:
+            reading = await db.run_sync(self._load_last_reading, machine_id)
+            with self._lock:
+                if (
+                    entry.reading_stale
+                    and reading is not None
+                    and _sort_time(reading["timestamp"]) == _sort_time(entry.last_timestamp)
+                ):
+                    entry.last_reading = reading
+                    entry.reading_stale = False
+            return reading
+        return entry.last_reading
+
+    async def latest_prediction_async(self, db: AsyncSession, machine_id: int) -> Optional[Dict[str, Any]]:
+        """The machine's most recent prediction"""
+        entry = await self._entry_async(db, machine_id)
+        return entry.latest_prediction if entry is not None else None
+
+    # Writes
+
+    def record_readings(self, machine_id: int, readings: Iterable[Mapping[str, Any]]) -> None:
+        """
+        Apply committed wide readings (timestamp plus sensor columns, id if known).
+
+        Readings older than the newest one already applied would break the
+        window order, so they drop the entry instead.
+        """
+        readings = sorted(readings, key=lambda reading: _sort_time(reading.get("timestamp")))
+        if not readings:
+            return
+        with self._lock:
+            self._bump(machine_id)
+            entry = self._entries.get(machine_id)
+            if entry is not None:
+                first = _sort_time(readings[0].get("timestamp"))
+                if entry.last_timestamp is not None and first < _sort_time(entry.last_timestamp):
+                    del self._entries[machine_id]
+                else:
+                    for reading in readings[-self.window_size:]:
+                        entry.push_reading(reading)
+        self._announce(machine_id)
+
+    def record_sensor_data(self, reading: models.SensorData) -> None:
+        """Apply a committed SensorData row"""
+        self.record_readings(reading.machine_id, [_columns(reading)])
+
+    def record_frame(self, frame) -> None:
+        """Apply a committed ingest chunk (machine_id, timestamp and sensor columns)"""
+        if frame.empty:
+            return
+        frame = frame.astype(object).where(frame.notna(), None)
+        for machine_id, group in frame.groupby("machine_id", sort=False):
+            # Only the newest window_size readings can still be in the window
+            tail = group.sort_values("timestamp", kind="stable").tail(self.window_size)
+            self.record_readings(int(machine_id), tail.to_dict("records"))
+
+    def record_prediction(self, prediction: Union[models.Prediction, Mapping[str, Any]]) -> None:
+        """Apply a committed prediction, given as an ORM object or a row mapping"""
+        values = dict(prediction) if isinstance(prediction, Mapping) else _columns(prediction)
+        machine_id = values["machine_id"]
+        with self._lock:
+            self._bump(machine_id)
+            entry = self._entries.get(machine_id)
+            current = entry.latest_prediction if entry is not None else None
+            if entry is not None and (
+                current is None
+                or _sort_time(values["prediction_time"]) >= _sort_time(current["prediction_time"])
+            ):
+                entry.latest_prediction = values
+        self._announce(machine_id)
+
+    def record_alert(self, alert: models.Alert, previous: Optional[Tuple[Any, Any]] = None) -> None:
+        """
+        Apply a committed alert write.
+
+        previous is the alert's (severity, status) before the change, or None
+        for a new alert.
+        """
+        with self._lock:
+            self._bump(alert.machine_id)
+            entry = self._entries.get(alert.machine_id)
+            if entry is not None:
+                if previous is not None:
+                    entry.count_alert(*previous, -1)
+                entry.count_alert(alert.severity, alert.status, 1)
+        self._announce(alert.machine_id)
+
+    def record_machine(self, machine: models.Machine) -> None:
+        """Apply a committed machine update"""
+        with self._lock:
+            self._bump(machine.id)
+            entry = self._entries.get(machine.id)
+            if entry is not None:
+                entry.status = machine.status
+                entry.current_rul_hours = machine.current_rul_hours
+        self._announce(machine.id)
+
+    def invalidate(self, machine_id: int, announce: bool = True) -> None:
+        """Drop a machine's entry; it is reloaded from the database on the next read"""
+        with self._lock:
+            self._bump(machine_id)
+            self._entries.pop(machine_id, None)
+        if announce:
+            self._announce(machine_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # Internals
+
+    def _bump(self, machine_id: int) -> None:
+        self._generations[machine_id] = self._generations.get(machine_id, 0) + 1
+
+    def _cached(self, machine_id: int) -> Tuple[Optional[LiveMachineState], int]:
+        with self._lock:
+            entry = self._entries.get(machine_id)
+            if entry is not None and entry.loaded_at + self.ttl < time.monotonic():
+                del self._entries[machine_id]
+                entry = None
+            return entry, self._generations.get(machine_id, 0)
+
+    def _store(self, entry: Optional[LiveMachineState], generation: int) -> None:
+        if entry is None:
+            return
+        with self._lock:
+            if self._generations.get(entry.machine_id, 0) == generation:
+                self._entries[entry.machine_id] = entry
+
+    def _entry(self, db: Session, machine_id: int) -> Optional[LiveMachineState]:
+        entry, generation = self._cached(machine_id)
+        if entry is None:
+            entry = self._load(db, machine_id)
+            self._store(entry, generation)
+        return entry
+
+    async def _entry_async(self, db: AsyncSession, machine_id: int) -> Optional[LiveMachineState]:
+        entry, generation = self._cached(machine_id)
+        if entry is None:
+            entry = await db.run_sync(self._load, machine_id)
+            self._store(entry, generation)
+        return entry
+
+    def _load(self, db: Session, machine_id: int) -> Optional[LiveMachineState]:
+        """Build a machine's state from the database in four queries"""
+        machines = models.Machine.__table__
+        machine = db.execute(
+            select(machines.c.status, machines.c.current_rul_hours).where(machines.c.id == machine_id)
+        ).first()
+        if machine is None:
+            return None
+        entry = LiveMachineState(machine_id, machine.status, machine.current_rul_hours, self.window_size)
+
+        readings = models.SensorData.__table__
+        rows = db.execute(
+            select(readings)
+            .where(readings.c.machine_id == machine_id)
+            .order_by(readings.c.timestamp.desc())
+            .limit(self.window_size)
+        ).mappings().all()
+        for row in reversed(rows):
+            entry.push_reading(row)
+
+        predictions = models.Prediction.__table__
+        prediction = db.execute(
+            select(predictions)
+            .where(predictions.c.machine_id == machine_id)
+            .order_by(predictions.c.prediction_time.desc(), predictions.c.id.desc())
+            .limit(1)
+        ).mappings().first()
+        entry.latest_prediction = dict(prediction) if prediction is not None else None
+
+        alerts = models.Alert.__table__
+        counts = db.execute(
+            select(alerts.c.severity, alerts.c.status, func.count())
+            .where(alerts.c.machine_id == machine_id)
+            .group_by(alerts.c.severity, alerts.c.status)
+        ).all()
+        for severity, status, count in counts:
+            entry.count_alert(severity, status, count)
+        return entry
+
+    def _load_last_reading(self, db: Session, machine_id: int) -> Optional[Dict[str, Any]]:
+        readings = models.SensorData.__table__
+        row = db.execute(
+            select(readings)
+            .where(readings.c.machine_id == machine_id)
+            .order_by(readings.c.timestamp.desc())
+            .limit(1)
+        ).mappings().first()
+        return dict(row) if row is not None else None
+
+    def _announce(self, machine_id: int) -> None:
+        """Tell other workers to drop the machine; a no-op with the in-process broker"""
+        if settings.WS_BROKER == "memory" or self._loop is None:
+            return
+        payload = json.dumps({"worker": self.worker_id, "machine_id": machine_id})
+        publish = websocket_manager.publish(f"{INVALIDATION_CHANNEL}:{machine_id}", payload)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        # Sync write paths run in the threadpool, away from the event loop
+        if running is self._loop:
+            task = running.create_task(publish)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            asyncio.run_coroutine_threadsafe(publish, self._loop)
+
+    async def _on_invalidation(self, key: str, payload: Any) -> None:
+        try:
+            message = json.loads(payload)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed live state invalidation for {key}")
+            return
+        if message.get("worker") != self.worker_id:
+            self.invalidate(int(message["machine_id"]), announce=False)
+
+
+# Create a singleton instance
+live_state = LiveStateStore(
+    ttl=settings.LIVE_STATE_TTL_SECONDS,
+    window_size=settings.LIVE_STATE_WINDOW_SIZE
+)
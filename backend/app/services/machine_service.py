@@ -1,13 +1,23 @@
 from typing import List, Optional, Tuple, Dict, Any
 from datetime import datetime, timedelta
+from sqlalchemy import case, func, select, true
 from sqlalchemy.orm import Session
 import logging
 
 from .. import models, schemas
+from ..core.response_cache import response_cache
+from ..models.alert import AlertSeverity, AlertStatus
+from ..db.pagination import Page
 from .base_service import BaseService
+from .live_state import live_state
 
 logger = logging.getLogger(__name__)
 
+SENSOR_FIELDS = ["temperature", "vibration", "pressure", "rpm", "current", "voltage"]
+
+# Readings per machine that health sensor statistics are computed over
+HEALTH_SENSOR_WINDOW = 1000
+
 class MachineService:
     """Service class for machine-related operations"""
     
@@ -29,11 +39,13 @@ class MachineService:
         db: Session, 
         skip: int = 0, 
         limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
         **filters
-    ) -> Tuple[List[models.Machine], int]:
+    ) -> Page:
         """Get paginated list of machines with optional filtering"""
         return self.machine_service.get_multi_paginated(
-            db, skip=skip, limit=limit, **filters
+            db, skip=skip, limit=limit, cursor=cursor, include_total=include_total, **filters
         )
     
     def create_machine(
@@ -46,6 +58,7 @@ class MachineService:
         db.add(db_machine)
         db.commit()
         db.refresh(db_machine)
+        response_cache.invalidate("machines")
         return db_machine
     
     def update_machine(
@@ -66,6 +79,8 @@ class MachineService:
         db_machine.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(db_machine)
+        live_state.record_machine(db_machine)
+        response_cache.invalidate("machines")
         return db_machine
     
     def delete_machine(self, db: Session, machine_id: int) -> bool:
@@ -76,6 +91,8 @@ class MachineService:
             
         db.delete(db_machine)
         db.commit()
+        live_state.invalidate(machine_id)
+        response_cache.invalidate("machines")
         return True
     
     # Maintenance Task operations
@@ -131,78 +148,177 @@ class MachineService:
         machine_id: int
     ) -> Optional[schemas.MachineHealthStats]:
         """Get health statistics for a machine"""
-        machine = self.get_machine(db, machine_id)
-        if not machine:
-            return None
+        return self.get_fleet_health(db, [machine_id]).get(machine_id)
+    
+    def get_machines_health_status(
+        self,
+        db: Session,
+        machine_ids: List[int] = None
+    ) -> Dict[int, schemas.MachineHealthStats]:
+        """Get health status for multiple machines"""
+        return self.get_fleet_health(db, machine_ids)
+    
+    def get_fleet_health(
+        self,
+        db: Session,
+        machine_ids: Optional[List[int]] = None,
+        sensor_window: int = HEALTH_SENSOR_WINDOW
+    ) -> Dict[int, schemas.MachineHealthStats]:
+        """
+        Get health statistics for many machines (all by default) at once.
+        
+        Runs four grouped queries regardless of fleet size: machines, latest
+        prediction per machine, alert counts per machine and severity, and
+        sensor min/max/avg/latest over each machine's last sensor_window readings.
+        """
+        machines = models.Machine.__table__
+        stmt = select(machines.c.id, machines.c.status).order_by(machines.c.id)
+        if machine_ids:
+            stmt = stmt.where(machines.c.id.in_(machine_ids))
+        statuses = dict(db.execute(stmt).all())
+        if not statuses:
+            return {}
+        
+        ids = list(statuses)
+        predictions = self._latest_predictions(db, ids)
+        alert_counts, open_alert_counts = self._alert_counts(db, ids)
+        sensor_stats = self._sensor_stats(db, ids, sensor_window)
         
         # Calculate uptime percentage (simplified example)
         # In a real application, this would query actual uptime data
         uptime_percentage = 95.0  # Placeholder
         
-        # Get the latest prediction if available
-        latest_prediction = (
-            db.query(models.Prediction)
-            .filter(models.Prediction.machine_id == machine_id)
-            .order_by(models.Prediction.prediction_time.desc())
-            .first()
-        )
-        
-        # Get alert counts
-        alert_counts = {
-            severity: db.query(models.Alert).filter(
-                models.Alert.machine_id == machine_id,
-                models.Alert.severity == severity
-            ).count()
-            for severity in ["critical", "warning", "info"]
+        return {
+            machine_id: schemas.MachineHealthStats(
+                machine_id=machine_id,
+                status=status,
+                uptime_percentage=uptime_percentage,
+                avg_rul=predictions[machine_id].rul_hours if machine_id in predictions else None,
+                last_prediction_time=predictions[machine_id].prediction_time if machine_id in predictions else None,
+                alert_count=alert_counts.get(machine_id, self._empty_alert_counts()),
+                open_alert_count=open_alert_counts.get(machine_id, self._empty_alert_counts()),
+                sensor_stats=sensor_stats.get(machine_id, {})
+            )
+            for machine_id, status in statuses.items()
         }
-        
-        # Get sensor statistics (simplified example)
-        sensor_stats = {}
-        sensor_readings = (
-            db.query(models.SensorData)
-            .filter(models.SensorData.machine_id == machine_id)
-            .order_by(models.SensorData.timestamp.desc())
-            .limit(1000)  # Last 1000 readings
-            .all()
+    
+    def _latest_predictions(self, db: Session, machine_ids: List[int]) -> Dict[int, Any]:
+        """Newest prediction per machine, ranked with a window function"""
+        predictions = models.Prediction.__table__
+        ranked = (
+            select(
+                predictions.c.machine_id,
+                predictions.c.rul_hours,
+                predictions.c.prediction_time,
+                func.row_number().over(
+                    partition_by=predictions.c.machine_id,
+                    order_by=(predictions.c.prediction_time.desc(), predictions.c.id.desc())
+                ).label("rank")
+            )
+            .where(predictions.c.machine_id.in_(machine_ids))
+            .subquery()
         )
-        
-        if sensor_readings:
-            sensor_fields = ["temperature", "vibration", "pressure", "rpm", "current", "voltage"]
-            for field in sensor_fields:
-                values = [getattr(r, field) for r in sensor_readings if getattr(r, field) is not None]
-                if values:
-                    sensor_stats[field] = {
-                        "min": min(values),
-                        "max": max(values),
-                        "avg": sum(values) / len(values),
-                        "latest": values[0] if values else None
-                    }
-        
-        return schemas.MachineHealthStats(
-            machine_id=machine_id,
-            status=machine.status,
-            uptime_percentage=uptime_percentage,
-            avg_rul=latest_prediction.rul_hours if latest_prediction else None,
-            last_prediction_time=latest_prediction.prediction_time if latest_prediction else None,
-            alert_count=alert_counts,
-            sensor_stats=sensor_stats
+        rows = db.execute(select(ranked).where(ranked.c.rank == 1)).all()
+        return {row.machine_id: row for row in rows}
+    
+    def _alert_counts(
+        self,
+        db: Session,
+        machine_ids: List[int]
+    ) -> Tuple[Dict[int, Dict[str, int]], Dict[int, Dict[str, int]]]:
+        """All and open alert counts per machine and severity"""
+        alerts = models.Alert.__table__
+        stmt = (
+            select(alerts.c.machine_id, alerts.c.severity, alerts.c.status, func.count())
+            .where(alerts.c.machine_id.in_(machine_ids))
+            .group_by(alerts.c.machine_id, alerts.c.severity, alerts.c.status)
         )
+        counts: Dict[int, Dict[str, int]] = {}
+        open_counts: Dict[int, Dict[str, int]] = {}
+        for machine_id, severity, alert_status, count in db.execute(stmt):
+            severity = getattr(severity, "value", severity)
+            machine_counts = counts.setdefault(machine_id, self._empty_alert_counts())
+            machine_counts[severity] = machine_counts.get(severity, 0) + count
+            if getattr(alert_status, "value", alert_status) == AlertStatus.OPEN.value:
+                machine_open = open_counts.setdefault(machine_id, self._empty_alert_counts())
+                machine_open[severity] = machine_open.get(severity, 0) + count
+        return counts, open_counts
     
-    def get_machines_health_status(
+    def _empty_alert_counts(self) -> Dict[str, int]:
+        return {severity.value: 0 for severity in AlertSeverity}
+    
+    def _sensor_stats(
         self,
         db: Session,
-        machine_ids: List[int] = None
-    ) -> Dict[int, schemas.MachineHealthStats]:
-        """Get health status for multiple machines"""
-        query = db.query(models.Machine)
-        if machine_ids:
-            query = query.filter(models.Machine.id.in_(machine_ids))
+        machine_ids: List[int],
+        window: int
+    ) -> Dict[int, Dict[str, Dict[str, float]]]:
+        """Sensor min/max/avg/latest over each machine's last window readings"""
+        readings = models.SensorData.__table__
+        columns = [readings.c.machine_id, readings.c.timestamp, *(readings.c[field] for field in SENSOR_FIELDS)]
         
-        machines = query.all()
-        return {
-            machine.id: self.get_machine_health(db, machine.id)
-            for machine in machines
-        }
+        if db.get_bind().dialect.name == "postgresql":
+            # One index range scan per machine instead of ranking the whole table
+            machines = select(models.Machine.__table__.c.id).where(
+                models.Machine.__table__.c.id.in_(machine_ids)
+            ).subquery()
+            latest = (
+                select(*columns)
+                .where(readings.c.machine_id == machines.c.id)
+                .order_by(readings.c.timestamp.desc())
+                .limit(window)
+                .lateral()
+            )
+            recent = select(latest).select_from(machines.join(latest, true())).subquery()
+        else:
+            ranked = select(
+                *columns,
+                func.row_number().over(
+                    partition_by=readings.c.machine_id,
+                    order_by=readings.c.timestamp.desc()
+                ).label("rank")
+            ).where(readings.c.machine_id.in_(machine_ids)).subquery()
+            recent = select(*(ranked.c[column.name] for column in columns)).where(
+                ranked.c.rank <= window
+            ).subquery()
+        
+        # Rank each field's non-NULL readings newest first to find its latest value
+        ranked_fields = select(
+            recent.c.machine_id,
+            *(recent.c[field] for field in SENSOR_FIELDS),
+            *(
+                func.row_number().over(
+                    partition_by=(recent.c.machine_id, recent.c[field].is_(None)),
+                    order_by=recent.c.timestamp.desc()
+                ).label(f"{field}_rank")
+                for field in SENSOR_FIELDS
+            )
+        ).subquery()
+        
+        aggregates = []
+        for field in SENSOR_FIELDS:
+            column = ranked_fields.c[field]
+            aggregates += [
+                func.min(column).label(f"{field}_min"),
+                func.max(column).label(f"{field}_max"),
+                func.avg(column).label(f"{field}_avg"),
+                func.max(case((ranked_fields.c[f"{field}_rank"] == 1, column))).label(f"{field}_latest"),
+            ]
+        stmt = select(ranked_fields.c.machine_id, *aggregates).group_by(ranked_fields.c.machine_id)
+        
+        stats: Dict[int, Dict[str, Dict[str, float]]] = {}
+        for row in db.execute(stmt).mappings():
+            stats[row["machine_id"]] = {
+                field: {
+                    "min": row[f"{field}_min"],
+                    "max": row[f"{field}_max"],
+                    "avg": float(row[f"{field}_avg"]),
+                    "latest": row[f"{field}_latest"]
+                }
+                for field in SENSOR_FIELDS
+                if row[f"{field}_min"] is not None
+            }
+        return stats
 
 # Create a single instance of MachineService
 machine_service = MachineService()
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..models.model import ModelStatus, ModelType
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+class LoadedModel:
+    """A model artifact kept warm in the registry cache"""
+
+    def __init__(
+        self,
+        model_id: int,
+        version: str,
+        model_type: ModelType,
+        file_path: str,
+        artifact: Any,
+        size_bytes: int
+    ):
+        self.model_id = model_id
+        self.version = version
+        self.model_type = model_type
+        self.file_path = file_path
+        self.artifact = artifact
+        self.size_bytes = size_bytes
+        self.loaded_at = time.time()
+
+    def __repr__(self):
+        return f"<LoadedModel {self.model_type.value} v{self.version}>"
+
+
+class ModelRegistry:
+    """
+    Registry of trained models backed by the models table.
+
+    Artifacts are loaded on first use and kept in an LRU bounded by a memory
+    budget (approximated by artifact file size). Concurrent requests for a cold
+    model await a single shared load. The "latest" version per model type is
+    the most recently trained active model and is re-resolved after a short TTL,
+    so activations made by other workers are picked up without a restart.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        latest_ttl: Optional[float] = None
+    ):
+        self.max_bytes = max_bytes or settings.MODEL_CACHE_MAX_MB * 1024 * 1024
+        self.latest_ttl = latest_ttl if latest_ttl is not None else settings.MODEL_LATEST_TTL_SECONDS
+        self._cache: "OrderedDict[CacheKey, LoadedModel]" = OrderedDict()
+        self._cache_bytes = 0
+        self._loading: Dict[CacheKey, asyncio.Future] = {}
+        self._latest: Dict[str, Tuple[str, float]] = {}
+
+    async def get(
+        self,
+        db: Session,
+        version: str,
+        model_type: ModelType
+    ) -> Optional[LoadedModel]:
+        """
+        Get a loaded model by version, loading it if necessary.
+
+        Returns None when version is "latest" and no active model is registered.
+
+        Raises:
+            LookupError: If an explicit version does not exist
+        """
+        if version == "latest":
+            version = self.resolve_latest(db, model_type)
+            if version is None:
+                return None
+
+        key = (model_type.value, version)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+            return entry
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            entry = await self._load(db, version, model_type)
+            self._store(key, entry)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so waiter-less failures aren't reported twice
+            future.exception()
+            raise
+        finally:
+            del self._loading[key]
+
+    def resolve_latest(self, db: Session, model_type: ModelType) -> Optional[str]:
+        """Resolve the most recently trained active version for a model type"""
+        cached = self._latest.get(model_type.value)
+        if cached is not None and time.monotonic() - cached[1] < self.latest_ttl:
+            return cached[0]
+
+        record = (
+            db.query(models.Model)
+            .filter(
+                models.Model.model_type == model_type,
+                models.Model.is_active.is_(True)
+            )
+            .order_by(models.Model.trained_at.desc())
+            .first()
+        )
+        if record is None:
+            self._latest.pop(model_type.value, None)
+            return None
+
+        self._latest[model_type.value] = (record.version, time.monotonic())
+        return record.version
+
+    async def activate(self, db: Session, model_id: int) -> models.Model:
+        """
+        Make a model the active version for its type.
+
+        The new artifact is loaded before the switch, so requests keep being
+        served by the previous version until the new one is warm.
+
+        Raises:
+            LookupError: If the model does not exist
+        """
+        record = db.query(models.Model).filter(models.Model.id == model_id).first()
+        if record is None:
+            raise LookupError(f"Model {model_id} not found")
+
+        await self.get(db, record.version, record.model_type)
+
+        previous = (
+            db.query(models.Model)
+            .filter(
+                models.Model.model_type == record.model_type,
+                models.Model.is_active.is_(True),
+                models.Model.id != record.id
+            )
+            .all()
+        )
+        for old in previous:
+            old.is_active = False
+            old.status = ModelStatus.ARCHIVED
+        if previous and record.previous_version_id is None:
+            record.previous_version_id = previous[0].id
+
+        record.is_active = True
+        record.status = ModelStatus.ACTIVE
+        db.commit()
+        db.refresh(record)
+
+        self._latest[record.model_type.value] = (record.version, time.monotonic())
+        logger.info(f"Activated model {record.name} v{record.version} ({record.model_type.value})")
+        return record
+
+    def available_versions(
+        self,
+        db: Session,
+        model_type: Optional[ModelType] = None
+    ) -> List[str]:
+        """List registered versions, most recently trained first"""
+        query = db.query(models.Model.version)
+        if model_type is not None:
+            query = query.filter(models.Model.model_type == model_type)
+        return [row.version for row in query.order_by(models.Model.trained_at.desc()).all()]
+
+    def invalidate(self, model_type: Optional[ModelType] = None, version: Optional[str] = None) -> None:
+        """Drop cached artifacts and latest-version resolutions"""
+        for key in list(self._cache):
+            if (model_type is None or key[0] == model_type.value) and (version is None or key[1] == version):
+                self._evict(key)
+        if model_type is None:
+            self._latest.clear()
+        else:
+            self._latest.pop(model_type.value, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache occupancy for monitoring"""
+        return {
+            "loaded": [f"{model_type}:{version}" for model_type, version in self._cache],
+            "cache_bytes": self._cache_bytes,
+            "max_bytes": self.max_bytes,
+            "loading": len(self._loading),
+        }
+
+    async def _load(self, db: Session, version: str, model_type: ModelType) -> LoadedModel:
+        record = (
+            db.query(models.Model)
+            .filter(models.Model.model_type == model_type, models.Model.version == version)
+            .order_by(models.Model.trained_at.desc())
+            .first()
+        )
+        if record is None:
+            raise LookupError(f"Model version {version} not found for {model_type.value}")
+
+        start_time = time.perf_counter()
+        artifact = await run_in_threadpool(self._load_artifact, record.file_path)
+        logger.info(
+            f"Loaded model {record.name} v{version} from {record.file_path} "
+            f"in {time.perf_counter() - start_time:.2f}s"
+        )
+        return LoadedModel(
+            model_id=record.id,
+            version=version,
+            model_type=model_type,
+            file_path=record.file_path,
+            artifact=artifact,
+            size_bytes=os.path.getsize(record.file_path)
+        )
+
+    def _load_artifact(self, file_path: str) -> Any:
+        """Deserialize a model artifact based on its file extension"""
+        suffix = Path(file_path).suffix.lower()
+        if suffix in (".h5", ".keras"):
+            from tensorflow.keras.models import load_model
+            return load_model(file_path)
+        if suffix in (".joblib", ".pkl", ".pickle"):
+            import joblib
+            return joblib.load(file_path)
+        raise ValueError(f"Unsupported model artifact format: {suffix}")
+
+    def _store(self, key: CacheKey, entry: LoadedModel) -> None:
+        self._cache[key] = entry
+        self._cache_bytes += entry.size_bytes
+
+        # Always keep the entry just loaded, even if it alone exceeds the budget
+        while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+            self._evict(next(iter(self._cache)))
+
+    def _evict(self, key: CacheKey) -> None:
+        entry = self._cache.pop(key)
+        self._cache_bytes -= entry.size_bytes
+        logger.info(f"Evicted model {key[0]} v{key[1]} from cache")
+
+# Create a singleton instance
+model_registry = ModelRegistry()
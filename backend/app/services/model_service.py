@@ -13,9 +13,10 @@ from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 
 from app.db.session import SessionLocal
 from app.models.model import Model as ModelDB
-from app.models.sensor_data import SensorData
 from app.models.image_data import ImageData
+from app.services.archive_service import sensor_archive
 from app.core.config import settings
+from app.core.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +29,9 @@ class ModelService:
         """Prepare sensor data for training"""
         db = SessionLocal()
         try:
-            query = db.query(SensorData)
-            if machine_id:
-                query = query.filter(SensorData.machine_id == machine_id)
-            
-            df = pd.read_sql(query.statement, db.bind)
+            # History comes from the Parquet archive; only the unexported tail
+            # is read through the database driver
+            df = sensor_archive.read_frame(db, machine_id=machine_id or None)
             
             if df.empty:
                 raise ValueError("No sensor data available for training")
@@ -138,6 +137,7 @@ class ModelService:
                 db.add(model_record)
                 db.commit()
                 db.refresh(model_record)
+                response_cache.invalidate("models")
                 
                 return {
                     "model_id": model_record.id,
@@ -208,6 +208,7 @@ class ModelService:
             # Delete database record
             db.delete(model)
             db.commit()
+            response_cache.invalidate("models")
             return True
             
         except Exception as e:
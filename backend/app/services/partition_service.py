@@ -0,0 +1,509 @@
+import asyncio
+import logging
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Column, Index, MetaData, Table, delete, func, insert, select, text, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, FromClause
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from .archive_service import sensor_archive
+
+logger = logging.getLogger(__name__)
+
+# Monthly partitions are named sensor_data_pYYYYMM on PostgreSQL and stored as
+# sensor_data_YYYYMM.db files on SQLite
+PARTITION_NAME = re.compile(r"^sensor_data_p(\d{4})(\d{2})$")
+PARTITION_FILE = re.compile(r"^sensor_data_(\d{4})(\d{2})\.db$")
+
+# PostgreSQL partition taking rows outside every monthly range, such as backfills
+DEFAULT_PARTITION = "sensor_data_default"
+
+
+def month_floor(value: datetime) -> datetime:
+    """First instant of the month containing value (naive)"""
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+class SensorBatch(NamedTuple):
+    """Partition files read together, and the time window their query covers"""
+    months: List[datetime]
+    # Rows at or after lower and before upper; None leaves that side open
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+
+    def bounds(self, column: ColumnElement) -> List[ColumnElement]:
+        """Filters keeping column inside the window"""
+        clauses = []
+        if self.lower is not None:
+            clauses.append(column >= self.lower)
+        if self.upper is not None:
+            clauses.append(column < self.upper)
+        return clauses
+
+
+class SensorPartitionService:
+    """
+    Monthly partitioning of sensor_data with retention to Parquet archives.
+
+    PostgreSQL: sensor_data is RANGE partitioned on timestamp (converted once
+    by partition_table()); the planner prunes partitions from the time
+    filters and maintain() keeps future months created. Rows outside every
+    month, such as backfilled history, land in a DEFAULT partition until
+    maintain() moves them into partitions of their own.
+
+    SQLite: the main table keeps the last hot_months. maintain() moves older
+    months into one database file per month. Reads split their time range
+    with sensor_batches() and attach, through sensor_reader(), only the files
+    a batch needs (at most max_attached at a time).
+
+    On both, months older than retention_months are written to the Parquet
+    archive (see archive_service) and dropped from the hot store. A months
+    value of 0 disables that step. With export_archive, maintain() also
+    copies each completed day to the archive before anything is moved.
+    """
+
+    def __init__(
+        self,
+        partition_dir: str,
+        hot_months: int = 0,
+        retention_months: int = 0,
+        months_ahead: int = 2,
+        export_archive: bool = False,
+        max_attached: int = 8,
+        interval: float = 6 * 3600.0
+    ):
+        self.partition_dir = Path(partition_dir)
+        self.export_archive = export_archive
+        self.hot_months = hot_months
+        self.retention_months = retention_months
+        self.months_ahead = months_ahead
+        # SQLite allows 10 attached databases per connection
+        self.max_attached = min(max(max_attached, 1), 10)
+        self.interval = interval
+        self.table: Table = models.SensorData.__table__
+        self._task: Optional[asyncio.Task] = None
+
+    # Reads
+
+    def sensor_batches(
+        self,
+        db: Session,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[SensorBatch]:
+        """
+        Split a time range into batches that can each be read in one query,
+        newest first.
+
+        On SQLite each batch names at most max_attached partition files whose
+        month overlaps the range, and a window covering those months; the
+        windows are disjoint and together cover all time, so rows left in the
+        main table for any month fall in exactly one batch. Everywhere else,
+        or without partition files in range, this is one unbounded batch.
+        """
+        if db.get_bind().dialect.name != "sqlite":
+            return [SensorBatch([], None, None)]
+
+        first = month_floor(start_time) if start_time is not None else None
+        months = [
+            month for month in self.partition_files()
+            if (first is None or month >= first) and (end_time is None or month <= end_time.replace(tzinfo=None))
+        ]
+        if not months:
+            return [SensorBatch([], None, None)]
+
+        batches = []
+        upper = None
+        for end in range(len(months), 0, -self.max_attached):
+            group = months[max(end - self.max_attached, 0):end]
+            lower = group[0] if end > self.max_attached else None
+            batches.append(SensorBatch(group, lower, upper))
+            upper = lower
+        return batches
+
+    @contextmanager
+    def sensor_reader(self, db: Session, batch: SensorBatch) -> Iterator[Tuple[Session, FromClause]]:
+        """
+        Session to query one batch on, and the table (or UNION ALL of tables)
+        holding it. Callers filter the rows to the batch window (see
+        SensorBatch.bounds).
+
+        A batch's partition files are attached to a dedicated connection for
+        the duration of the block, as ATTACH fails inside the caller's
+        transaction, and detached again before it goes back to the pool.
+        Without partition files this is (db, sensor_data).
+        """
+        if not batch.months:
+            yield db, self.table
+            return
+
+        connection = db.get_bind().connect()
+        try:
+            tables = [self._attach(connection, month) for month in batch.months]
+            source = union_all(
+                select(self.table),
+                *(select(*table.columns) for table in tables)
+            ).subquery("sensor_data")
+            with Session(bind=connection) as reader:
+                yield reader, source
+        finally:
+            try:
+                connection.rollback()
+                for month in batch.months:
+                    self._detach(connection, month)
+            except Exception:
+                # Never pool a connection that may still hold partition files
+                connection.invalidate()
+            connection.close()
+
+    def partition_files(self) -> List[datetime]:
+        """Months held in SQLite partition files, oldest first"""
+        if not self.partition_dir.is_dir():
+            return []
+        months = []
+        for name in os.listdir(self.partition_dir):
+            match = PARTITION_FILE.match(name)
+            if match:
+                months.append(datetime(int(match.group(1)), int(match.group(2)), 1))
+        return sorted(months)
+
+    # Maintenance
+
+    def maintain(self, db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Export completed days, create upcoming partitions, move cold months
+        out of the hot table and archive expired ones. Safe to rerun after an
+        interruption.
+        """
+        current = month_floor(now or datetime.utcnow())
+        retention_cutoff = add_months(current, -self.retention_months) if self.retention_months > 0 else None
+        stats: Dict[str, Any] = {"exported": 0, "created": [], "moved": [], "archived": []}
+
+        if self.export_archive:
+            stats["exported"] = sensor_archive.export_pending(db, now)
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql" and self._is_partitioned(db):
+            db.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF sensor_data DEFAULT"))
+            created = []
+            for month in self._default_months(db):
+                created += self._create_partitions(db, month, add_months(month, 1))
+            created += self._create_partitions(db, current, add_months(current, self.months_ahead + 1))
+            db.commit()
+            stats["created"] = created
+            if retention_cutoff is not None:
+                stats["archived"] = self._archive_pg_partitions(db, retention_cutoff)
+        elif dialect == "sqlite" and self.hot_months > 0:
+            stats["moved"] = self._move_cold_months(db, add_months(current, -self.hot_months))
+            if retention_cutoff is not None:
+                stats["archived"] = self._archive_partition_files(db, retention_cutoff)
+        elif retention_cutoff is not None:
+            stats["archived"] = self._archive_rows(db, retention_cutoff)
+
+        if any(stats.values()):
+            logger.info(f"Sensor partition maintenance: {stats}")
+        return stats
+
+    def partition_table(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Convert a plain PostgreSQL sensor_data table into a monthly RANGE
+        partitioned one, copying all rows. Returns the number of partitions.
+
+        Runs in one transaction under an exclusive lock, so schedule it in a
+        maintenance window. The primary key becomes (id, timestamp) and
+        foreign keys referencing sensor_data.id are dropped, as PostgreSQL
+        cannot reference a partitioned table by id alone.
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            raise ValueError("Native partitioning requires PostgreSQL")
+        if self._is_partitioned(db):
+            return 0
+
+        bounds = db.execute(text("SELECT min(timestamp), max(timestamp) FROM sensor_data")).one()
+        current = month_floor(now or datetime.utcnow())
+        first = month_floor(bounds[0]) if bounds[0] is not None else current
+        last = max(add_months(month_floor(bounds[1]), 1) if bounds[1] is not None else current, current)
+        sequence = db.scalar(text("SELECT pg_get_serial_sequence('sensor_data', 'id')"))
+
+        try:
+            db.execute(text(
+                "CREATE TABLE sensor_data_partitioned (LIKE sensor_data INCLUDING DEFAULTS) "
+                "PARTITION BY RANGE (timestamp)"
+            ))
+            db.execute(text("ALTER TABLE sensor_data_partitioned ADD PRIMARY KEY (id, timestamp)"))
+            created = self._create_partitions(
+                db, first, add_months(last, self.months_ahead + 1), parent="sensor_data_partitioned"
+            )
+            # Rows older or newer than every partition go here instead of failing the insert
+            db.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF sensor_data_partitioned DEFAULT"))
+            # The partition key is part of the primary key, so it can no longer be NULL
+            columns = [column.name for column in self.table.columns]
+            values = ["COALESCE(timestamp, now())" if name == "timestamp" else name for name in columns]
+            db.execute(text(
+                f"INSERT INTO sensor_data_partitioned ({', '.join(columns)}) "
+                f"SELECT {', '.join(values)} FROM sensor_data"
+            ))
+            if sequence:
+                db.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY sensor_data_partitioned.id"))
+
+            references = db.execute(text(
+                "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+                "WHERE contype = 'f' AND confrelid = 'sensor_data'::regclass"
+            )).all()
+            for table_name, constraint in references:
+                db.execute(text(f'ALTER TABLE {table_name} DROP CONSTRAINT "{constraint}"'))
+
+            db.execute(text("DROP TABLE sensor_data"))
+            db.execute(text("ALTER TABLE sensor_data_partitioned RENAME TO sensor_data"))
+            db.execute(text(
+                "CREATE INDEX idx_sensor_data_machine_timestamp ON sensor_data (machine_id, timestamp)"
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.error("Failed to partition sensor_data", exc_info=True)
+            raise
+
+        logger.info(f"Partitioned sensor_data into {len(created)} monthly partitions")
+        return len(created)
+
+    def start(self) -> None:
+        """Run maintain() periodically on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._maintenance_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._maintain_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Sensor partition maintenance error: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def _maintain_once(self) -> None:
+        db = SessionLocal()
+        try:
+            self.maintain(db)
+        finally:
+            db.close()
+
+    # PostgreSQL
+
+    def _is_partitioned(self, db: Session) -> bool:
+        relkind = db.scalar(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('sensor_data')"))
+        return relkind == "p"
+
+    def _create_partitions(
+        self,
+        db: Session,
+        first: datetime,
+        end: datetime,
+        parent: str = "sensor_data"
+    ) -> List[str]:
+        existing = {name for name, _ in self._pg_partitions(db, parent)}
+        has_default = self._has_default_partition(db, parent)
+        created = []
+        month = first
+        while month < end:
+            name = f"sensor_data_p{month:%Y%m}"
+            if name not in existing:
+                bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                if has_default:
+                    # The default partition may already hold rows for this month; they
+                    # move with it, as attaching fails while they are still there
+                    db.execute(text(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS)"))
+                    db.execute(text(
+                        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                        f"WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+                        f"INSERT INTO {name} SELECT * FROM moved"
+                    ), {"start": month, "end": add_months(month, 1)})
+                    db.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+                else:
+                    db.execute(text(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES {bounds}"))
+                created.append(name)
+            month = add_months(month, 1)
+        return created
+
+    def _has_default_partition(self, db: Session, parent: str = "sensor_data") -> bool:
+        default_id = db.scalar(
+            text("SELECT partdefid FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent)"),
+            {"parent": parent}
+        )
+        return bool(default_id)
+
+    def _default_months(self, db: Session) -> List[datetime]:
+        """Months with rows in the default partition, which need partitions of their own"""
+        return list(db.scalars(text(
+            f"SELECT DISTINCT date_trunc('month', timestamp::timestamp) AS month FROM {DEFAULT_PARTITION} "
+            "WHERE timestamp IS NOT NULL ORDER BY month"
+        )))
+
+    def _pg_partitions(self, db: Session, parent: str = "sensor_data") -> List[tuple]:
+        names = db.scalars(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:parent)"
+        ).bindparams(parent=parent)).all()
+        partitions = []
+        for name in names:
+            match = PARTITION_NAME.match(name)
+            if match:
+                partitions.append((name, datetime(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def _archive_pg_partitions(self, db: Session, cutoff: datetime) -> List[str]:
+        archived = []
+        for name, month in self._pg_partitions(db):
+            if month >= cutoff:
+                break
+            try:
+                self._export_month(db.connection(), self.table, month)
+                db.execute(text(f"ALTER TABLE sensor_data DETACH PARTITION {name}"))
+                db.execute(text(f"DROP TABLE {name}"))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            archived.append(f"{month:%Y-%m}")
+        return archived
+
+    # SQLite
+
+    def _attach(self, connection: Connection, month: datetime) -> Table:
+        """Attach a month's partition file (once per connection) and return its table"""
+        schema = f"sensor_p{month:%Y%m}"
+        attached = {row[1] for row in connection.exec_driver_sql("PRAGMA database_list")}
+        if schema not in attached:
+            self.partition_dir.mkdir(parents=True, exist_ok=True)
+            path = self.partition_dir / f"sensor_data_{month:%Y%m}.db"
+            connection.exec_driver_sql(f"ATTACH DATABASE ? AS {schema}", (str(path),))
+        # Same columns and index as sensor_data, without foreign keys into the main database
+        return Table(
+            "sensor_data",
+            MetaData(),
+            *(Column(column.name, column.type, primary_key=column.primary_key) for column in self.table.columns),
+            Index(f"idx_{schema}_machine_timestamp", "machine_id", "timestamp"),
+            schema=schema
+        )
+
+    def _detach(self, connection: Connection, month: datetime) -> None:
+        schema = f"sensor_p{month:%Y%m}"
+        attached = {row[1] for row in connection.exec_driver_sql("PRAGMA database_list")}
+        if schema in attached:
+            connection.exec_driver_sql(f"DETACH DATABASE {schema}")
+
+    def _move_cold_months(self, db: Session, hot_cutoff: datetime) -> List[str]:
+        oldest = db.scalar(select(func.min(self.table.c.timestamp)).where(self.table.c.timestamp < hot_cutoff))
+        if oldest is None:
+            return []
+
+        moved = []
+        while oldest is not None:
+            month = month_floor(oldest)
+            month_end = add_months(month, 1)
+            in_month = (self.table.c.timestamp >= month, self.table.c.timestamp < month_end)
+            try:
+                # ATTACH is not allowed inside a transaction, so attach before writing
+                # and detach once committed; a connection holds at most 10 files
+                connection = db.connection()
+                partition = self._attach(connection, month)
+                partition.create(connection, checkfirst=True)
+                connection.execute(
+                    insert(partition)
+                    .from_select([column.name for column in self.table.columns], select(self.table).where(*in_month))
+                    .prefix_with("OR REPLACE")
+                )
+                rows = connection.execute(delete(self.table).where(*in_month)).rowcount
+                db.commit()
+                self._detach(db.connection(), month)
+            except Exception:
+                db.rollback()
+                logger.error(f"Failed to move sensor data for {month:%Y-%m} to its partition file", exc_info=True)
+                raise
+            if rows:
+                moved.append(f"{month:%Y-%m}")
+            # Skip empty months rather than creating files for them
+            oldest = db.scalar(select(func.min(self.table.c.timestamp)).where(
+                self.table.c.timestamp >= month_end, self.table.c.timestamp < hot_cutoff
+            ))
+        return moved
+
+    def _archive_partition_files(self, db: Session, cutoff: datetime) -> List[str]:
+        archived = []
+        for month in self.partition_files():
+            if month >= cutoff:
+                break
+            connection = db.connection()
+            rows = self._export_month(connection, self._attach(connection, month), month)
+            db.commit()
+            self._detach(db.connection(), month)
+            (self.partition_dir / f"sensor_data_{month:%Y%m}.db").unlink()
+            if rows:
+                archived.append(f"{month:%Y-%m}")
+        return archived
+
+    # Any database
+
+    def _archive_rows(self, db: Session, cutoff: datetime) -> List[str]:
+        """Archive and delete expired rows month by month from an unpartitioned table"""
+        oldest = db.scalar(select(func.min(self.table.c.timestamp)).where(self.table.c.timestamp < cutoff))
+        if oldest is None:
+            return []
+
+        archived = []
+        month = month_floor(oldest)
+        while month < cutoff:
+            month_end = add_months(month, 1)
+            try:
+                connection = db.connection()
+                if self._export_month(connection, self.table, month):
+                    connection.execute(delete(self.table).where(
+                        self.table.c.timestamp >= month, self.table.c.timestamp < month_end
+                    ))
+                    archived.append(f"{month:%Y-%m}")
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            month = month_end
+        return archived
+
+    def _export_month(self, connection: Connection, table: Table, month: datetime) -> int:
+        """Write one month of readings to the Parquet archive; returns the row count"""
+        return sensor_archive.export(connection, month, add_months(month, 1), source=table)
+
+
+# Create a singleton instance
+partition_service = SensorPartitionService(
+    partition_dir=settings.SENSOR_PARTITION_DIR,
+    hot_months=settings.SENSOR_HOT_MONTHS,
+    retention_months=settings.SENSOR_RETENTION_MONTHS,
+    months_ahead=settings.SENSOR_PARTITIONS_AHEAD,
+    export_archive=settings.SENSOR_ARCHIVE_EXPORT_ENABLED,
+    max_attached=settings.SENSOR_PARTITION_MAX_ATTACHED,
+    interval=settings.SENSOR_PARTITION_MAINTENANCE_SECONDS
+)
@@ -1,31 +1,67 @@
+import asyncio
 import logging
 import os
+import time
 import uuid
-from datetime import datetime
-from typing import List, Optional, Dict, Any, Tuple, Union
+from typing import List, Optional, Dict, Any, Set, Tuple, Union
 from pathlib import Path
 
+import aiofiles
 import numpy as np
-import cv2
 import pandas as pd
 from fastapi import UploadFile, HTTPException, status
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import ValidationError
 
 from .. import models, schemas
 from ..config import settings
+from ..core.response_cache import response_cache
+from ..db.pagination import Page, keyset_select, row_counter, split_page
+from ..ws.streaming import sensor_stream
 from ..schemas.validation import (
     MachineStatus, 
     SensorDataCreate,
     PredictionRequest,
     ImageUpload
 )
+from ..models.alert import AlertSeverity, AlertStatus
+from ..models.model import ModelType
+from .alert_stats import alert_stats
+from .anomaly_stream import anomaly_stream
 from .base_service import BaseService
+from .cpu_executor import CPUExecutionStage, StageSaturatedError
+from .image_processing import MODEL_INPUT_SIZE, decode_and_preprocess
+from .inference_batcher import MicroBatcher
+from .live_state import SENSOR_FIELDS, live_state
 from .machine_service import machine_service
+from .model_registry import LoadedModel, model_registry
+from .rollup_service import rollup_service
 
 logger = logging.getLogger(__name__)
 
+# Listing order; (machine_id, prediction_time) is indexed
+PREDICTION_SORT_KEY = (models.Prediction.prediction_time, models.Prediction.id)
+
+# Output classes of image wear models, in model output order
+WEAR_CATEGORIES = ["normal", "moderate", "severe"]
+
+# Remaining life below which sensor predictions count as severe / moderate wear
+CRITICAL_RUL_HOURS = 24.0
+MODERATE_RUL_HOURS = 168.0
+
+
+def wear_category_for_rul(rul_hours: float) -> str:
+    """Wear category for a predicted remaining useful life"""
+    if rul_hours < CRITICAL_RUL_HOURS:
+        return "severe"
+    if rul_hours < MODERATE_RUL_HOURS:
+        return "moderate"
+    return "normal"
+
+
 class PredictionService:
     """Enhanced service class for prediction operations with improved error handling and validation"""
     
@@ -39,9 +75,24 @@ class PredictionService:
         # Ensure upload directory exists
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
         
-        # Model cache
-        self._model_cache = {}
-        self._model_versions = self._get_available_models()
+        # Bounded pool for image decode, preprocessing and inference
+        self.image_stage = CPUExecutionStage(
+            "image",
+            max_workers=settings.IMAGE_WORKERS,
+            max_queue=settings.IMAGE_QUEUE_SIZE,
+            use_processes=settings.IMAGE_USE_PROCESSES
+        )
+        
+        # Concurrent sensor predictions share batched forward passes
+        self.sensor_batcher = MicroBatcher(
+            self._predict_sensor_batch,
+            max_batch_size=settings.PREDICTION_BATCH_SIZE,
+            max_wait_ms=settings.PREDICTION_BATCH_WAIT_MS,
+            name="sensor"
+        )
+        
+        # Uploads are written to disk in the background; keep references until done
+        self._persist_tasks: Set[asyncio.Task] = set()
     
     async def predict_from_image(
         self,
@@ -64,7 +115,7 @@ class PredictionService:
             user_id: Optional user ID making the request
             
         Returns:
-            Prediction model instance
+            The inserted prediction row
             
         Raises:
             HTTPException: For validation or processing errors
@@ -88,63 +139,43 @@ class PredictionService:
                     detail="Cannot make predictions for machines in maintenance"
                 )
             
-            # Validate file type and content
-            if not image_file.content_type or not image_file.content_type.startswith('image/'):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid file type. Only image files are accepted."
-                )
+            file_ext = self._validate_image_file(image_file)
             
-            file_ext = Path(image_file.filename).suffix.lower()
-            if file_ext not in settings.ALLOWED_IMAGE_EXTENSIONS:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Unsupported file format. Allowed formats: {', '.join(settings.ALLOWED_IMAGE_EXTENSIONS)}"
-                )
+            image_data = await image_file.read()
+            
+            # Load model from the registry (shared, cached load)
+            model = await self._load_model(db, model_version, ModelType.IMAGE_CLASSIFICATION)
             
-            # Load and validate image
+            # Decode, preprocess and infer off the event loop, rejecting when saturated
             try:
-                image_data = await image_file.read()
-                image = cv2.imdecode(
-                    np.frombuffer(image_data, np.uint8), 
-                    cv2.IMREAD_COLOR
-                )
-                if image is None:
-                    raise ValueError("Could not decode image")
-            except Exception as e:
-                logger.error(f"Error processing image: {str(e)}")
+                async with self.image_stage.admit():
+                    try:
+                        image = await self.image_stage.run(decode_and_preprocess, image_data)
+                    except ValueError as e:
+                        logger.error(f"Error processing image: {str(e)}")
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Invalid image file"
+                        )
+                    
+                    prediction_result = await self.image_stage.run_in_thread(
+                        self._predict_image, model, image
+                    )
+            except StageSaturatedError:
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid image file"
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Image prediction capacity exceeded, please retry shortly",
+                    headers={"Retry-After": "1"}
                 )
             
-            # Save the uploaded file
+            # Persist the original upload without holding up the response
             filename = f"{uuid.uuid4()}{file_ext}"
-            file_path = os.path.join(settings.UPLOAD_DIR, filename)
-            with open(file_path, "wb") as f:
-                f.write(image_data)
-            
-            # Load model if not in cache
-            model = await self._load_model(model_version)
-            
-            # Make prediction (placeholder - implement actual model inference)
-            prediction_result = self._predict_image(model, image)
+            self._persist_upload(os.path.join(settings.UPLOAD_DIR, filename), image_data)
             
-            # Create prediction record
-            prediction = models.Prediction(
-                machine_id=machine_id,
-                model_version=model_version,
-                input_type="image",
-                input_file=filename,
-                prediction_data=jsonable_encoder(prediction_result),
-                confidence=prediction_result.get("confidence", 0.0),
-                created_by=user_id,
-                created_at=datetime.utcnow()
-            )
-            
-            db.add(prediction)
-            db.commit()
-            db.refresh(prediction)
+            # Create the image and prediction records
+            prediction = self._save_image_predictions(
+                db, machine, model.version if model else model_version, [(filename, prediction_result)]
+            )[0]
             
             return prediction
             
@@ -165,81 +196,240 @@ class PredictionService:
                 detail="An error occurred while processing the prediction"
             )
     
-    async def _load_model(self, model_version: str):
-        """Load a model with caching"""
-        if model_version == "latest":
-            model_version = self._model_versions[0]  # Get most recent version
-            
-        if model_version not in self._model_cache:
-            # Load model here (implement actual model loading)
-            self._model_cache[model_version] = None  # Replace with actual model
+    async def predict_from_images(
+        self,
+        db: Session,
+        machine_id: int,
+        image_files: List[UploadFile],
+        model_version: str = "latest",
+        user_id: Optional[int] = None
+    ) -> Tuple[List[Any], Dict[int, str]]:
+        """
+        Make predictions for a batch of uploaded images.
+        
+        Images are decoded in parallel straight into one preallocated batch
+        tensor, scored with a single inference call and all prediction records
+        are written in one transaction. Files that fail validation or decoding
+        are skipped and reported by their position in the upload.
+        
+        Returns:
+            Tuple of (created predictions, mapping of file index to error message)
             
-        return self._model_cache[model_version]
-    
-    def _get_available_models(self) -> List[str]:
-        """Get list of available model versions"""
-        # Implement logic to discover available models
-        return ["v1.0.0"]  # Example
-    
-    def _predict_image(self, model, image: np.ndarray) -> Dict[str, Any]:
-        """Run prediction on an image"""
-        # Implement actual model inference
-        return {
-            "class": "normal",
-            "confidence": 0.95,
-            "defects": [],
-            "metadata": {}
-        }
-
-# Create a singleton instance
-prediction_service = PredictionService()
+        Raises:
+            HTTPException: If the machine is unavailable, the batch is too large
+                or no file could be processed
+        """
+        if len(image_files) > settings.IMAGE_BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {settings.IMAGE_BATCH_MAX_FILES} images can be submitted per batch"
+            )
+        
+        machine = machine_service.get_machine(db, machine_id)
+        if not machine:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Machine with ID {machine_id} not found"
+            )
+        
+        if machine.status == MachineStatus.MAINTENANCE:
+            raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File type {image_file.content_type} not allowed. "
-                       f"Allowed types: {', '.join(settings.ALLOWED_IMAGE_TYPES)}"
+                detail="Cannot make predictions for machines in maintenance"
             )
         
+        errors: Dict[int, str] = {}
+        uploads: List[Tuple[int, str, bytes]] = []
+        for index, image_file in enumerate(image_files):
+            try:
+                file_ext = self._validate_image_file(image_file)
+            except HTTPException as e:
+                errors[index] = e.detail
+                continue
+            uploads.append((index, file_ext, await image_file.read()))
+        
+        model = await self._load_model(db, model_version, ModelType.IMAGE_CLASSIFICATION)
+        
+        # Channels-last (N, H, W, 3): image models are Keras models, whose Conv2D
+        # layers default to NHWC, and each worker writes a contiguous HWC slot
+        width, height = MODEL_INPUT_SIZE
+        batch = np.empty((len(uploads), height, width, 3), dtype=np.float32)
+        
         try:
-            # Save uploaded file
-            file_ext = os.path.splitext(image_file.filename)[1]
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            filename = f"pred_{machine_id}_{timestamp}{file_ext}"
-            filepath = os.path.join(settings.UPLOAD_DIR, filename)
-            
-            with open(filepath, "wb") as buffer:
-                buffer.write(await image_file.read())
-            
-            # Preprocess image
-            processed_image = self._preprocess_image(filepath)
+            # Decode in waves of at most max_workers images, each image holding
+            # its own stage slot, so one batch cannot queue past the stage bound
+            decoded = []
+            wave_size = self.image_stage.max_workers
+            for wave_start in range(0, len(uploads), wave_size):
+                wave = range(wave_start, min(wave_start + wave_size, len(uploads)))
+                async with self.image_stage.admit(len(wave)):
+                    # Each worker writes its image into its own slot of the batch tensor
+                    decoded += await asyncio.gather(
+                        *(
+                            self.image_stage.run_in_thread(
+                                decode_and_preprocess, uploads[slot][2], MODEL_INPUT_SIZE, batch[slot]
+                            )
+                            for slot in wave
+                        ),
+                        return_exceptions=True
+                    )
+            
+            valid_slots = []
+            for slot, result in enumerate(decoded):
+                if isinstance(result, Exception):
+                    errors[uploads[slot][0]] = "Invalid image file"
+                else:
+                    valid_slots.append(slot)
+            
+            if not valid_slots:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail={"message": "No valid images in batch", "errors": errors}
+                )
             
-            # Make prediction (placeholder - integrate with actual model)
-            prediction_result = self._predict_image(processed_image)
+            if len(valid_slots) < len(uploads):
+                batch = batch[valid_slots]
+                uploads = [uploads[slot] for slot in valid_slots]
             
-            # Save prediction to database
-            prediction = models.Prediction(
-                machine_id=machine_id,
-                model_version=model_version,
-                input_type="image",
-                input_file=filename,
-                prediction_result=prediction_result,
-                confidence=prediction_result.get("confidence", 0.0),
-                created_by=user_id
+            async with self.image_stage.admit():
+                results = await self.image_stage.run_in_thread(
+                    self._predict_image_batch, model, batch
+                )
+        except StageSaturatedError:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Image prediction capacity exceeded, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        
+        try:
+            stored = []
+            for (_, file_ext, data), prediction_result in zip(uploads, results):
+                filename = f"{uuid.uuid4()}{file_ext}"
+                self._persist_upload(os.path.join(settings.UPLOAD_DIR, filename), data)
+                stored.append((filename, prediction_result))
+            
+            predictions = self._save_image_predictions(
+                db, machine, model.version if model else model_version, stored
             )
-            
-            db.add(prediction)
-            db.commit()
-            db.refresh(prediction)
-            
-            # Check if we need to create an alert
-            self._check_for_alert(db, prediction, machine_id, user_id)
-            
-            return prediction
-            
         except Exception as e:
-            logger.error(f"Error processing image prediction: {str(e)}", exc_info=True)
+            db.rollback()
+            logger.error(f"Batch prediction error: {str(e)}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error processing image: {str(e)}"
+                detail="An error occurred while saving the batch predictions"
             )
+        
+        return predictions, errors
+    
+    def _save_image_predictions(
+        self,
+        db: Session,
+        machine: models.Machine,
+        model_version: str,
+        stored: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Any]:
+        """
+        Record image classifications in one transaction.
+
+        Each (filename, result) pair gets an ImageData row for the stored upload
+        and a Prediction linked to it; each kind is written with one executemany
+        insert. Image models classify wear but do not estimate remaining life,
+        so rul_hours falls back to the machine's current estimate.
+
+        Returns:
+            The inserted prediction rows, in the order given
+        """
+        images = models.ImageData.__table__
+        predictions = models.Prediction.__table__
+        filenames = [filename for filename, _ in stored]
+        
+        db.execute(
+            images.insert(),
+            [
+                {
+                    "machine_id": machine.id,
+                    "file_path": filename,
+                    "label": result.get("class"),
+                    "confidence": result.get("confidence"),
+                    "processed": True
+                }
+                for filename, result in stored
+            ]
+        )
+        # Upload file names are unique, so they identify the new image rows
+        image_ids = dict(
+            db.execute(select(images.c.file_path, images.c.id).where(images.c.file_path.in_(filenames))).all()
+        )
+        
+        db.execute(
+            predictions.insert(),
+            [
+                {
+                    "machine_id": machine.id,
+                    "image_data_id": image_ids[filename],
+                    "rul_hours": result.get("rul_hours", machine.current_rul_hours or 0.0),
+                    "wear_category": result.get("class", WEAR_CATEGORIES[0]),
+                    "confidence": result.get("confidence", 0.0),
+                    "model_version": model_version
+                }
+                for filename, result in stored
+            ]
+        )
+        by_image = {
+            row.image_data_id: row
+            for row in db.execute(
+                select(predictions).where(predictions.c.image_data_id.in_(image_ids.values()))
+            ).all()
+        }
+        rows = [by_image[image_ids[filename]] for filename in filenames]
+        db.commit()
+        
+        live_state.record_prediction(rows[-1]._mapping)
+        return rows
+    
+    def _validate_image_file(self, image_file: UploadFile) -> str:
+        """
+        Check an upload's content type and extension.
+        
+        Returns:
+            The lower-cased file extension
+            
+        Raises:
+            HTTPException: If the file is not an accepted image
+        """
+        if not image_file.content_type or not image_file.content_type.startswith('image/'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid file type. Only image files are accepted."
+            )
+        
+        file_ext = Path(image_file.filename).suffix.lower()
+        if file_ext not in settings.ALLOWED_IMAGE_EXTENSIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported file format. Allowed formats: {', '.join(settings.ALLOWED_IMAGE_EXTENSIONS)}"
+            )
+        return file_ext
+    
+    async def _load_model(
+        self,
+        db: Session,
+        model_version: str,
+        model_type: ModelType
+    ) -> Optional[LoadedModel]:
+        """Load a model through the registry cache"""
+        try:
+            return await model_registry.get(db, model_version, model_type)
+        except LookupError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e)
+            )
+    
+    def _get_available_models(self, db: Session) -> List[str]:
+        """Get list of available model versions"""
+        return model_registry.available_versions(db)
     
     async def predict_from_sensor_data(
         self,
@@ -258,38 +448,26 @@ prediction_service = PredictionService()
                 detail=f"Machine with ID {machine_id} not found"
             )
         
+        model = await self._load_model(db, model_version, ModelType.TIME_SERIES)
+        
         try:
             # Preprocess sensor data
             processed_data = self._preprocess_sensor_data(sensor_data)
             
-            # Make prediction (placeholder - integrate with actual model)
-            prediction_result = self._predict_sensor_data(processed_data)
+            # Make prediction as part of a micro-batch
+            prediction_result = await self.sensor_batcher.submit(model, processed_data)
             
-            # Save sensor data
-            sensor_reading = models.SensorData(
-                machine_id=machine_id,
-                **sensor_data
+            reading, prediction = self._save_sensor_prediction(
+                db, machine, model.version if model else model_version, sensor_data, prediction_result
             )
-            db.add(sensor_reading)
-            db.flush()  # Get the ID for the prediction
-            
-            # Save prediction to database
-            prediction = models.Prediction(
-                machine_id=machine_id,
-                model_version=model_version,
-                input_type="sensor",
-                sensor_data_id=sensor_reading.id,
-                prediction_result=prediction_result,
-                confidence=prediction_result.get("confidence", 0.0),
-                created_by=user_id
-            )
-            
-            db.add(prediction)
-            db.commit()
-            db.refresh(prediction)
             
             # Check if we need to create an alert
-            self._check_for_alert(db, prediction, machine_id, user_id)
+            self._check_for_alert(db, prediction.id, prediction_result, machine_id)
+            
+            # Score the new reading once and push any anomalies to subscribers
+            values = {field: reading[field] for field in SENSOR_FIELDS}
+            await anomaly_stream.publish_sensor_data(machine_id, values, reading["timestamp"])
+            await sensor_stream.publish_samples(machine_id, [(reading["timestamp"], values)])
             
             return prediction
             
@@ -301,47 +479,130 @@ prediction_service = PredictionService()
                 detail=f"Error processing sensor data: {str(e)}"
             )
     
-    def get_predictions(
+    def _save_sensor_prediction(
         self,
         db: Session,
-        machine_id: Optional[int] = None,
-        skip: int = 0,
-        limit: int = 100,
-        **filters
-    ) -> Tuple[List[models.Prediction], int]:
-        """Get predictions with optional filtering"""
-        query = db.query(models.Prediction)
+        machine: models.Machine,
+        model_version: str,
+        sensor_data: Dict[str, Any],
+        result: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Any]:
+        """
+        Record a sensor reading, its rollups and the prediction made from it in
+        one transaction.
+
+        Only keys naming SensorData columns are stored; other model inputs
+        (such as per-axis vibration) are used for inference only. The wear
+        category is derived from the predicted remaining life, which falls
+        back to the machine's current estimate if the model gave none.
+
+        Returns:
+            Tuple of (stored reading as a dict, inserted prediction row)
+        """
+        readings = models.SensorData.__table__
+        predictions = models.Prediction.__table__
+        
+        values = {field: sensor_data.get(field) for field in SENSOR_FIELDS}
+        if sensor_data.get("timestamp") is not None:
+            values["timestamp"] = sensor_data["timestamp"]
+        reading_id = db.execute(readings.insert().values(machine_id=machine.id, **values)).inserted_primary_key[0]
+        reading = dict(db.execute(select(readings).where(readings.c.id == reading_id)).one()._mapping)
+        rollup_service.apply_rows(db, [reading])
+        
+        rul_hours = float(result.get("rul_hours", machine.current_rul_hours or 0.0))
+        prediction_id = db.execute(
+            predictions.insert().values(
+                machine_id=machine.id,
+                sensor_data_id=reading_id,
+                rul_hours=rul_hours,
+                wear_category=wear_category_for_rul(rul_hours),
+                confidence=result.get("confidence", 0.0),
+                model_version=model_version
+            )
+        ).inserted_primary_key[0]
+        prediction = db.execute(select(predictions).where(predictions.c.id == prediction_id)).one()
+        db.commit()
+        
+        live_state.record_readings(machine.id, [reading])
+        live_state.record_prediction(prediction._mapping)
+        return reading, prediction
+    
+    def _predictions_select(self, machine_id: Optional[int], filters: Dict[str, Any]):
+        stmt = select(models.Prediction)
         
         if machine_id is not None:
-            query = query.filter(models.Prediction.machine_id == machine_id)
+            stmt = stmt.where(models.Prediction.machine_id == machine_id)
         
         # Apply additional filters
         for key, value in filters.items():
             if hasattr(models.Prediction, key):
-                query = query.filter(getattr(models.Prediction, key) == value)
+                stmt = stmt.where(getattr(models.Prediction, key) == value)
         
-        total = query.count()
-        predictions = query.offset(skip).limit(limit).all()
-        
-        return predictions, total
+        return stmt
     
-    def _preprocess_image(self, image_path: str) -> np.ndarray:
-        """Preprocess image for model input"""
-        # Read image
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError("Could not read image file")
+    def get_predictions(
+        self,
+        db: Session,
+        machine_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        **filters
+    ) -> Page:
+        """Get predictions newest first, paged by cursor (or skip for the first page)"""
+        stmt = self._predictions_select(machine_id, filters)
         
-        # Convert to RGB
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        total = row_counter.count(db, stmt) if include_total else None
+        rows = db.scalars(keyset_select(stmt, PREDICTION_SORT_KEY, cursor, limit, skip=skip)).all()
+        predictions, next_cursor = split_page(rows, PREDICTION_SORT_KEY, limit)
         
-        # Resize to model input size (adjust as needed)
-        img = cv2.resize(img, (224, 224))
+        return Page(predictions, total, next_cursor)
+    
+    async def get_predictions_async(
+        self,
+        db: AsyncSession,
+        machine_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        **filters
+    ) -> Page:
+        """Get predictions newest first, paged by cursor (or skip for the first page)"""
+        stmt = self._predictions_select(machine_id, filters)
         
-        # Normalize pixel values
-        img = img.astype(np.float32) / 255.0
+        total = await row_counter.count_async(db, stmt) if include_total else None
+        rows = (await db.scalars(keyset_select(stmt, PREDICTION_SORT_KEY, cursor, limit, skip=skip))).all()
+        predictions, next_cursor = split_page(rows, PREDICTION_SORT_KEY, limit)
         
-        return img
+        return Page(predictions, total, next_cursor)
+    
+    async def get_latest_prediction_async(
+        self,
+        db: AsyncSession,
+        machine_id: int
+    ) -> Optional[models.Prediction]:
+        """Get the most recent prediction for a machine"""
+        return await db.scalar(
+            select(models.Prediction)
+            .where(models.Prediction.machine_id == machine_id)
+            .order_by(models.Prediction.prediction_time.desc(), models.Prediction.id.desc())
+            .limit(1)
+        )
+    
+    def _persist_upload(self, file_path: str, data: bytes) -> None:
+        """Schedule an upload to be written to disk off the request path"""
+        task = asyncio.get_running_loop().create_task(self._write_upload(file_path, data))
+        self._persist_tasks.add(task)
+        task.add_done_callback(self._persist_tasks.discard)
+    
+    async def _write_upload(self, file_path: str, data: bytes) -> None:
+        try:
+            async with aiofiles.open(file_path, "wb") as f:
+                await f.write(data)
+        except Exception as e:
+            logger.error(f"Error saving uploaded file {file_path}: {str(e)}", exc_info=True)
     
     def _preprocess_sensor_data(self, sensor_data: Dict[str, float]) -> np.ndarray:
         """Preprocess sensor data for model input"""
@@ -359,51 +620,98 @@ prediction_service = PredictionService()
         # Convert to numpy array (adjust as needed for your model)
         return np.array([processed[field] for field in expected_fields])
     
-    def _predict_image(self, image: np.ndarray) -> Dict[str, Any]:
-        """Make prediction from image (placeholder implementation)"""
-        # TODO: Replace with actual model inference
-        return {
-            "class": "normal",
-            "confidence": 0.95,
-            "metadata": {
-                "model": "cnn_v1",
-                "inference_time_ms": 120
+    def _predict_image(self, model: Optional[LoadedModel], image: np.ndarray) -> Dict[str, Any]:
+        """Make prediction from a single preprocessed image"""
+        return self._predict_image_batch(model, image[np.newaxis, ...])[0]
+    
+    def _predict_image_batch(self, model: Optional[LoadedModel], batch: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Make predictions for a stack of preprocessed images in one forward pass,
+        falling back to a placeholder when no model is registered
+        """
+        if model is None:
+            return [
+                {
+                    "class": "normal",
+                    "confidence": 0.95,
+                    "metadata": {
+                        "model": "cnn_v1",
+                        "inference_time_ms": 120
+                    }
+                }
+                for _ in range(len(batch))
+            ]
+        
+        start_time = time.perf_counter()
+        scores = np.asarray(model.artifact.predict(batch)).reshape(len(batch), -1)
+        class_indices = np.argmax(scores, axis=1)
+        inference_time_ms = round((time.perf_counter() - start_time) * 1000, 2)
+        return [
+            {
+                "class": WEAR_CATEGORIES[class_index] if class_index < len(WEAR_CATEGORIES) else str(class_index),
+                "confidence": float(row[class_index]),
+                "metadata": {
+                    "model": f"{model.model_type.value}_{model.version}",
+                    "inference_time_ms": inference_time_ms,
+                    "batch_size": len(batch)
+                }
             }
-        }
+            for row, class_index in zip(scores, class_indices.tolist())
+        ]
     
-    def _predict_sensor_data(self, sensor_data: np.ndarray) -> Dict[str, Any]:
-        """Make prediction from sensor data (placeholder implementation)"""
-        # TODO: Replace with actual model inference
-        return {
-            "rul_hours": 150.5,  # Remaining useful life in hours
-            "anomaly_score": 0.15,
-            "confidence": 0.92,
-            "metadata": {
-                "model": "lstm_v1",
-                "inference_time_ms": 50
+    def _predict_sensor_batch(self, model: Optional[LoadedModel], batch: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Make predictions for a matrix of sensor vectors in one forward pass,
+        falling back to a placeholder when no model is registered
+        """
+        start_time = time.perf_counter()
+        if model is None:
+            return [
+                {
+                    "rul_hours": 150.5,  # Remaining useful life in hours
+                    "anomaly_score": 0.15,
+                    "confidence": 0.92,
+                    "metadata": {
+                        "model": "lstm_v1",
+                        "inference_time_ms": 50
+                    }
+                }
+                for _ in range(len(batch))
+            ]
+        
+        rul_hours = np.ravel(model.artifact.predict(batch))
+        inference_time_ms = round((time.perf_counter() - start_time) * 1000, 2)
+        return [
+            {
+                "rul_hours": float(rul),
+                "anomaly_score": 0.0,
+                "confidence": 1.0,
+                "metadata": {
+                    "model": f"{model.model_type.value}_{model.version}",
+                    "inference_time_ms": inference_time_ms,
+                    "batch_size": len(batch)
+                }
             }
-        }
+            for rul in rul_hours
+        ]
     
     def _check_for_alert(
         self,
         db: Session,
-        prediction: models.Prediction,
-        machine_id: int,
-        user_id: Optional[int] = None
+        prediction_id: int,
+        result: Dict[str, Any],
+        machine_id: int
     ) -> None:
         """Check if prediction requires an alert to be created"""
         try:
-            result = prediction.prediction_result
-            
             # Example alert conditions (customize based on your requirements)
             if result.get("confidence", 0) < 0.7:
                 self._create_alert(
                     db=db,
                     machine_id=machine_id,
                     title="Low Prediction Confidence",
-                    message=f"Prediction ID {prediction.id} has low confidence: {result.get('confidence'):.2f}",
-                    severity="warning",
-                    created_by=user_id
+                    message=f"Prediction ID {prediction_id} has low confidence: {result.get('confidence'):.2f}",
+                    severity=AlertSeverity.WARNING
                 )
             
             if result.get("anomaly_score", 0) > 0.8:
@@ -411,22 +719,21 @@ prediction_service = PredictionService()
                     db=db,
                     machine_id=machine_id,
                     title="High Anomaly Detected",
-                    message=f"High anomaly score detected in prediction {prediction.id}",
-                    severity="critical",
-                    created_by=user_id
+                    message=f"High anomaly score detected in prediction {prediction_id}",
+                    severity=AlertSeverity.CRITICAL
                 )
             
-            if result.get("rul_hours", float('inf')) < 24:  # Less than 24 hours RUL
+            if result.get("rul_hours", float('inf')) < CRITICAL_RUL_HOURS:
                 self._create_alert(
                     db=db,
                     machine_id=machine_id,
                     title="Critical RUL Warning",
                     message=f"Machine {machine_id} has critical remaining useful life: {result.get('rul_hours'):.1f} hours",
-                    severity="critical",
-                    created_by=user_id
+                    severity=AlertSeverity.CRITICAL
                 )
                 
         except Exception as e:
+            db.rollback()
             logger.error(f"Error checking for alerts: {str(e)}", exc_info=True)
     
     def _create_alert(
@@ -435,22 +742,25 @@ prediction_service = PredictionService()
         machine_id: int,
         title: str,
         message: str,
-        severity: str = "info",
-        created_by: Optional[int] = None
-    ) -> models.Alert:
+        severity: AlertSeverity = AlertSeverity.INFO
+    ) -> Any:
         """Helper method to create an alert"""
-        alert = models.Alert(
-            machine_id=machine_id,
-            title=title,
-            message=message,
-            severity=severity,
-            status="open",
-            created_by=created_by
-        )
-        
-        db.add(alert)
+        alerts = models.Alert.__table__
+        alert_id = db.execute(
+            alerts.insert().values(
+                machine_id=machine_id,
+                title=title,
+                message=message,
+                severity=severity,
+                status=AlertStatus.OPEN
+            )
+        ).inserted_primary_key[0]
+        alert = db.execute(select(alerts).where(alerts.c.id == alert_id)).one()
         db.commit()
-        db.refresh(alert)
+        
+        alert_stats.invalidate(alert.machine_id, alert.timestamp)
+        live_state.record_alert(alert)
+        response_cache.invalidate("alerts")
         
         # TODO: Send real-time notification
         
@@ -0,0 +1,219 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import pandas as pd
+from sqlalchemy import Table, delete, func, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..models.sensor_rollup import ROLLUP_MODELS
+from .partition_service import partition_service
+
+logger = logging.getLogger(__name__)
+
+# pandas frequency used to floor timestamps for each rollup resolution
+ROLLUP_FREQUENCIES = {
+    "minute": "min",
+    "hour": "60min",
+    "day": "D",
+}
+
+KEY_COLUMNS = ["machine_id", "sensor", "bucket"]
+
+
+class SensorRollupService:
+    """
+    Incrementally maintained minute/hour/day rollups of sensor readings.
+
+    Every ingested batch is reduced to count/sum/min/max per machine, sensor
+    and bucket and upserted into each rollup table, merging with what is
+    already there. backfill() rebuilds a time range from the raw rows.
+    """
+
+    def __init__(self, backfill_chunk_size: int = 50000):
+        self.backfill_chunk_size = backfill_chunk_size
+        self.tables: Dict[str, Table] = {
+            resolution: model.__table__ for resolution, model in ROLLUP_MODELS.items()
+        }
+
+    def apply_frame(self, db: Session, frame: pd.DataFrame) -> int:
+        """
+        Merge a wide batch (machine_id, timestamp and sensor columns) into the rollups.
+
+        Runs in the caller's transaction, so raw rows and rollups commit together.
+
+        Returns:
+            Number of rollup rows upserted across all resolutions
+        """
+        sensors = [column for column in frame.columns if column not in ("id", "machine_id", "timestamp")]
+        if frame.empty or not sensors:
+            return 0
+
+        timestamps = pd.to_datetime(frame["timestamp"], utc=True).dt.tz_localize(None)
+        readings = (
+            frame.assign(timestamp=timestamps)
+            .melt(id_vars=["machine_id", "timestamp"], value_vars=sensors, var_name="sensor", value_name="value")
+        )
+        readings["value"] = pd.to_numeric(readings["value"], errors="coerce")
+        return self._apply_long(db, readings.dropna(subset=["timestamp", "value"]))
+
+    def apply_rows(self, db: Session, rows: Iterable[Mapping[str, Any]]) -> int:
+        """Merge wide reading dicts; a missing timestamp means now"""
+        records = [
+            {**row, "timestamp": row.get("timestamp") or datetime.utcnow()}
+            for row in rows
+        ]
+        return self.apply_frame(db, pd.DataFrame.from_records(records)) if records else 0
+
+    def apply_readings(self, db: Session, readings: Iterable[Mapping[str, Any]]) -> int:
+        """Merge long-format readings (machine_id, timestamp, sensor_type, value)"""
+        frame = pd.DataFrame.from_records(
+            [
+                (reading["machine_id"], reading["timestamp"], reading["sensor_type"], reading["value"])
+                for reading in readings
+            ],
+            columns=["machine_id", "timestamp", "sensor", "value"]
+        )
+        if frame.empty:
+            return 0
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True).dt.tz_localize(None)
+        frame["value"] = pd.to_numeric(frame["value"], errors="coerce")
+        return self._apply_long(db, frame.dropna(subset=["timestamp", "value"]))
+
+    def backfill(
+        self,
+        db: Session,
+        start_time: datetime,
+        end_time: datetime,
+        machine_id: Optional[int] = None,
+        window: timedelta = timedelta(days=1)
+    ) -> Dict[str, Any]:
+        """
+        Rebuild the rollups for [start_time, end_time) from raw sensor_data,
+        including SQLite partition files.
+
+        The range is widened to whole days. Each window is deleted and rebuilt
+        in its own transaction, so reruns are idempotent and an interrupted
+        backfill can resume from the last committed window.
+        """
+        start = datetime(start_time.year, start_time.month, start_time.day)
+        end = datetime(end_time.year, end_time.month, end_time.day)
+        if end < end_time:
+            end += timedelta(days=1)
+
+        raw = models.SensorData.__table__
+        sensors = [column.name for column in raw.columns if column.name not in ("id", "machine_id", "timestamp")]
+        stats = {"windows": 0, "rows_read": 0, "rollup_rows": 0}
+        started = time.perf_counter()
+
+        window_start = start
+        while window_start < end:
+            window_end = min(window_start + window, end)
+            try:
+                self._clear(db, window_start, window_end, machine_id)
+
+                for batch in partition_service.sensor_batches(db, window_start, window_end):
+                    with partition_service.sensor_reader(db, batch) as (reader, source):
+                        stmt = select(
+                            source.c.machine_id, source.c.timestamp, *(source.c[sensor] for sensor in sensors)
+                        ).where(
+                            source.c.timestamp >= window_start,
+                            source.c.timestamp < window_end,
+                            *batch.bounds(source.c.timestamp)
+                        )
+                        if machine_id is not None:
+                            stmt = stmt.where(source.c.machine_id == machine_id)
+
+                        result = reader.execute(stmt.execution_options(yield_per=self.backfill_chunk_size))
+                        for rows in result.partitions(self.backfill_chunk_size):
+                            frame = pd.DataFrame.from_records(rows, columns=["machine_id", "timestamp", *sensors])
+                            stats["rows_read"] += len(frame)
+                            stats["rollup_rows"] += self.apply_frame(db, frame)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.error(f"Rollup backfill failed for window starting {window_start}", exc_info=True)
+                raise
+
+            stats["windows"] += 1
+            logger.info(f"Rolled up sensor data from {window_start} to {window_end}")
+            window_start = window_end
+
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    def _clear(self, db: Session, start: datetime, end: datetime, machine_id: Optional[int]) -> None:
+        for table in self.tables.values():
+            stmt = delete(table).where(table.c.bucket >= start, table.c.bucket < end)
+            if machine_id is not None:
+                stmt = stmt.where(table.c.machine_id == machine_id)
+            db.execute(stmt)
+
+    def _apply_long(self, db: Session, readings: pd.DataFrame) -> int:
+        if readings.empty:
+            return 0
+
+        upserted = 0
+        for resolution, table in self.tables.items():
+            summary = (
+                readings.assign(bucket=readings["timestamp"].dt.floor(ROLLUP_FREQUENCIES[resolution]))
+                .groupby(KEY_COLUMNS, sort=True)["value"]
+                .agg(count="count", sum="sum", min="min", max="max")
+                .reset_index()
+            )
+            # Sorted keys keep concurrent upserts from deadlocking on PostgreSQL
+            records = summary.to_dict("records")
+            self._upsert(db, table, records)
+            upserted += len(records)
+        return upserted
+
+    def _upsert(self, db: Session, table: Table, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            least, greatest = func.least, func.greatest
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+            # Multi-argument min()/max() are scalar functions in SQLite
+            least, greatest = func.min, func.max
+        else:
+            self._merge_rows(db, table, records)
+            return
+
+        stmt = insert(table)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={
+                "count": table.c.count + excluded.count,
+                "sum": table.c.sum + excluded.sum,
+                "min": least(table.c.min, excluded.min),
+                "max": greatest(table.c.max, excluded.max),
+            }
+        )
+        db.execute(stmt, records)
+
+    def _merge_rows(self, db: Session, table: Table, records: List[Dict[str, Any]]) -> None:
+        """Row-by-row merge for databases without INSERT ... ON CONFLICT"""
+        for record in records:
+            key = [table.c[column] == record[column] for column in KEY_COLUMNS]
+            existing = db.execute(select(table).where(*key)).mappings().first()
+            if existing is None:
+                db.execute(table.insert(), record)
+                continue
+            db.execute(
+                table.update().where(*key).values(
+                    count=existing["count"] + record["count"],
+                    sum=existing["sum"] + record["sum"],
+                    min=min(existing["min"], record["min"]),
+                    max=max(existing["max"], record["max"]),
+                )
+            )
+
+# Create a singleton instance
+rollup_service = SensorRollupService()
@@ -0,0 +1,276 @@
+import asyncio
+import io
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import aiofiles
+import pandas as pd
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.ingest_service import REQUIRED_COLUMNS, ingest_service
+from app.services.live_state import live_state
+from app.services.rollup_service import rollup_service
+
+logger = logging.getLogger(__name__)
+
+
+class UploadJob:
+    """Progress of a single CSV upload being streamed into the database"""
+
+    def __init__(self, machine_id: int, file_path: Path, total_bytes: int):
+        self.id = str(uuid.uuid4())
+        self.machine_id = machine_id
+        self.file_path = file_path
+        self.total_bytes = total_bytes
+        self.status = "queued"
+        self.bytes_read = 0
+        self.rows_read = 0
+        # Rows are written in one transaction and committed when the job completes
+        self.rows_written = 0
+        self.rows_committed = 0
+        self.batches_written = 0
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize job progress including throughput"""
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+
+        return {
+            "job_id": self.id,
+            "machine_id": self.machine_id,
+            "status": self.status,
+            "total_bytes": self.total_bytes,
+            "bytes_read": self.bytes_read,
+            "rows_read": self.rows_read,
+            "rows_written": self.rows_written,
+            "rows_committed": self.rows_committed,
+            "rows_rejected": self.rows_read - self.rows_written,
+            "batches_written": self.batches_written,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows_written / elapsed, 1) if elapsed > 0 else 0.0,
+            "bytes_per_second": round(self.bytes_read / elapsed, 1) if elapsed > 0 else 0.0,
+            "error": self.error,
+            "created_at": self.created_at,
+        }
+
+
+class CsvChunkParser:
+    """
+    Incremental CSV parser fed with raw byte chunks.
+
+    Bytes are buffered up to the last complete line, and each batch of complete
+    lines is parsed together with the header. Quoted fields containing newlines
+    are not supported, which is fine for numeric sensor exports.
+    """
+
+    def __init__(self):
+        self._header: Optional[bytes] = None
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> Optional[pd.DataFrame]:
+        """Add raw bytes and return a frame for every complete line received so far"""
+        self._buffer += data
+
+        if self._header is None:
+            newline = self._buffer.find(b"\n")
+            if newline < 0:
+                return None
+            self._header = bytes(self._buffer[:newline + 1])
+            del self._buffer[:newline + 1]
+            columns = self._header.decode("utf-8-sig").strip().split(",")
+            ingest_service.validate_columns(column.strip().strip('"') for column in columns)
+
+        cut = self._buffer.rfind(b"\n")
+        if cut < 0:
+            return None
+        body = bytes(self._buffer[:cut + 1])
+        del self._buffer[:cut + 1]
+        return self._parse(body)
+
+    def flush(self) -> Optional[pd.DataFrame]:
+        """Parse any trailing line without a newline terminator"""
+        if self._header is None:
+            if self._buffer.strip():
+                return self.feed(b"\n")
+            raise ValueError("CSV file is empty")
+
+        body = bytes(self._buffer)
+        self._buffer.clear()
+        return self._parse(body)
+
+    def _parse(self, body: bytes) -> Optional[pd.DataFrame]:
+        if not body.strip():
+            return None
+        return pd.read_csv(
+            io.BytesIO(self._header + body),
+            usecols=lambda column: column in REQUIRED_COLUMNS,
+            encoding="utf-8-sig",
+        )
+
+
+class UploadPipeline:
+    """Streams uploaded CSV files to disk and into SensorData in the background"""
+
+    def __init__(
+        self,
+        chunk_size: int = settings.UPLOAD_CHUNK_SIZE,
+        max_jobs: int = settings.UPLOAD_JOB_HISTORY,
+        queue_size: int = 4
+    ):
+        self.chunk_size = chunk_size
+        self.max_jobs = max_jobs
+        self.queue_size = queue_size
+        self.jobs: "OrderedDict[str, UploadJob]" = OrderedDict()
+
+    async def save_upload(self, upload_file: UploadFile, destination: Path) -> Path:
+        """Copy an upload to disk chunk by chunk without blocking the event loop"""
+        file_path = destination / f"{uuid.uuid4()}{Path(upload_file.filename).suffix}"
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while True:
+                data = await upload_file.read(self.chunk_size)
+                if not data:
+                    break
+                await buffer.write(data)
+        return file_path
+
+    def create_job(self, machine_id: int, file_path: Path) -> UploadJob:
+        """Register a new ingest job, evicting the oldest finished jobs"""
+        job = UploadJob(machine_id, file_path, file_path.stat().st_size)
+        self.jobs[job.id] = job
+
+        while len(self.jobs) > self.max_jobs:
+            oldest_id = next(
+                (job_id for job_id, old in self.jobs.items() if old.is_finished), None
+            )
+            if oldest_id is None:
+                break
+            del self.jobs[oldest_id]
+
+        return job
+
+    def get_job(self, job_id: str) -> Optional[UploadJob]:
+        return self.jobs.get(job_id)
+
+    async def run(self, job: UploadJob, session_factory: Callable[[], Session]) -> None:
+        """
+        Run an ingest job.
+
+        A reader coroutine streams the file with aiofiles and parses complete lines
+        into frames; a writer coroutine writes each frame from a worker thread.
+        The bounded queue between them keeps memory flat for any file size.
+
+        All frames are written in one transaction, committed once the whole file
+        has been read, so a failed job leaves no rows behind and the upload can
+        simply be retried. The saved file is deleted when the job finishes.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        job.status = "running"
+        job.started_at = time.perf_counter()
+
+        writer = asyncio.create_task(self._write_frames(job, queue, session_factory))
+        try:
+            await self._read_frames(job, queue, writer)
+            await self._put(queue, None, writer)
+            await writer
+            job.status = "completed"
+            logger.info(
+                f"CSV ingest job {job.id} committed {job.rows_committed} rows "
+                f"for machine {job.machine_id}"
+            )
+        except Exception as e:
+            writer.cancel()
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"CSV ingest job {job.id} failed: {str(e)}", exc_info=True)
+        finally:
+            job.finished_at = time.perf_counter()
+            job.file_path.unlink(missing_ok=True)
+
+    async def _read_frames(
+        self,
+        job: UploadJob,
+        queue: asyncio.Queue,
+        writer: asyncio.Task
+    ) -> None:
+        parser = CsvChunkParser()
+        async with aiofiles.open(job.file_path, "rb") as source:
+            while True:
+                data = await source.read(self.chunk_size)
+                if not data:
+                    break
+                job.bytes_read += len(data)
+                frame = await run_in_threadpool(parser.feed, data)
+                if frame is not None:
+                    await self._put(queue, frame, writer)
+
+        frame = await run_in_threadpool(parser.flush)
+        if frame is not None:
+            await self._put(queue, frame, writer)
+
+    async def _put(
+        self,
+        queue: asyncio.Queue,
+        frame: Optional[pd.DataFrame],
+        writer: asyncio.Task
+    ) -> None:
+        """Enqueue a frame, re-raising the writer's error if it stopped early"""
+        put = asyncio.ensure_future(queue.put(frame))
+        await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            writer.result()
+
+    async def _write_frames(
+        self,
+        job: UploadJob,
+        queue: asyncio.Queue,
+        session_factory: Callable[[], Session]
+    ) -> None:
+        db = session_factory()
+        # Newest rows, pushed to the live state once they are committed
+        recent = None
+        try:
+            while True:
+                frame = await queue.get()
+                if frame is None:
+                    break
+                job.rows_read += len(frame)
+                written = await run_in_threadpool(self._write_frame, db, job.machine_id, frame)
+                job.rows_written += len(written)
+                job.batches_written += 1
+                recent = written if recent is None else pd.concat([recent, written]).tail(live_state.window_size)
+            await run_in_threadpool(db.commit)
+            job.rows_committed = job.rows_written
+        finally:
+            # Rolls back whatever was not committed
+            db.close()
+
+        if recent is not None:
+            live_state.record_frame(recent)
+
+    def _write_frame(self, db: Session, machine_id: int, frame: pd.DataFrame) -> pd.DataFrame:
+        """Write a parsed frame and merge it into the rollups, without committing"""
+        prepared = ingest_service.prepare_chunk(frame, machine_id)
+        ingest_service.write_chunk(db, prepared)
+        rollup_service.apply_frame(db, prepared)
+        return prepared
+
+# Create a singleton instance
+upload_pipeline = UploadPipeline()
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 import logging
 
 from .. import models, schemas
+from ..db.pagination import Page
 from .base_service import BaseService
 from .auth_service import auth_service
 
@@ -31,11 +32,13 @@ class UserService:
         db: Session, 
         skip: int = 0, 
         limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
         **filters
-    ) -> Tuple[List[models.User], int]:
+    ) -> Page:
         """Get paginated list of users with optional filtering"""
         return self.base_service.get_multi_paginated(
-            db, skip=skip, limit=limit, **filters
+            db, skip=skip, limit=limit, cursor=cursor, include_total=include_total, **filters
         )
     
     def create_user(
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# All websocket fan-out channels share this prefix
+CHANNEL_PREFIX = "ws:"
+
+# Redis keys holding presence sets
+PRESENCE_PREFIX = "ws-presence:"
+
+# Called with (channel, payload) for every message published by any worker
+MessageHandler = Callable[[str, Union[str, bytes]], Awaitable[None]]
+
+
+class Broker(ABC):
+    """
+    Transport that fans websocket messages out to every worker.
+
+    Publishing never delivers to clients directly; each worker, including the
+    publisher, receives the message through its handler and delivers it to its
+    own local connections. Backends implement publish() and extend start() and
+    stop() when they hold connections.
+
+    Presence records which workers currently want a key (for example a
+    machine's raw samples), so publishers can skip work nobody consumes.
+    Entries expire after their ttl unless refreshed. The base implementation
+    only sees this process.
+    """
+
+    def __init__(self):
+        self.handler: Optional[MessageHandler] = None
+        # key -> member -> expiry (time.monotonic())
+        self._presence: Dict[str, Dict[str, float]] = {}
+
+    async def start(self, handler: MessageHandler) -> None:
+        """Begin receiving messages published on any ws: channel"""
+        self.handler = handler
+
+    async def stop(self) -> None:
+        self.handler = None
+
+    @abstractmethod
+    async def publish(self, channel: str, payload: Union[str, bytes]) -> None:
+        """Send payload to the handler of every worker"""
+
+    async def set_presence(self, key: str, member: str, ttl: float) -> None:
+        """Mark member as interested in key for the next ttl seconds"""
+        self._presence.setdefault(key, {})[member] = time.monotonic() + ttl
+
+    async def clear_presence(self, key: str, member: str) -> None:
+        members = self._presence.get(key)
+        if members is not None:
+            members.pop(member, None)
+            if not members:
+                del self._presence[key]
+
+    async def has_presence(self, key: str) -> bool:
+        """Whether any member is currently interested in key"""
+        now = time.monotonic()
+        return any(expires > now for expires in self._presence.get(key, {}).values())
+
+
+class InMemoryBroker(Broker):
+    """Single-process broker; for tests and single-worker deployments"""
+
+    async def publish(self, channel: str, payload: Union[str, bytes]) -> None:
+        if self.handler is not None:
+            await self.handler(channel, payload)
+
+
+class RedisBroker(Broker):
+    """Redis pub/sub broker so broadcasts reach clients on every worker and host"""
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        import redis.asyncio as redis
+
+        await super().start(handler)
+        self._redis = redis.from_url(self.url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+        self._listener = asyncio.get_running_loop().create_task(self._listen())
+        logger.info(f"Websocket broker subscribed to {self.url}")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            self._pubsub = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+        await super().stop()
+
+    async def publish(self, channel: str, payload: Union[str, bytes]) -> None:
+        await self._client().publish(channel, payload)
+
+    async def set_presence(self, key: str, member: str, ttl: float) -> None:
+        # One sorted set per key, scored by each member's expiry
+        redis_key = f"{PRESENCE_PREFIX}{key}"
+        await self._client().zadd(redis_key, {member: time.time() + ttl})
+        await self._client().expire(redis_key, math.ceil(ttl))
+
+    async def clear_presence(self, key: str, member: str) -> None:
+        await self._client().zrem(f"{PRESENCE_PREFIX}{key}", member)
+
+    async def has_presence(self, key: str) -> bool:
+        return await self._client().zcount(f"{PRESENCE_PREFIX}{key}", time.time(), "+inf") > 0
+
+    def _client(self):
+        if self._redis is None:
+            raise RuntimeError("Redis broker is not started")
+        return self._redis
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message["type"] != "pmessage" or self.handler is None:
+                        continue
+                    channel = message["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    await self.handler(channel, message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Websocket broker listener error: {str(e)}", exc_info=True)
+                await asyncio.sleep(1)
+
+
+def create_broker(kind: str, redis_url: Optional[str] = None) -> Broker:
+    """Create the broker named in settings ("memory" or "redis")"""
+    if kind == "redis":
+        return RedisBroker(redis_url)
+    if kind == "memory":
+        return InMemoryBroker()
+    raise ValueError(f"Unknown websocket broker: {kind}")
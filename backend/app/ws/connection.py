@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+from fastapi import WebSocket
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+QUEUED_MESSAGES = Gauge(
+    'websocket_send_queue_messages',
+    'Messages waiting in websocket client send queues'
+)
+
+SEND_LAG = Histogram(
+    'websocket_send_lag_seconds',
+    'Time from enqueueing a websocket message to finishing its send',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+DROPPED_MESSAGES = Counter(
+    'websocket_dropped_messages_total',
+    'Messages dropped because a client send queue was full'
+)
+
+EVICTED_CLIENTS = Counter(
+    'websocket_slow_consumers_evicted_total',
+    'Websocket clients disconnected for not draining their send queue'
+)
+
+# Serialized message; str is sent as a text frame, bytes as a binary frame
+Payload = Union[str, bytes]
+
+
+class ClientConnection:
+    """
+    Outbound side of one websocket connection.
+
+    Messages are put on a bounded queue and sent by a writer task owned by the
+    connection, so a slow client only ever delays itself. When the queue is
+    full the oldest message is dropped; if the client has not completed a send
+    for stall_timeout seconds it is treated as stalled and closed instead.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        client_id: str,
+        max_queue: int = 100,
+        stall_timeout: float = 10.0,
+        on_close: Optional[Callable[[str], None]] = None
+    ):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.max_queue = max_queue
+        self.stall_timeout = stall_timeout
+        self.on_close = on_close
+        self.dropped = 0
+        self.sent = 0
+        self.closed = False
+        self._queue: Deque[Tuple[Payload, float]] = deque()
+        self._ready = asyncio.Event()
+        self._last_progress = time.monotonic()
+        self._writer: Optional[asyncio.Task] = None
+        self._closer: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        """Start the writer task on the running event loop"""
+        self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+
+    def enqueue(self, payload: Payload) -> bool:
+        """
+        Queue a serialized message without waiting for the client.
+
+        Returns:
+            False if the connection is closed or was just evicted as stalled
+        """
+        if self.closed:
+            return False
+
+        now = time.monotonic()
+        if len(self._queue) >= self.max_queue:
+            if now - self._last_progress > self.stall_timeout:
+                logger.warning(f"Evicting stalled websocket client {self.client_id}")
+                EVICTED_CLIENTS.inc()
+                self._abort()
+                return False
+            self._queue.popleft()
+            QUEUED_MESSAGES.dec()
+            DROPPED_MESSAGES.inc()
+            self.dropped += 1
+        elif not self._queue:
+            # Stall time counts from when the client had something to send
+            self._last_progress = now
+
+        self._queue.append((payload, now))
+        QUEUED_MESSAGES.inc()
+        self._ready.set()
+        return True
+
+    def close(self) -> None:
+        """Stop the writer and discard queued messages"""
+        if self.closed:
+            return
+        self.closed = True
+        QUEUED_MESSAGES.dec(len(self._queue))
+        self._queue.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "client_id": self.client_id,
+            "queue_depth": len(self._queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "seconds_since_progress": round(time.monotonic() - self._last_progress, 3),
+        }
+
+    def _abort(self) -> None:
+        # Closed from our side: close the socket so the receive loop ends, and
+        # let the owner drop its references
+        self.close()
+        self._closer = asyncio.get_running_loop().create_task(self._close_socket())
+        if self.on_close is not None:
+            self.on_close(self.client_id)
+
+    async def _close_socket(self) -> None:
+        try:
+            await asyncio.wait_for(self.websocket.close(code=1008), timeout=1.0)
+        except Exception:
+            pass
+
+    async def _write_loop(self) -> None:
+        while not self.closed:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            payload, enqueued_at = self._queue.popleft()
+            QUEUED_MESSAGES.dec()
+            try:
+                if isinstance(payload, bytes):
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+            except Exception as e:
+                logger.error(f"Error sending to client {self.client_id}: {str(e)}")
+                self._abort()
+                return
+
+            now = time.monotonic()
+            SEND_LAG.observe(now - enqueued_at)
+            self._last_progress = now
+            self.sent += 1
@@ -1,90 +1,265 @@
 import json
 import logging
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
 from fastapi import WebSocket
-from pydantic import BaseModel
+
+from .. import schemas
+from ..config import settings
+from .broker import CHANNEL_PREFIX, Broker, create_broker
+from .connection import ClientConnection, Payload
 
 logger = logging.getLogger(__name__)
 
+# Channel suffix marking payloads that must be sent as binary frames
+BINARY_SUFFIX = ":bin"
+
 class ConnectionManager:
-    """Manages WebSocket connections and broadcasts messages to clients"""
-    
-    def __init__(self):
+    """
+    Manages WebSocket connections and broadcasts messages to clients.
+
+    Connections and subscriptions are local to each worker. Broadcasts go
+    through the broker, which hands every message to all workers; each worker
+    then queues it for its own matching connections. Messages addressed to a
+    single connection are queued directly.
+    """
+
+    def __init__(self, broker: Optional[Broker] = None):
+        self.broker = broker or create_broker(settings.WS_BROKER, settings.REDIS_URL)
         self.active_connections: Dict[str, WebSocket] = {}
-        self.user_connections: Dict[int, List[str]] = {}
-    
+        self.connections: Dict[str, ClientConnection] = {}
+        self.user_connections: Dict[int, Set[str]] = {}
+        self.connection_user_map: Dict[str, int] = {}
+        self.machine_subscriptions: Dict[int, Set[str]] = {}
+        self.connection_subscriptions: Dict[str, Set[int]] = {}
+        # Handlers for extra channel kinds, called with (key, payload) on every worker
+        self.channel_handlers: Dict[str, Callable[[str, Payload], Awaitable[None]]] = {}
+        self._started = False
+
+    async def start(self):
+        """Start receiving broadcasts from the broker"""
+        if not self._started:
+            await self.broker.start(self._on_broker_message)
+            self._started = True
+
+    async def stop(self):
+        """Stop receiving broadcasts and close all local connections"""
+        if self._started:
+            await self.broker.stop()
+            self._started = False
+        for client_id in list(self.active_connections):
+            self.disconnect(client_id)
+
     async def connect(self, websocket: WebSocket, client_id: str, user_id: Optional[int] = None):
         """Register a new WebSocket connection"""
+        await self.start()
         await websocket.accept()
         self.active_connections[client_id] = websocket
-        
+        self.connection_subscriptions[client_id] = set()
+        connection = ClientConnection(
+            websocket,
+            client_id,
+            max_queue=settings.WS_SEND_QUEUE_SIZE,
+            stall_timeout=settings.WS_STALL_TIMEOUT_SECONDS,
+            on_close=self.disconnect
+        )
+        self.connections[client_id] = connection
+        connection.start()
+
         if user_id is not None:
-            if user_id not in self.user_connections:
-                self.user_connections[user_id] = []
-            self.user_connections[user_id].append(client_id)
-        
+            self.connection_user_map[client_id] = user_id
+            self.user_connections.setdefault(user_id, set()).add(client_id)
+
         logger.info(f"New WebSocket connection: {client_id} (User: {user_id})")
-    
+
     def disconnect(self, client_id: str):
-        """Remove a WebSocket connection"""
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-            
-            # Remove from user connections
-            for user_id, connections in list(self.user_connections.items()):
-                if client_id in connections:
-                    connections.remove(client_id)
-                    if not connections:
-                        del self.user_connections[user_id]
-                    break
-        
+        """Remove a WebSocket connection and clean up subscriptions"""
+        if client_id not in self.active_connections:
+            return
+
+        del self.active_connections[client_id]
+        connection = self.connections.pop(client_id, None)
+        if connection is not None:
+            connection.close()
+
+        # Remove from user connections
+        user_id = self.connection_user_map.pop(client_id, None)
+        if user_id is not None and user_id in self.user_connections:
+            self.user_connections[user_id].discard(client_id)
+            if not self.user_connections[user_id]:
+                del self.user_connections[user_id]
+
+        # Remove from machine subscriptions
+        for machine_id in self.connection_subscriptions.pop(client_id, set()):
+            if machine_id in self.machine_subscriptions:
+                self.machine_subscriptions[machine_id].discard(client_id)
+                if not self.machine_subscriptions[machine_id]:
+                    del self.machine_subscriptions[machine_id]
+
         logger.info(f"WebSocket disconnected: {client_id}")
-    
-    async def send_personal_message(self, message: str, client_id: str):
-        """Send a message to a specific client"""
-        if client_id in self.active_connections:
-            try:
-                await self.active_connections[client_id].send_text(message)
-            except Exception as e:
-                logger.error(f"Error sending message to {client_id}: {str(e)}")
-                self.disconnect(client_id)
-    
-    async def broadcast(self, message: str, exclude: Optional[List[str]] = None):
-        """Send a message to all connected clients"""
-        if exclude is None:
-            exclude = []
-            
-        for client_id, connection in list(self.active_connections.items()):
-            if client_id not in exclude:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to {client_id}: {str(e)}")
-                    self.disconnect(client_id)
-    
-    async def send_to_user(self, user_id: int, message: str):
-        """Send a message to all connections of a specific user"""
-        if user_id in self.user_connections:
-            for client_id in self.user_connections[user_id]:
-                await self.send_personal_message(message, client_id)
-    
+
+    async def subscribe_to_machine(self, client_id: str, machine_id: int):
+        """Subscribe a client to updates for a specific machine"""
+        if client_id not in self.active_connections:
+            raise ValueError("Unknown client ID")
+
+        machine_id = int(machine_id)
+        self.machine_subscriptions.setdefault(machine_id, set()).add(client_id)
+        self.connection_subscriptions[client_id].add(machine_id)
+
+        logger.info(f"Client {client_id} subscribed to machine {machine_id}")
+
+    async def unsubscribe_from_machine(self, client_id: str, machine_id: int):
+        """Unsubscribe a client from updates for a specific machine"""
+        machine_id = int(machine_id)
+        if client_id in self.machine_subscriptions.get(machine_id, ()):
+            self.machine_subscriptions[machine_id].discard(client_id)
+            if not self.machine_subscriptions[machine_id]:
+                del self.machine_subscriptions[machine_id]
+            if client_id in self.connection_subscriptions:
+                self.connection_subscriptions[client_id].discard(machine_id)
+
+            logger.info(f"Client {client_id} unsubscribed from machine {machine_id}")
+
+    async def send_personal_message(self, client_id: str, message: Union[dict, Payload]):
+        """Queue a message for a specific client connected to this worker"""
+        connection = self.connections.get(client_id)
+        if connection is not None:
+            connection.enqueue(self._serialize(message))
+
+    async def broadcast(self, message: Union[dict, Payload], exclude: Optional[List[str]] = None):
+        """Send a message to all connected clients on every worker"""
+        if exclude:
+            # Exclusions refer to local client IDs, so deliver locally only
+            await self._deliver("all", self._serialize(message), exclude=set(exclude))
+            return
+        await self._publish("all", message)
+
+    async def broadcast_to_machine(self, machine_id: int, message: Union[dict, Payload]):
+        """Send a message to all clients subscribed to a machine on every worker"""
+        await self._publish(f"machine:{machine_id}", message)
+
+    async def send_to_user(self, user_id: int, message: Union[dict, Payload]):
+        """Send a message to all connections of a specific user on every worker"""
+        await self._publish(f"user:{user_id}", message)
+
+    async def publish(self, target: str, message: Union[dict, Payload]):
+        """Publish to a custom channel kind ("<kind>:<key>") registered on every worker"""
+        await self._publish(target, message)
+
+    def register_channel(self, kind: str, handler: Callable[[str, Payload], Awaitable[None]]):
+        """Handle messages published to "<kind>:<key>" targets on this worker"""
+        self.channel_handlers[kind] = handler
+
+    def unregister_channel(self, kind: str):
+        """Stop handling a channel kind on this worker"""
+        self.channel_handlers.pop(kind, None)
+
     async def broadcast_alert(self, alert: dict):
         """Broadcast an alert to all connected clients"""
-        message = json.dumps({
+        await self.broadcast({
             "type": "alert",
             "data": alert
         })
-        await self.broadcast(message)
-    
+
     async def broadcast_system_message(self, message: str, level: str = "info"):
         """Broadcast a system message to all connected clients"""
-        message = json.dumps({
+        await self.broadcast({
             "type": "system",
             "level": level,
             "message": message,
             "timestamp": datetime.utcnow().isoformat()
         })
-        await self.broadcast(message)
+
+    async def notify_machine_update(self, machine_id: int, update_type: str, data: dict):
+        """Notify all clients about a machine update"""
+        await self.broadcast_to_machine(machine_id, {
+            "type": f"machine_{update_type}",
+            "machine_id": machine_id,
+            "timestamp": data.get("timestamp") or datetime.utcnow().isoformat(),
+            "data": data
+        })
+
+    async def notify_alert(self, alert: schemas.Alert):
+        """Notify relevant users about a new alert"""
+        message = json.dumps({
+            "type": "alert",
+            "alert_id": alert.id,
+            "machine_id": alert.machine_id,
+            "severity": alert.severity,
+            "message": alert.message,
+            "timestamp": alert.timestamp.isoformat() if alert.timestamp else None,
+            "data": json.loads(alert.json())
+        })
+
+        # Send to all users subscribed to this machine
+        await self.broadcast_to_machine(alert.machine_id, message)
+
+        # Send to admins/engineers if critical
+        if alert.severity in ["critical", "high"]:
+            # This would be enhanced to get actual admin/engineer user IDs
+            admin_user_ids = [1]  # Placeholder - get from database
+            for user_id in admin_user_ids:
+                await self.send_to_user(user_id, message)
+
+    def stats(self) -> Dict[str, Any]:
+        """Send queue depths for monitoring"""
+        return {
+            "broker": type(self.broker).__name__,
+            "connections": len(self.connections),
+            "subscribed_machines": len(self.machine_subscriptions),
+            "queued": sum(connection.depth for connection in self.connections.values()),
+            "clients": [connection.stats() for connection in self.connections.values()],
+        }
+
+    def _serialize(self, message: Union[dict, Payload]) -> Payload:
+        return json.dumps(message) if isinstance(message, dict) else message
+
+    async def _publish(self, target: str, message: Union[dict, Payload]):
+        # Serialized once here; every worker forwards the same payload
+        payload = self._serialize(message)
+        channel = f"{CHANNEL_PREFIX}{target}"
+        if isinstance(payload, bytes):
+            channel += BINARY_SUFFIX
+
+        if not self._started:
+            await self.start()
+        try:
+            await self.broker.publish(channel, payload)
+        except Exception as e:
+            # Keep serving this worker's clients if the broker is unavailable
+            logger.error(f"Websocket broker publish failed, delivering locally: {str(e)}")
+            await self._deliver(target, payload)
+
+    async def _on_broker_message(self, channel: str, payload: Payload):
+        target = channel[len(CHANNEL_PREFIX):]
+        if target.endswith(BINARY_SUFFIX):
+            target = target[:-len(BINARY_SUFFIX)]
+        elif isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        await self._deliver(target, payload)
+
+    async def _deliver(self, target: str, payload: Payload, exclude: Optional[Set[str]] = None):
+        """Queue a payload for the local connections a target addresses"""
+        if target == "all":
+            client_ids = list(self.connections)
+        else:
+            kind, _, key = target.partition(":")
+            if kind == "machine":
+                client_ids = list(self.machine_subscriptions.get(int(key), ()))
+            elif kind == "user":
+                client_ids = list(self.user_connections.get(int(key), ()))
+            elif kind in self.channel_handlers:
+                await self.channel_handlers[kind](key, payload)
+                return
+            else:
+                logger.warning(f"Ignoring websocket message for unknown target {target}")
+                return
+
+        for client_id in client_ids:
+            connection = self.connections.get(client_id)
+            if connection is not None and not (exclude and client_id in exclude):
+                connection.enqueue(payload)
 
 # Create a singleton instance of the connection manager
 manager = ConnectionManager()
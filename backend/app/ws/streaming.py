@@ -0,0 +1,329 @@
+import asyncio
+import json
+import logging
+import math
+import struct
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..config import settings
+from .connection import Payload
+from .manager import ConnectionManager, manager as ws_manager
+
+logger = logging.getLogger(__name__)
+
+# Binary frame layout (little endian):
+#   header  uint8 version, uint8 flags, uint16 sensor count, uint32 machine id,
+#           uint32 point count, float64 start time (unix seconds)
+#   times   float32[points]            seconds since the start time
+#   values  float32[points] per sensor in the order acknowledged at subscribe
+# Missing samples are NaN. With FLAG_DELTA each value is the difference from
+# the previous one, except the first value of a series and the first value
+# after a NaN, which are absolute; decoders restart their running sum there.
+FRAME_HEADER = struct.Struct("<BBHIId")
+FRAME_VERSION = 1
+FLAG_DELTA = 0x01
+
+# Channel kind used to share raw samples between workers
+SAMPLES_CHANNEL = "samples"
+
+# Broker presence key prefix for machines some worker is streaming
+PRESENCE_KEY = "stream:"
+# A worker's presence expires unless refreshed, so crashed workers stop counting
+PRESENCE_TTL_SECONDS = 30.0
+# How long a publisher trusts a presence lookup for a machine it does not stream
+PRESENCE_CACHE_SECONDS = 1.0
+
+# (timestamp, {sensor: value}); timestamps are datetimes or unix seconds
+Sample = Tuple[Union[datetime, float, None], Mapping[str, Any]]
+
+
+def to_unix(timestamp: Union[datetime, float, None]) -> float:
+    """Convert a reading timestamp to unix seconds; naive datetimes are UTC"""
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+class StreamSubscription:
+    """
+    Min/max decimation of one machine's samples for one client.
+
+    Samples fall into buckets of 2 / points_per_second seconds. Each closed
+    bucket contributes two points per sensor, its minimum and maximum in the
+    order they occurred, so spikes survive while the client receives at most
+    the rate it asked for. Updates are O(sensors) per sample.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        machine_id: int,
+        sensors: Sequence[str],
+        points_per_second: float,
+        delta: bool = False
+    ):
+        self.client_id = client_id
+        self.machine_id = machine_id
+        self.sensors = list(sensors)
+        self.points_per_second = points_per_second
+        self.delta = delta
+        self.bucket_width = 2.0 / points_per_second
+        self._bucket_start: Optional[float] = None
+        # End of the newest bucket already closed; older samples are dropped
+        self._closed_until = -math.inf
+        self._opened_at = 0.0
+        self._reset_bucket()
+        self._times: List[float] = []
+        self._values: List[List[float]] = [[] for _ in self.sensors]
+
+    def add(self, timestamp: float, values: Mapping[str, Optional[float]]) -> None:
+        """Fold one sample into the current bucket"""
+        if timestamp < self._closed_until or (self._bucket_start is not None and timestamp < self._bucket_start):
+            # Late sample for an already emitted bucket
+            return
+        if self._bucket_start is None or timestamp >= self._bucket_start + self.bucket_width:
+            self._close_bucket()
+            self._bucket_start = math.floor(timestamp / self.bucket_width) * self.bucket_width
+            self._opened_at = time.monotonic()
+
+        for index, sensor in enumerate(self.sensors):
+            value = values.get(sensor)
+            if value is None:
+                continue
+            if value < self._min[index]:
+                self._min[index] = value
+                self._min_at[index] = timestamp
+            if value > self._max[index]:
+                self._max[index] = value
+                self._max_at[index] = timestamp
+        self._has_data = True
+
+    def take_frame(self, close_before: Optional[float] = None) -> Optional[bytes]:
+        """
+        Pack the closed buckets into a binary frame.
+
+        The open bucket is closed first if it was opened before close_before
+        (a time.monotonic() value), so slow streams are not held back.
+        """
+        if close_before is not None and self._bucket_start is not None and self._opened_at < close_before:
+            self._close_bucket()
+            self._bucket_start = None
+        if not self._times:
+            return None
+
+        start = self._times[0]
+        times = np.asarray(self._times, dtype=np.float64) - start
+        values = np.asarray(self._values, dtype=np.float32).reshape(len(self.sensors), len(self._times))
+        if self.delta and values.shape[1] > 1:
+            previous = values[:, :-1]
+            values[:, 1:] = np.where(np.isnan(previous), values[:, 1:], values[:, 1:] - previous)
+
+        header = FRAME_HEADER.pack(
+            FRAME_VERSION,
+            FLAG_DELTA if self.delta else 0,
+            len(self.sensors),
+            self.machine_id,
+            len(self._times),
+            start
+        )
+        self._times = []
+        self._values = [[] for _ in self.sensors]
+        return header + times.astype(np.float32).tobytes() + values.tobytes()
+
+    def _reset_bucket(self) -> None:
+        self._min = [math.inf] * len(self.sensors)
+        self._max = [-math.inf] * len(self.sensors)
+        self._min_at = [0.0] * len(self.sensors)
+        self._max_at = [0.0] * len(self.sensors)
+        self._has_data = False
+
+    def _close_bucket(self) -> None:
+        if self._bucket_start is None:
+            return
+        self._closed_until = self._bucket_start + self.bucket_width
+        if not self._has_data:
+            return
+        self._times.append(self._bucket_start)
+        self._times.append(self._bucket_start + self.bucket_width / 2)
+        for index, series in enumerate(self._values):
+            low, high = self._min[index], self._max[index]
+            if low == math.inf:
+                series.extend((math.nan, math.nan))
+            elif self._min_at[index] <= self._max_at[index]:
+                series.extend((low, high))
+            else:
+                series.extend((high, low))
+        self._reset_bucket()
+
+
+class SensorStreamHub:
+    """
+    Live decimated sensor streams on top of the websocket manager.
+
+    Ingest paths publish raw samples once; they reach every worker through the
+    manager's broker, and each worker folds them into its local subscriptions.
+    A flush task packs and queues one binary frame per subscription every
+    flush_interval seconds.
+
+    Workers with subscribers for a machine keep a presence entry for it on
+    the broker, and samples for machines nobody streams are never encoded or
+    published.
+    """
+
+    def __init__(self, manager: ConnectionManager, flush_interval: float = 0.1, max_points_per_second: float = 1000.0):
+        self.manager = manager
+        self.flush_interval = flush_interval
+        self.max_points_per_second = max_points_per_second
+        self.subscriptions: Dict[int, Dict[str, StreamSubscription]] = {}
+        self.worker_id = uuid.uuid4().hex
+        # machine id -> when this worker last refreshed its presence (time.monotonic())
+        self._announced: Dict[int, float] = {}
+        # machine id -> (valid until, whether another worker streams it)
+        self._remote: Dict[int, Tuple[float, bool]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        manager.register_channel(SAMPLES_CHANNEL, self._on_samples)
+
+    async def subscribe(
+        self,
+        client_id: str,
+        machine_id: int,
+        sensors: Sequence[str],
+        points_per_second: float,
+        delta: bool = False
+    ) -> StreamSubscription:
+        """Start (or replace) a client's stream for a machine"""
+        if not sensors:
+            raise ValueError("At least one sensor is required")
+        points_per_second = min(max(float(points_per_second), 1.0), self.max_points_per_second)
+
+        subscription = StreamSubscription(client_id, int(machine_id), sensors, points_per_second, delta)
+        self.subscriptions.setdefault(subscription.machine_id, {})[client_id] = subscription
+        if subscription.machine_id not in self._announced:
+            await self._announce(subscription.machine_id)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+        return subscription
+
+    def unsubscribe(self, client_id: str, machine_id: Optional[int] = None) -> None:
+        """Stop a client's stream for one machine, or all its streams"""
+        machine_ids = [int(machine_id)] if machine_id is not None else list(self.subscriptions)
+        for key in machine_ids:
+            clients = self.subscriptions.get(key)
+            if clients is not None:
+                clients.pop(client_id, None)
+                if not clients:
+                    del self.subscriptions[key]
+
+    async def publish_samples(self, machine_id: int, samples: List[Sample]) -> None:
+        """Share raw samples for a machine with every worker that streams it"""
+        if not samples or not await self.has_subscribers(machine_id):
+            return
+        try:
+            await self.manager.publish(
+                f"{SAMPLES_CHANNEL}:{machine_id}",
+                json.dumps({
+                    "t": [to_unix(timestamp) for timestamp, _ in samples],
+                    "v": [
+                        {
+                            sensor: float(value)
+                            for sensor, value in values.items()
+                            if isinstance(value, (int, float)) and not isinstance(value, bool)
+                        }
+                        for _, values in samples
+                    ]
+                })
+            )
+        except Exception as e:
+            logger.error(f"Error publishing samples for machine {machine_id}: {str(e)}")
+
+    async def has_subscribers(self, machine_id: int) -> bool:
+        """Whether any worker streams a machine; other workers' presence is cached briefly"""
+        machine_id = int(machine_id)
+        if machine_id in self.subscriptions:
+            return True
+        now = time.monotonic()
+        cached = self._remote.get(machine_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        try:
+            await self.manager.start()
+            present = await self.manager.broker.has_presence(f"{PRESENCE_KEY}{machine_id}")
+        except Exception as e:
+            # Publish rather than silently starve subscribers
+            logger.error(f"Error checking stream presence for machine {machine_id}: {str(e)}")
+            present = True
+        self._remote[machine_id] = (now + PRESENCE_CACHE_SECONDS, present)
+        return present
+
+    async def _announce(self, machine_id: int) -> None:
+        try:
+            await self.manager.broker.set_presence(f"{PRESENCE_KEY}{machine_id}", self.worker_id, PRESENCE_TTL_SECONDS)
+            self._announced[machine_id] = time.monotonic()
+        except Exception as e:
+            logger.error(f"Error announcing stream presence for machine {machine_id}: {str(e)}")
+
+    async def _sync_presence(self) -> None:
+        """Refresh presence for streamed machines and withdraw it for the rest"""
+        now = time.monotonic()
+        for machine_id, announced_at in list(self._announced.items()):
+            if machine_id not in self.subscriptions:
+                del self._announced[machine_id]
+                try:
+                    await self.manager.broker.clear_presence(f"{PRESENCE_KEY}{machine_id}", self.worker_id)
+                except Exception as e:
+                    logger.error(f"Error clearing stream presence for machine {machine_id}: {str(e)}")
+            elif now - announced_at > PRESENCE_TTL_SECONDS / 3:
+                await self._announce(machine_id)
+        for machine_id in self.subscriptions:
+            if machine_id not in self._announced:
+                await self._announce(machine_id)
+
+    async def _on_samples(self, key: str, payload: Payload) -> None:
+        clients = self.subscriptions.get(int(key))
+        if not clients:
+            return
+        message = json.loads(payload)
+        for subscription in clients.values():
+            for timestamp, values in zip(message["t"], message["v"]):
+                subscription.add(timestamp, values)
+
+    async def _flush_loop(self) -> None:
+        while self.subscriptions:
+            await asyncio.sleep(self.flush_interval)
+            now = time.monotonic()
+            for machine_id, clients in list(self.subscriptions.items()):
+                for client_id, subscription in list(clients.items()):
+                    if client_id not in self.manager.connections:
+                        self.unsubscribe(client_id, machine_id)
+                        continue
+                    try:
+                        frame = subscription.take_frame(close_before=now - subscription.bucket_width)
+                    except Exception as e:
+                        logger.error(f"Error packing stream frame for {client_id}: {str(e)}", exc_info=True)
+                        continue
+                    if frame is not None:
+                        await self.manager.send_personal_message(client_id, frame)
+            await self._sync_presence()
+        await self._sync_presence()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "machines": len(self.subscriptions),
+            "subscriptions": sum(len(clients) for clients in self.subscriptions.values()),
+        }
+
+# Create a singleton instance on the shared websocket manager
+sensor_stream = SensorStreamHub(
+    ws_manager,
+    flush_interval=settings.WS_STREAM_FLUSH_MS / 1000.0,
+    max_points_per_second=settings.WS_STREAM_MAX_POINTS_PER_SECOND
+)
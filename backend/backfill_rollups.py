@@ -0,0 +1,47 @@
+import argparse
+import logging
+import sys
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal
+from app.services.rollup_service import rollup_service
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild sensor rollup tables from raw sensor data")
+    parser.add_argument("--start", type=datetime.fromisoformat, required=True, help="Start time (ISO 8601)")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="End time (ISO 8601), defaults to now")
+    parser.add_argument("--machine-id", type=int, default=None, help="Only rebuild this machine")
+    parser.add_argument("--window-days", type=int, default=1, help="Days rebuilt per transaction")
+    return parser.parse_args(argv)
+
+
+def backfill_rollups(argv=None):
+    args = parse_args(argv)
+    end = args.end or datetime.utcnow()
+    if end <= args.start:
+        print("End time must be after start time")
+        return 1
+
+    db = SessionLocal()
+    try:
+        print(f"Backfilling rollups from {args.start} to {end}...")
+        stats = rollup_service.backfill(
+            db,
+            args.start,
+            end,
+            machine_id=args.machine_id,
+            window=timedelta(days=args.window_days)
+        )
+        print(
+            f"Rebuilt {stats['windows']} windows: {stats['rows_read']} readings -> "
+            f"{stats['rollup_rows']} rollup rows in {stats['elapsed_seconds']}s"
+        )
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(backfill_rollups())
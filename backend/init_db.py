@@ -1,7 +1,5 @@
 import sys
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+from app.database import Base, SessionLocal, engine, get_db
 from app.models.machine import Machine
 from app.models.sensor_data import SensorData
 from app.models.prediction import Prediction
@@ -11,18 +9,11 @@ from app.models.model import Model
 from app.models.user import User
 
 def init_db():
-    # Create database engine
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./toolwear.db"
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-    
     # Create all tables
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
     
     # Create a session
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = SessionLocal()
     
     try:
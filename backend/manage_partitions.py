@@ -0,0 +1,47 @@
+import argparse
+import logging
+import sys
+
+from app.database import SessionLocal
+from app.services.partition_service import partition_service
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Manage sensor_data partitions and retention")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser(
+        "convert",
+        help="Convert sensor_data into a monthly partitioned table (PostgreSQL, needs a maintenance window)"
+    )
+    subcommands.add_parser(
+        "maintain",
+        help="Create upcoming partitions, move cold months and archive expired ones"
+    )
+    return parser.parse_args(argv)
+
+
+def manage_partitions(argv=None):
+    args = parse_args(argv)
+    db = SessionLocal()
+    try:
+        if args.command == "convert":
+            print("Partitioning sensor_data...")
+            created = partition_service.partition_table(db)
+            print(f"Created {created} monthly partitions")
+        else:
+            stats = partition_service.maintain(db)
+            print(
+                f"Created {len(stats['created'])} partitions, moved {len(stats['moved'])} months, "
+                f"archived {len(stats['archived'])} months"
+            )
+        return 0
+    except ValueError as e:
+        print(str(e))
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(manage_partitions())
@@ -0,0 +1,4 @@
+import os
+
+# Never let tests touch the tracked development database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
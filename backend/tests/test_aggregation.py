@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import aggregation_service as aggregation_module
+from app.services.aggregation_service import AggregationService
+from app.services.partition_service import SensorPartitionService
+
+START = datetime(2026, 3, 4, 22, 0)  # A Wednesday
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine("sqlite://")
+    models.SensorData.__table__.create(engine)
+    # Readings every 20 minutes for five days
+    with Session(engine) as session:
+        session.execute(models.SensorData.__table__.insert(), [
+            {"machine_id": 1, "timestamp": START + timedelta(minutes=20 * step), "temperature": float(step)}
+            for step in range(360)
+        ])
+        session.commit()
+        monkeypatch.setattr(aggregation_module, "partition_service", SensorPartitionService(str(tmp_path)))
+        yield session
+
+
+def _series(buckets, function):
+    return [(bucket["timestamp"], bucket["values"]["temperature"][function]) for bucket in buckets]
+
+
+@pytest.mark.parametrize("interval", ["hour", "day", "week", "month", 7200, timedelta(minutes=90)])
+def test_sql_and_numpy_paths_agree(db, interval):
+    aggregation = AggregationService()
+    end = START + timedelta(days=5)
+    sql = aggregation.aggregate(db, 1, START, end, interval, ["temperature"], ("avg", "min", "max", "count"), use_rollups=False)
+    # A percentile cannot be computed by SQLite, so the rows are bucketed with NumPy
+    numpy = aggregation.aggregate(db, 1, START, end, interval, ["temperature"], ("avg", "min", "max", "count", "p50"), use_rollups=False)
+
+    assert [bucket["timestamp"] for bucket in sql] == [bucket["timestamp"] for bucket in numpy]
+    for function in ("avg", "min", "max", "count"):
+        assert _series(sql, function) == pytest.approx(_series(numpy, function))
+
+
+def test_weeks_start_on_monday(db):
+    buckets = AggregationService().aggregate(
+        db, 1, START, START + timedelta(days=5), "week", ["temperature"], ("count",), use_rollups=False
+    )
+    assert [(bucket["timestamp"], bucket["count"]) for bucket in buckets] == [
+        (datetime(2026, 3, 2), 294), (datetime(2026, 3, 9), 66)
+    ]
+
+
+def test_unknown_sensors_and_functions_are_rejected(db):
+    aggregation = AggregationService()
+    with pytest.raises(ValueError):
+        aggregation.aggregate(db, 1, START, START, "hour", ["torque"])
+    with pytest.raises(ValueError):
+        aggregation.aggregate(db, 1, START, START, "hour", ["temperature"], ("median",))
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.models.alert import AlertSeverity, AlertStatus
+from app.services.alert_stats import AlertStatsEngine
+
+NOW = datetime(2026, 1, 2, 12, 30)
+ALERTS = models.Alert.__table__
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    ALERTS.create(engine)
+    with Session(engine) as session:
+        session.execute(ALERTS.insert(), [
+            {"id": 1, "machine_id": 1, "timestamp": datetime(2026, 1, 2, 9, 10), "title": "t", "message": "m",
+             "severity": AlertSeverity.CRITICAL, "status": AlertStatus.OPEN},
+            {"id": 2, "machine_id": 1, "timestamp": datetime(2026, 1, 2, 9, 50), "title": "t", "message": "m",
+             "severity": AlertSeverity.WARNING, "status": AlertStatus.RESOLVED},
+            {"id": 3, "machine_id": 2, "timestamp": datetime(2026, 1, 2, 12, 5), "title": "t", "message": "m",
+             "severity": AlertSeverity.INFO, "status": AlertStatus.OPEN},
+            # Outside a four hour window
+            {"id": 4, "machine_id": 1, "timestamp": datetime(2026, 1, 2, 8, 59), "title": "t", "message": "m",
+             "severity": AlertSeverity.INFO, "status": AlertStatus.OPEN},
+        ])
+        session.commit()
+        yield session
+
+
+@pytest.fixture
+def engine():
+    engine = AlertStatsEngine(ttl=60)
+    engine.scans = []
+    scan = engine._scan
+
+    def recording_scan(db, machine_id, start, end):
+        engine.scans.append(start)
+        return scan(db, machine_id, start, end)
+
+    engine._scan = recording_scan
+    return engine
+
+
+def test_counts_by_status_severity_and_hour(db, engine):
+    stats = engine.stats(db, time_range_hours=4, now=NOW)
+
+    assert stats["total_alerts"] == 3
+    assert stats["status_counts"] == {"open": 2, "acknowledged": 0, "resolved": 1}
+    assert stats["severity_counts"] == {"info": 1, "warning": 1, "critical": 1}
+    assert [bucket["count"] for bucket in stats["alerts_over_time"]] == [2, 0, 0, 1]
+    assert stats["alerts_over_time"][0]["time"] == "2026-01-02T09:00:00"
+
+    machine = engine.stats(db, time_range_hours=4, machine_id=1, now=NOW)
+    assert machine["total_alerts"] == 2
+
+
+def test_closed_hours_are_cached_until_invalidated(db, engine):
+    engine.stats(db, time_range_hours=4, now=NOW)
+    engine.stats(db, time_range_hours=4, now=NOW)
+    # The second refresh only reads the current hour
+    assert engine.scans == [datetime(2026, 1, 2, 9), datetime(2026, 1, 2, 12)]
+
+    db.execute(update(ALERTS).where(ALERTS.c.id == 1).values(status=AlertStatus.RESOLVED))
+    db.commit()
+    engine.invalidate(1, datetime(2026, 1, 2, 9, 10))
+    stats = engine.stats(db, time_range_hours=4, now=NOW)
+
+    assert engine.scans[-1] == datetime(2026, 1, 2, 9)
+    assert stats["status_counts"] == {"open": 1, "acknowledged": 0, "resolved": 2}
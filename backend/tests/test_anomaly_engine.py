@@ -0,0 +1,78 @@
+import asyncio
+
+import numpy as np
+
+from app.services.anomaly_engine import AnomalyEngine, DetectorStore, SensorDetector
+
+
+def test_sliding_window_statistics_match_numpy():
+    detector = SensorDetector(("1", "temperature"), window_size=50, ewma_alpha=0.1)
+    values = np.random.default_rng(3).normal(70.0, 2.0, 237)
+    for timestamp, value in enumerate(values, start=1):
+        detector.update(float(value), float(timestamp))
+        window = values[max(0, timestamp - 50):timestamp]
+        assert abs(detector.mean - window.mean()) < 1e-9
+        assert abs(detector.std - window.std()) < 1e-9
+
+    np.testing.assert_array_equal(detector.window(), values[-50:])
+
+
+def test_stale_and_non_finite_readings_are_ignored():
+    detector = SensorDetector(("1", "rpm"), window_size=10, ewma_alpha=0.1)
+    assert detector.update(100.0, 10.0) is not None
+    assert detector.update(200.0, 10.0) is None
+    assert detector.update(float("nan"), 11.0) is None
+    assert detector.count == 1
+
+
+def test_outliers_are_flagged_before_and_after_the_first_fit():
+    engine = AnomalyEngine(window_size=100, min_samples=10)
+    values = np.random.default_rng(5).normal(70.0, 1.0, 100)
+    for timestamp, value in enumerate(values, start=1):
+        engine.update(1, "temperature", float(value), float(timestamp))
+    # Scored by window z-score until a model is fitted
+    assert engine.update(1, "temperature", 120.0, 101.0).is_anomaly
+
+    assert asyncio.run(engine.refit_due()) == 1
+    detector = engine.get_detector("1", "temperature")
+    assert detector.model is not None and detector.samples_since_fit == 0
+    assert engine.update(1, "temperature", 130.0, 102.0).is_anomaly
+    assert not engine.update(1, "temperature", float(np.median(values)), 103.0).is_anomaly
+
+
+def test_store_evicts_least_recently_used_and_restores_snapshots(tmp_path):
+    def factory(key):
+        return SensorDetector(key, window_size=8, ewma_alpha=0.1)
+
+    store = DetectorStore(factory, max_detectors=2, snapshot_dir=str(tmp_path))
+    for machine in ("1", "2"):
+        store.get((machine, "rpm")).update(float(machine), 1.0)
+    store.get(("1", "rpm"))
+    store.get(("3", "rpm"))
+
+    assert len(store) == 2
+    assert store.stats()["evicted"] == 1 and store.stats()["unsaved"] == 1
+    # The evicted detector and the changed one still in memory
+    assert asyncio.run(store.flush()) == 2
+    assert (tmp_path / "2__rpm.npz").exists()
+
+    # A fresh store, as after a restart, picks the window back up
+    restarted = DetectorStore(factory, max_detectors=2, snapshot_dir=str(tmp_path))
+    detector = restarted.get(("2", "rpm"))
+    assert (detector.count, detector.mean, detector.last_timestamp) == (1, 2.0, 1.0)
+    assert restarted.stats()["restored"] == 1
+
+
+def test_idle_detectors_expire(tmp_path):
+    store = DetectorStore(
+        lambda key: SensorDetector(key, window_size=8, ewma_alpha=0.1),
+        ttl=60.0,
+        snapshot_dir=str(tmp_path)
+    )
+    store.get(("1", "rpm")).update(1.0, 1.0)
+    store.get(("1", "rpm")).last_seen -= 120.0
+
+    assert store.expire() == 1
+    assert len(store) == 0
+    asyncio.run(store.flush())
+    assert (tmp_path / "1__rpm.npz").exists()
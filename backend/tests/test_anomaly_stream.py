@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import anomaly_service
+from app.services.anomaly_engine import AnomalyEngine
+from app.services.anomaly_stream import AnomalyStream
+
+START = datetime(2026, 1, 1, 8, 0)
+
+
+@pytest.fixture(autouse=True)
+def engine(monkeypatch):
+    engine = AnomalyEngine(window_size=50, min_samples=10)
+    monkeypatch.setattr(anomaly_service, "anomaly_engine", engine)
+    return engine
+
+
+def _readings(machine_id, values, offset=0):
+    return [
+        {
+            "machine_id": machine_id,
+            "sensor_type": "temperature",
+            "value": value,
+            "timestamp": START + timedelta(seconds=offset + index)
+        }
+        for index, value in enumerate(values)
+    ]
+
+
+def test_anomalies_are_pushed_once_per_machine():
+    stream = AnomalyStream()
+    received = []
+
+    async def failing(machine_id, message):
+        raise RuntimeError("client went away")
+
+    async def collect(machine_id, message):
+        received.append((machine_id, message))
+
+    stream.subscribe(failing)
+    stream.subscribe(collect)
+
+    async def run():
+        baseline = [70.0 + 0.1 * (index % 5) for index in range(20)]
+        quiet = await stream.publish_readings(_readings(1, baseline) + _readings(2, baseline))
+        spikes = await stream.publish_readings(_readings(1, [150.0], offset=20) + _readings(2, [70.2], offset=20))
+        return quiet, spikes
+
+    quiet, spikes = asyncio.run(run())
+    assert quiet == []
+    assert [anomaly["value"] for anomaly in spikes] == [150.0]
+    # One message for machine 1, delivered despite the failing subscriber
+    [(machine_id, message)] = received
+    assert machine_id == 1 and message["type"] == "anomaly_detected"
+    assert [anomaly["value"] for anomaly in message["anomalies"]] == [150.0]
+
+
+def test_wide_rows_are_split_into_sensor_readings(engine):
+    stream = AnomalyStream()
+    asyncio.run(stream.publish_sensor_data(3, {"temperature": 70.0, "rpm": 1000, "vibration": None}, START))
+
+    assert engine.get_detector(3, "temperature").count == 1
+    assert engine.get_detector(3, "rpm").count == 1
+    assert engine.get_detector(3, "vibration").count == 0
+
+
+def test_unsubscribed_clients_receive_nothing():
+    stream = AnomalyStream()
+    received = []
+
+    async def collect(machine_id, message):
+        received.append(message)
+
+    stream.subscribe(collect)
+    stream.unsubscribe(collect)
+    asyncio.run(stream.publish(1, {"type": "anomaly_detected"}))
+    assert received == []
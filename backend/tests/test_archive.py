@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.archive_service import SensorArchiveService
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.SensorData.__table__.create(engine)
+    with Session(engine) as session:
+        session.execute(models.SensorData.__table__.insert(), [
+            {"machine_id": machine_id, "timestamp": START + timedelta(hours=6 * step), "temperature": float(step)}
+            for machine_id in (1, 2)
+            for step in range(8)
+        ])
+        session.commit()
+        yield session
+
+
+def test_export_pending_writes_day_partitions_once(db, tmp_path):
+    archive = SensorArchiveService(str(tmp_path), chunk_size=3)
+
+    assert archive.export_pending(db, now=datetime(2026, 1, 3, 5)) == 12
+    assert archive.watermark() == datetime(2026, 1, 3)
+    assert sorted(path.parent.name for path in archive.root.glob("machine_id=1/*/part-0.parquet")) == [
+        "date=2026-01-01", "date=2026-01-02"
+    ]
+    # Nothing new until another day completes, and re-exports merge by id
+    assert archive.export_pending(db, now=datetime(2026, 1, 3, 23)) == 0
+    archive.export(db.connection(), datetime(2026, 1, 1), datetime(2026, 1, 3))
+    assert archive.scan(["temperature"]).num_rows == 12
+
+
+def test_scan_prunes_by_machine_and_time(db, tmp_path):
+    archive = SensorArchiveService(str(tmp_path))
+    archive.export(db.connection(), datetime(2026, 1, 1), datetime(2026, 1, 4))
+
+    table = archive.scan(["temperature"], machine_ids=[2], start_time=START + timedelta(hours=6), end_time=START + timedelta(hours=24))
+    assert table.column_names == ["machine_id", "timestamp", "temperature"]
+    assert table.column("machine_id").to_pylist() == [2, 2, 2]
+    assert table.column("temperature").to_pylist() == [1.0, 2.0, 3.0]
+
+    arrays = archive.to_numpy(["temperature"], machine_ids=[1])
+    assert arrays["temperature"].tolist() == [float(step) for step in range(8)]
+
+    with pytest.raises(ValueError):
+        archive.scan(["torque"])
+
+
+def test_ipc_stream_round_trips(db, tmp_path):
+    archive = SensorArchiveService(str(tmp_path))
+    archive.export(db.connection(), datetime(2026, 1, 1), datetime(2026, 1, 4))
+
+    table = pa.ipc.open_stream(b"".join(archive.ipc_stream(["temperature"], machine_ids=[1]))).read_all()
+    assert table.num_rows == 8
+    assert table.schema.names == ["machine_id", "timestamp", "temperature"]
+
+
+def test_empty_archive_scans_to_empty_tables(tmp_path):
+    archive = SensorArchiveService(str(tmp_path))
+    assert archive.watermark() is None
+    assert archive.scan(["temperature"]).num_rows == 0
+    assert list(archive.batches()) == []
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models
+from app.database import get_async_db
+from app.db.engine import create_async_db_engine
+from app.routes import sensor
+from app.services.live_state import live_state
+
+
+@pytest.fixture
+def async_engine(tmp_path):
+    engine = create_async_db_engine(f"sqlite:///{tmp_path / 'app.db'}")
+
+    async def setup():
+        async with engine.begin() as connection:
+            for model in (models.Machine, models.SensorData, models.Prediction, models.Alert):
+                await connection.run_sync(model.__table__.create)
+            await connection.execute(models.Machine.__table__.insert(), [{"id": 1, "name": "mill-1"}])
+            await connection.execute(models.SensorData.__table__.insert(), [
+                {"machine_id": 1, "timestamp": datetime(2026, 1, 1, 8, minute), "temperature": 70.0 + minute}
+                for minute in range(3)
+            ])
+
+    asyncio.run(setup())
+    yield engine
+    live_state.clear()
+    asyncio.run(engine.dispose())
+
+
+def test_async_engine_uses_aiosqlite_with_pragmas(async_engine):
+    async def run():
+        async with async_engine.connect() as connection:
+            return (await connection.execute(text("PRAGMA journal_mode"))).scalar()
+
+    assert async_engine.dialect.driver == "aiosqlite"
+    assert asyncio.run(run()) == "wal"
+
+
+def test_latest_reading_route_reads_through_async_session(async_engine):
+    session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_test_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(sensor.router, prefix="/api/sensors")
+    app.dependency_overrides[get_async_db] = get_test_db
+    client = TestClient(app)
+
+    response = client.get("/api/sensors/latest/machine/1")
+    assert response.status_code == 200, response.text
+    assert response.json()["temperature"] == 72.0
+    assert client.get("/api/sensors/latest/machine/2").status_code == 404
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from app.services.cpu_executor import CPUExecutionStage, StageSaturatedError
+
+
+def test_admit_rejects_work_beyond_capacity():
+    stage = CPUExecutionStage("test", max_workers=2, max_queue=1)
+
+    async def run():
+        async with stage.admit(2):
+            with pytest.raises(StageSaturatedError):
+                async with stage.admit(2):
+                    pass
+            async with stage.admit():
+                assert stage.stats()["in_flight"] == 3
+        # Slots are released when the block exits
+        async with stage.admit(3):
+            return await stage.run_in_thread(sum, [1, 2, 3])
+
+    assert asyncio.run(run()) == 6
+    assert stage.stats()["in_flight"] == 0
+    stage.shutdown()
+
+
+def test_slots_are_released_when_work_fails():
+    stage = CPUExecutionStage("test", max_workers=1, max_queue=0)
+
+    async def run():
+        with pytest.raises(ZeroDivisionError):
+            async with stage.admit():
+                await stage.run(divmod, 1, 0)
+
+    asyncio.run(run())
+    assert stage.stats()["in_flight"] == 0
+    stage.shutdown()
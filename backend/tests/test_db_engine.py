@@ -0,0 +1,36 @@
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.db.engine import InstrumentedQueuePool, async_database_url, create_db_engine
+
+
+def test_file_sqlite_gets_a_pool_and_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    try:
+        assert isinstance(engine.pool, InstrumentedQueuePool)
+        assert engine.pool.size() == settings.DB_POOL_SIZE
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+    finally:
+        engine.dispose()
+
+
+def test_memory_sqlite_shares_one_connection():
+    engine = create_db_engine("sqlite://")
+    assert isinstance(engine.pool, StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE readings (value REAL)"))
+        connection.execute(text("INSERT INTO readings VALUES (1.5)"))
+    # A second checkout sees the same database
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT value FROM readings")).scalar() == 1.5
+
+
+def test_async_urls_use_asyncio_drivers():
+    assert async_database_url("sqlite:///./toolwear.db").drivername == "sqlite+aiosqlite"
+    url = async_database_url("postgresql://user:secret@db/toolwear")
+    assert url.drivername == "postgresql+asyncpg" and url.password == "secret"
+    assert async_database_url("sqlite+aiosqlite:///x.db").drivername == "sqlite+aiosqlite"
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.database import get_db
+from app.models.alert import AlertSeverity, AlertStatus
+from app.routes import machine
+from app.services.machine_service import machine_service
+
+START = datetime(2026, 1, 1, 8, 0)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (models.Machine, models.SensorData, models.Prediction, models.Alert):
+        model.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(models.Machine.__table__.insert(), [
+            {"id": machine_id, "name": f"mill-{machine_id}", "status": "operational"} for machine_id in (1, 2, 3)
+        ])
+        connection.execute(models.SensorData.__table__.insert(), [
+            {"machine_id": 1, "timestamp": START + timedelta(minutes=step), "temperature": float(step),
+             "rpm": 1000.0 if step < 4 else None}
+            for step in range(6)
+        ] + [{"machine_id": 2, "timestamp": START, "temperature": 50.0, "rpm": None}])
+        connection.execute(models.Prediction.__table__.insert(), [
+            {"machine_id": 1, "rul_hours": rul, "wear_category": "normal", "confidence": 0.9,
+             "model_version": "1", "prediction_time": START + timedelta(hours=hours)}
+            for hours, rul in ((1, 80.0), (2, 60.0), (0, 99.0))
+        ])
+        connection.execute(models.Alert.__table__.insert(), [
+            {"machine_id": 1, "title": "t", "message": "m", "severity": severity, "status": alert_status}
+            for severity, alert_status in (
+                (AlertSeverity.CRITICAL, AlertStatus.OPEN),
+                (AlertSeverity.CRITICAL, AlertStatus.RESOLVED),
+                (AlertSeverity.WARNING, AlertStatus.OPEN),
+            )
+        ])
+    return engine
+
+
+def test_fleet_health_uses_a_fixed_number_of_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with Session(engine) as db:
+        health = machine_service.get_fleet_health(db, sensor_window=4)
+
+    assert len(statements) == 4
+    first = health[1]
+    assert (first.avg_rul, first.last_prediction_time) == (60.0, START + timedelta(hours=2))
+    assert first.alert_count == {"info": 0, "warning": 1, "critical": 2}
+    assert first.open_alert_count == {"info": 0, "warning": 1, "critical": 1}
+    # Last four readings only; rpm's latest is its newest non-NULL value
+    assert first.sensor_stats["temperature"] == {"min": 2.0, "max": 5.0, "avg": 3.5, "latest": 5.0}
+    assert first.sensor_stats["rpm"] == {"min": 1000.0, "max": 1000.0, "avg": 1000.0, "latest": 1000.0}
+    assert health[3].sensor_stats == {} and health[3].avg_rul is None
+
+
+def test_health_route_filters_machines(engine):
+    app = FastAPI()
+    app.include_router(machine.router, prefix="/api/machines")
+    with Session(engine) as db:
+        app.dependency_overrides[get_db] = lambda: db
+        response = TestClient(app).get("/api/machines/machines/health", params={"machine_ids": [2, 3]})
+
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    assert [row["machine_id"] for row in data] == [2, 3]
+    assert data[0]["sensor_stats"]["temperature"]["latest"] == 50.0
@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.services.image_processing import decode_and_preprocess, decode_image, jpeg_dimensions
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_jpeg_dimensions_are_read_from_the_header():
+    assert jpeg_dimensions(_jpeg(640, 480)) == (640, 480)
+    assert jpeg_dimensions(cv2.imencode(".png", np.zeros((4, 4, 3), np.uint8))[1].tobytes()) is None
+
+
+def test_large_jpegs_are_decoded_at_reduced_scale():
+    # 1000x900 is more than 4x the target size but not 8x
+    image = decode_image(_jpeg(1000, 900), (224, 224))
+    assert image.shape == (225, 250, 3)
+    assert decode_image(_jpeg(1000, 900)).shape == (900, 1000, 3)
+
+
+def test_preprocess_writes_normalized_rgb_into_the_batch_slot():
+    image = np.zeros((300, 400, 3), dtype=np.uint8)
+    image[..., 2] = 255  # Pure red in BGR
+    data = cv2.imencode(".png", image)[1].tobytes()
+    batch = np.zeros((2, 224, 224, 3), dtype=np.float32)
+
+    result = decode_and_preprocess(data, (224, 224), batch[1])
+
+    assert np.shares_memory(result, batch)
+    np.testing.assert_allclose(batch[1, ..., 0], 1.0)
+    np.testing.assert_allclose(batch[1, ..., 1:], 0.0)
+    assert not batch[0].any()
+
+
+def test_undecodable_bytes_are_rejected():
+    with pytest.raises(ValueError):
+        decode_image(b"not an image", (224, 224))
@@ -0,0 +1,50 @@
+import io
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.models.sensor_rollup import ROLLUP_MODELS
+from app.services.ingest_service import ingest_service
+from app.services.live_state import live_state
+
+HEADER = "timestamp,temperature,vibration,pressure,rpm,current,voltage"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.SensorData.__table__.create(engine)
+    for model in ROLLUP_MODELS.values():
+        model.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    live_state.clear()
+
+
+@pytest.mark.parametrize("content", [b"timestamp,temperature\n", b"timestamp,temperature", b"", b"\n"])
+def test_bad_header_is_rejected_before_reading_chunks(content):
+    # Raised by the call itself, not on the first chunk
+    with pytest.raises(ValueError):
+        ingest_service.read_csv_chunks(io.BytesIO(content))
+
+
+def test_header_only_file_reads_no_rows():
+    chunks = list(ingest_service.read_csv_chunks(io.BytesIO(f"{HEADER}\n".encode())))
+    assert sum(len(chunk) for chunk in chunks) == 0
+
+
+def test_csv_is_ingested_in_chunks(db):
+    content = (
+        "\ufeffid," + HEADER + ",operator\n"
+        "9,2026-01-01 08:00:00,70.0,1.0,5.0,1000,1.0,230.0,ann\n"
+        "9,2026-01-01 08:01:00,not a number,,,,,,bob\n"
+        "9,2026-01-01 08:02:00,72.0,1.2,5.0,1000,1.0,230.0,cy\n"
+    ).encode()
+    stats = ingest_service.ingest_csv(db, 4, io.BytesIO(content), chunk_size=1)
+
+    assert (stats["rows_read"], stats["rows_inserted"], stats["chunks"]) == (3, 2, 3)
+    sensor_data = models.SensorData.__table__
+    rows = db.execute(select(sensor_data.c.machine_id, sensor_data.c.temperature).order_by(sensor_data.c.id)).all()
+    assert rows == [(4, 70.0), (4, 72.0)]
@@ -0,0 +1,122 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import models
+from app.models.sensor_rollup import ROLLUP_MODELS
+from app.services.live_state import INVALIDATION_CHANNEL, LiveStateStore, RollingWindow, live_state
+from app.services.upload_service import UploadPipeline
+from app.services.websocket_service import websocket_manager
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sensors.db'}")
+    models.SensorData.__table__.create(engine)
+    for model in ROLLUP_MODELS.values():
+        model.__table__.create(engine)
+    yield engine
+    live_state.clear()
+    engine.dispose()
+
+
+def test_upload_frames_reach_live_state_after_commit(engine, tmp_path, monkeypatch):
+    recorded = []
+
+    def record_frame(frame):
+        # Applied only once the rows are visible to other sessions
+        with Session(engine) as other:
+            assert other.scalar(select(func.count()).select_from(models.SensorData.__table__)) == len(frame)
+        recorded.append(frame)
+
+    monkeypatch.setattr(live_state, "record_frame", record_frame)
+    path = tmp_path / "run.csv"
+    path.write_text(
+        "timestamp,temperature,vibration,pressure,rpm,current,voltage\n"
+        "2026-01-01 08:05:00,10.0,1.0,5.0,1000,1.0,230.0\n"
+        "2026-01-01 08:40:00,20.0,2.0,5.0,1000,1.0,230.0\n"
+    )
+    pipeline = UploadPipeline(chunk_size=64)
+    job = pipeline.create_job(7, path)
+    asyncio.run(pipeline.run(job, sessionmaker(bind=engine)))
+
+    assert job.status == "completed", job.error
+    [applied] = recorded
+    assert applied["machine_id"].tolist() == [7, 7]
+    assert applied["temperature"].tolist() == [10.0, 20.0]
+
+
+def test_stop_unregisters_and_drains_publishes():
+    store = LiveStateStore()
+    published = []
+
+    async def publish():
+        await asyncio.sleep(0.01)
+        published.append("sent")
+
+    async def run():
+        store.start()
+        assert INVALIDATION_CHANNEL in websocket_manager.channel_handlers
+        store._tasks.add(asyncio.get_running_loop().create_task(publish()))
+        stuck = asyncio.get_running_loop().create_task(asyncio.sleep(60))
+        store._tasks.add(stuck)
+        await store.stop(timeout=0.1)
+        return stuck
+
+    stuck = asyncio.run(run())
+    assert published == ["sent"]
+    assert stuck.cancelled()
+    assert not store._tasks
+    assert INVALIDATION_CHANNEL not in websocket_manager.channel_handlers
+
+
+def test_rolling_window_matches_a_recomputed_window():
+    window = RollingWindow(7)
+    values = []
+    generator = random.Random(11)
+    for step in range(100):
+        value = None if step % 5 == 3 else generator.uniform(-50.0, 50.0)
+        window.push(value)
+        values.append(value)
+        present = [v for v in values[-7:] if v is not None]
+        stats = window.stats()
+        assert stats["min"] == min(present) and stats["max"] == max(present)
+        assert stats["avg"] == pytest.approx(sum(present) / len(present), abs=1e-9)
+        assert stats["latest"] == present[-1]
+
+    # A window of NULL readings has no statistics
+    for _ in range(7):
+        window.push(None)
+    assert window.stats() is None
+
+
+def test_health_is_loaded_once_then_kept_current_by_writes(engine):
+    models.Machine.__table__.create(engine)
+    models.Prediction.__table__.create(engine)
+    models.Alert.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(models.Machine.__table__.insert(), [{"id": 1, "name": "mill-1", "status": "operational"}])
+    store = LiveStateStore(window_size=3)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    start = datetime(2026, 1, 1, 8)
+
+    with Session(engine) as db:
+        assert store.health(db, 1).sensor_stats == {}
+        loads = len(statements)
+        store.record_readings(1, [
+            {"timestamp": start + timedelta(minutes=step), "temperature": float(step)} for step in range(5)
+        ])
+        health = store.health(db, 1)
+
+    assert len(statements) == loads
+    assert health.sensor_stats["temperature"] == {"min": 2.0, "max": 4.0, "avg": 3.0, "latest": 4.0}
+
+    # Readings older than the window's newest drop the entry instead
+    store.record_readings(1, [{"timestamp": start, "temperature": 100.0}])
+    assert 1 not in store._entries
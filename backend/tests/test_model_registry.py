@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from app.models.model import ModelType
+from app.services.model_registry import LoadedModel, ModelRegistry
+
+IMAGE = ModelType.IMAGE_CLASSIFICATION
+
+
+@pytest.fixture
+def registry():
+    registry = ModelRegistry(max_bytes=100, latest_ttl=60)
+    registry.loads = []
+
+    async def load(db, version, model_type):
+        registry.loads.append(version)
+        await asyncio.sleep(0.01)
+        if version == "missing":
+            raise LookupError(version)
+        return LoadedModel(len(registry.loads), version, model_type, f"{version}.joblib", object(), 40)
+
+    registry._load = load
+    return registry
+
+
+def test_concurrent_gets_share_one_load(registry):
+    async def run():
+        return await asyncio.gather(*(registry.get(None, "1", IMAGE) for _ in range(5)))
+
+    entries = asyncio.run(run())
+    assert registry.loads == ["1"]
+    assert all(entry is entries[0] for entry in entries)
+    assert registry.stats()["loading"] == 0
+
+
+def test_least_recently_used_models_are_evicted_over_budget(registry):
+    async def run():
+        await registry.get(None, "1", IMAGE)
+        await registry.get(None, "2", IMAGE)
+        # Touch 1 so 2 becomes the least recently used
+        await registry.get(None, "1", IMAGE)
+        await registry.get(None, "3", IMAGE)
+
+    asyncio.run(run())
+    assert registry.stats()["loaded"] == ["image_classification:1", "image_classification:3"]
+    assert registry.stats()["cache_bytes"] == 80
+    assert registry.loads == ["1", "2", "3"]
+
+
+def test_failed_load_is_not_cached(registry):
+    async def run():
+        with pytest.raises(LookupError):
+            await registry.get(None, "missing", IMAGE)
+        with pytest.raises(LookupError):
+            await registry.get(None, "missing", IMAGE)
+
+    asyncio.run(run())
+    assert registry.loads == ["missing", "missing"]
+    assert registry.stats()["loaded"] == []
+
+
+def test_latest_is_served_from_the_ttl_cache(registry):
+    # A fresh resolution is reused without querying the database
+    registry._latest[IMAGE.value] = ("2", time.monotonic())
+    entry = asyncio.run(registry.get(None, "latest", IMAGE))
+    assert entry.version == "2"
+
+    registry.invalidate(IMAGE)
+    assert registry.stats()["loaded"] == []
+    assert IMAGE.value not in registry._latest
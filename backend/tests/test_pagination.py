@@ -0,0 +1,126 @@
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db.pagination import keyset_select, split_page
+
+MIGRATIONS = Path(__file__).resolve().parents[1] / "alembic" / "versions"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Machine.__table__.create(engine)
+    models.Alert.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _pages(db, stmt, columns, limit):
+    ids, cursor = [], None
+    for _ in range(20):
+        rows = db.execute(keyset_select(stmt, columns, cursor, limit)).all()
+        items, cursor = split_page(rows, columns, limit)
+        ids += [row.id for row in items]
+        if cursor is None:
+            return ids
+    raise AssertionError(f"pagination did not finish, got {ids}")
+
+
+def _query_plan(db, stmt):
+    """SQLite's EXPLAIN QUERY PLAN details for stmt, with its parameters bound as usual"""
+    connection = db.connection()
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        return f"EXPLAIN QUERY PLAN {statement}", parameters
+
+    event.listen(connection, "before_cursor_execute", explain, retval=True)
+    try:
+        rows = connection.execute(stmt).all()
+    finally:
+        event.remove(connection, "before_cursor_execute", explain)
+    return " ".join(row[-1] for row in rows)
+
+
+def _upgrade(db, revision):
+    spec = importlib.util.spec_from_file_location(revision, MIGRATIONS / f"{revision}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    with Operations.context(MigrationContext.configure(db.connection())):
+        module.upgrade()
+
+
+def test_keyset_pages_through_duplicate_timestamps(db):
+    alerts = models.Alert.__table__
+    moment = datetime(2026, 10, 17, 8, 30, 0)
+    db.execute(
+        alerts.insert(),
+        [
+            {"machine_id": 1, "title": f"alert {i}", "message": "m", "severity": "WARNING", "timestamp": moment}
+            for i in range(10)
+        ]
+    )
+    db.commit()
+
+    columns = (alerts.c.timestamp, alerts.c.id)
+    assert _pages(db, select(alerts), columns, 3) == list(range(10, 0, -1))
+
+
+def test_default_timestamps_use_the_bound_format(db):
+    alerts = models.Alert.__table__
+    db.execute(alerts.insert(), [{"machine_id": 1, "title": "now", "message": "m", "severity": "WARNING"}])
+    db.execute(
+        alerts.insert(),
+        [{"machine_id": 1, "title": "bound", "message": "m", "severity": "WARNING", "timestamp": datetime(2026, 1, 1)}]
+    )
+    stored = db.scalars(text("SELECT timestamp FROM alerts ORDER BY id")).all()
+    assert len(stored[0]) == len(stored[1]) == len("2026-01-01 00:00:00.000000")
+    assert stored[1] == "2026-01-01 00:00:00.000000"
+
+
+def test_migration_normalizes_legacy_timestamps(db):
+    alerts = models.Alert.__table__
+    # The same instant as written by CURRENT_TIMESTAMP, without fractional seconds
+    for i in range(4):
+        db.execute(
+            text("INSERT INTO alerts (machine_id, title, message, severity, timestamp) "
+                 "VALUES (1, 'a', 'm', 'WARNING', '2026-10-17 08:30:00')")
+        )
+    db.execute(
+        alerts.insert(),
+        [
+            {"machine_id": 1, "title": f"alert {i}", "message": "m", "severity": "WARNING",
+             "timestamp": datetime(2026, 10, 17, 8, 30, 0)}
+            for i in range(4)
+        ]
+        + [{"machine_id": 1, "title": "later", "message": "m", "severity": "WARNING",
+            "timestamp": datetime(2026, 10, 17, 8, 30, 0, 250000)}]
+    )
+    _upgrade(db, "20261017_sqlite_timestamps")
+    db.commit()
+
+    assert set(db.scalars(text("SELECT timestamp FROM alerts WHERE id <= 8")).all()) == {"2026-10-17 08:30:00.000000"}
+    columns = (alerts.c.timestamp, alerts.c.id)
+    assert _pages(db, select(alerts), columns, 2) == [9, 8, 7, 6, 5, 4, 3, 2, 1]
+
+
+def test_keyset_page_is_served_by_the_index(db):
+    alerts = models.Alert.__table__
+    db.execute(
+        alerts.insert(),
+        [{"machine_id": 1, "title": f"alert {i}", "message": "m", "severity": "WARNING"} for i in range(3)]
+    )
+    columns = (alerts.c.timestamp, alerts.c.id)
+    first = db.execute(keyset_select(select(alerts).where(alerts.c.machine_id == 1), columns, None, 1)).all()
+    _, cursor = split_page(first, columns, 1)
+
+    plan = _query_plan(db, keyset_select(select(alerts).where(alerts.c.machine_id == 1), columns, cursor, 1))
+    assert "idx_alerts_machine_timestamp" in plan
+    assert "TEMP B-TREE" not in plan
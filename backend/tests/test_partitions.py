@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import partition_service as partition_module
+from app.services.archive_service import SensorArchiveService
+from app.services.partition_service import SensorPartitionService
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sensors.db'}")
+    models.Machine.__table__.create(engine)
+    models.SensorData.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _attached(db):
+    return [row[1] for row in db.connection().exec_driver_sql("PRAGMA database_list") if row[1].startswith("sensor_p")]
+
+
+def test_more_partition_files_than_sqlite_can_attach(db, tmp_path):
+    sensor_data = models.SensorData.__table__
+    # One reading a month for 2025 plus one in the current month
+    db.execute(
+        sensor_data.insert(),
+        [{"machine_id": 1, "timestamp": datetime(2025, month, 10), "temperature": float(month)} for month in range(1, 13)]
+        + [{"machine_id": 1, "timestamp": datetime(2026, 1, 5), "temperature": 13.0}]
+    )
+    db.commit()
+
+    service = SensorPartitionService(str(tmp_path / "partitions"), hot_months=1, max_attached=8)
+    stats = service.maintain(db, now=datetime(2026, 2, 15))
+    assert len(stats["moved"]) == 12
+    assert len(service.partition_files()) == 12
+    assert _attached(db) == []
+
+    # A late reading for a moved month stays in the main table
+    db.execute(sensor_data.insert(), [{"machine_id": 1, "timestamp": datetime(2025, 2, 20), "temperature": 2.5}])
+    db.commit()
+    # Pending writes keep the session inside a transaction, where ATTACH fails
+    db.execute(sensor_data.insert(), [{"machine_id": 1, "timestamp": datetime(2026, 1, 6), "temperature": 14.0}])
+    batches = service.sensor_batches(db)
+    assert [len(batch.months) for batch in batches] == [8, 4]
+    assert (batches[0].lower, batches[0].upper) == (datetime(2025, 5, 1), None)
+    assert (batches[1].lower, batches[1].upper) == (None, datetime(2025, 5, 1))
+
+    temperatures = []
+    for batch in batches:
+        with service.sensor_reader(db, batch) as (reader, source):
+            temperatures += reader.scalars(
+                select(source.c.temperature)
+                .where(*batch.bounds(source.c.timestamp))
+                .order_by(source.c.timestamp.desc())
+            ).all()
+        assert _attached(db) == []
+    # Every month, newest first, and each main table row exactly once
+    assert temperatures == [13.0, 12.0, 11.0, 10.0, 9.0, 8.0, 7.0, 6.0, 5.0, 4.0, 3.0, 2.5, 2.0, 1.0]
+
+    start, end = datetime(2025, 2, 1), datetime(2025, 3, 31)
+    [batch] = service.sensor_batches(db, start_time=start, end_time=end)
+    assert batch.months == [datetime(2025, 2, 1), datetime(2025, 3, 1)]
+    with service.sensor_reader(db, batch) as (reader, source):
+        in_range = select(func.count()).select_from(source).where(source.c.timestamp.between(start, end))
+        assert reader.scalar(in_range) == 3
+    db.commit()
+    assert db.scalar(select(func.count()).select_from(sensor_data)) == 3
+
+
+def test_read_frame_includes_partition_files(db, tmp_path, monkeypatch):
+    sensor_data = models.SensorData.__table__
+    db.execute(
+        sensor_data.insert(),
+        [{"machine_id": 1, "timestamp": datetime(2025, month, 10), "temperature": float(month)} for month in range(1, 13)]
+        + [{"machine_id": 2, "timestamp": datetime(2026, 1, 5), "temperature": 13.0}]
+    )
+    db.commit()
+    service = SensorPartitionService(str(tmp_path / "partitions"), hot_months=1, max_attached=3)
+    service.maintain(db, now=datetime(2026, 2, 15))
+    monkeypatch.setattr(partition_module, "partition_service", service)
+    archive = SensorArchiveService(str(tmp_path / "archive"))
+
+    frame = archive.read_frame(db, columns=["temperature"])
+    assert frame["temperature"].tolist() == [float(month) for month in range(1, 14)]
+    frame = archive.read_frame(db, machine_id=1, start_time=datetime(2025, 11, 1))
+    assert frame["temperature"].tolist() == [11.0, 12.0]
+    assert _attached(db) == []
@@ -0,0 +1,111 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from starlette.datastructures import Headers, UploadFile
+
+from app import models
+from app.api.deps import get_current_active_user
+from app.database import get_db
+from app.routes import prediction
+from app.services import prediction_service as prediction_module
+from app.services.cpu_executor import CPUExecutionStage
+from app.services.prediction_service import prediction_service
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (models.Machine, models.ImageData, models.SensorData, models.Prediction):
+        model.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(models.Machine.__table__.insert(), [{"id": 1, "name": "mill-1"}])
+    with Session(engine) as session:
+        yield session
+
+
+def _upload(filename: str, data: bytes, content_type: str = "image/png") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename, headers=Headers({"content-type": content_type}))
+
+
+@pytest.fixture
+def no_model(monkeypatch):
+    machine = SimpleNamespace(id=1, status="operational", current_rul_hours=120.0)
+    monkeypatch.setattr(prediction_module.machine_service, "get_machine", lambda db, machine_id: machine)
+
+    async def load_nothing(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(prediction_service, "_load_model", load_nothing)
+    monkeypatch.setattr(prediction_service, "_persist_upload", lambda file_path, data: None)
+
+
+PNG = cv2.imencode(".png", np.zeros((32, 32, 3), dtype=np.uint8))[1].tobytes()
+
+
+def test_predict_from_images_persists_batch(db, no_model, monkeypatch):
+    shapes = []
+    predict_batch = prediction_service._predict_image_batch
+
+    def recording_predict_batch(model, batch):
+        shapes.append(batch.shape)
+        return predict_batch(model, batch)
+
+    monkeypatch.setattr(prediction_service, "_predict_image_batch", recording_predict_batch)
+
+    uploads = [_upload(f"tool-{i}.png", PNG) for i in range(5)] + [_upload("broken.png", b"not an image")]
+
+    predictions, errors = asyncio.run(prediction_service.predict_from_images(db, 1, uploads))
+
+    assert errors == {5: "Invalid image file"}
+    # One channels-last batch for the decodable images
+    assert shapes == [(5, 224, 224, 3)]
+    assert len(predictions) == 5
+    assert all(row.wear_category == "normal" and row.rul_hours == 120.0 for row in predictions)
+    assert all(row.image_data_id is not None for row in predictions)
+
+    stored = db.execute(select(func.count()).select_from(models.Prediction.__table__)).scalar()
+    images = db.execute(select(func.count()).select_from(models.ImageData.__table__)).scalar()
+    assert stored == images == 5
+    assert prediction_service.image_stage.stats()["in_flight"] == 0
+
+
+def test_batch_endpoint_returns_stored_predictions(db, no_model):
+    app = FastAPI()
+    app.include_router(prediction.router, prefix="/api/predictions")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id=7)
+
+    files = [("images", (f"tool-{i}.png", PNG, "image/png")) for i in range(3)]
+    response = TestClient(app).post("/api/predictions/image/1/batch", files=files)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["success_count"] == 3
+    assert [row["wear_category"] for row in body["predictions"]] == ["normal"] * 3
+
+
+def test_saturated_stage_answers_429(db, no_model, monkeypatch):
+    stage = CPUExecutionStage("image", max_workers=1, max_queue=1)
+    # Another request already holds every slot
+    stage._in_flight = stage.capacity
+    monkeypatch.setattr(prediction_service, "image_stage", stage)
+    app = FastAPI()
+    app.include_router(prediction.router, prefix="/api/predictions")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id=7)
+
+    files = [("images", ("tool.png", PNG, "image/png"))]
+    response = TestClient(app).post("/api/predictions/image/1/batch", files=files)
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+    assert db.execute(select(func.count()).select_from(models.Prediction.__table__)).scalar() == 0
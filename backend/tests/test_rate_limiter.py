@@ -0,0 +1,79 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import rate_limiter
+from app.middleware.rate_limiter import MemoryBackend, RateLimiter, RateLimitRule, RedisBackend
+
+RULE = RateLimitRule("", 2, 60)
+
+
+def test_redis_failures_back_off_to_local_limits(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: clock[0])
+    calls = []
+
+    async def unavailable(keys, args):
+        calls.append(keys)
+        raise ConnectionError("connection timed out")
+
+    backend = RedisBackend("redis://cache:6379/0", MemoryBackend(), timeout=0.1, retry_after=30)
+    backend._script = unavailable
+
+    async def take():
+        return await backend.take("ip:1", RULE)
+
+    results = [asyncio.run(take()) for _ in range(3)]
+    # Redis is tried once, then the local buckets keep limiting
+    assert len(calls) == 1
+    assert [result.allowed for result in results] == [True, True, False]
+
+    clock[0] += 31
+    asyncio.run(take())
+    assert len(calls) == 2
+
+
+def test_idle_buckets_are_evicted_and_keys_are_bounded(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: clock[0])
+    backend = MemoryBackend(max_keys=3)
+
+    async def take(key):
+        return await backend.take(key, RULE)
+
+    for key in ("a", "b", "c", "d"):
+        asyncio.run(take(key))
+    # The least recently used bucket made room for the new client
+    assert list(backend._buckets) == ["b", "c", "d"]
+
+    # A known client keeps its bucket when the table is full
+    assert asyncio.run(take("b")).remaining == 0
+    assert list(backend._buckets) == ["c", "d", "b"]
+
+    # Two requests per minute refill one token every 30 seconds
+    clock[0] += 45
+    asyncio.run(take("e"))
+    assert list(backend._buckets) == ["b", "e"]
+    assert asyncio.run(take("b")).allowed
+
+
+def test_middleware_answers_429_per_client_and_route():
+    app = FastAPI()
+
+    @app.get("/api/items")
+    async def items():
+        return {"ok": True}
+
+    @app.get("/metrics")
+    async def metrics():
+        return {}
+
+    app.add_middleware(RateLimiter, requests=2, window=60, routes={"/api/items": "1/60"})
+    client = TestClient(app)
+
+    first = client.get("/api/items")
+    assert first.status_code == 200 and first.headers["x-ratelimit-remaining"] == "0"
+    limited = client.get("/api/items")
+    assert limited.status_code == 429 and int(limited.headers["retry-after"]) >= 1
+    assert all(client.get("/metrics").status_code == 200 for _ in range(5))
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+from typing import Dict
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.response_cache import ResponseCache, cached_response, response_cache
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.role = "viewer"
+
+    def current_user():
+        return SimpleNamespace(role=app.state.role)
+
+    @app.get("/machines", response_model=Dict[str, int])
+    @cached_response("machines", ttl=60)
+    async def list_machines(limit: int = 10, current_user=Depends(current_user)):
+        app.state.calls += 1
+        return {"calls": app.state.calls, "limit": limit}
+
+    yield app
+    response_cache.clear()
+
+
+def test_hits_revalidate_with_etags(app):
+    client = TestClient(app)
+    first = client.get("/machines")
+    again = client.get("/machines")
+
+    assert first.json() == again.json() == {"calls": 1, "limit": 10}
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"') and again.headers["etag"] == etag
+
+    not_modified = client.get("/machines", headers={"If-None-Match": f'"other", {etag[2:]}'})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert app.state.calls == 1
+
+
+def test_query_and_role_are_part_of_the_key(app):
+    client = TestClient(app)
+    client.get("/machines")
+    assert client.get("/machines", params={"limit": 5}).json() == {"calls": 2, "limit": 5}
+    app.state.role = "admin"
+    assert client.get("/machines").json()["calls"] == 3
+
+
+def test_invalidate_drops_entries_and_bumps_the_generation(app):
+    client = TestClient(app)
+    etag = client.get("/machines").headers["etag"]
+
+    response_cache.invalidate("machines")
+    response = client.get("/machines", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json()["calls"] == 2
+
+
+def test_responses_computed_across_a_write_are_not_stored():
+    cache = ResponseCache()
+    key = ("machines", "/machines", "", "anonymous")
+    generation = cache.generation("machines")
+    cache.invalidate("machines")
+
+    cache.store(key, b"{}", ttl=60, generation=generation)
+    assert cache.get(key) is None
+    cache.store(key, b"{}", ttl=60, generation=cache.generation("machines"))
+    assert cache.get(key).body == b"{}"
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.models.sensor_rollup import ROLLUP_MODELS
+from app.services import aggregation_service as aggregation_module
+from app.services import rollup_service as rollup_module
+from app.services.aggregation_service import AggregationService
+from app.services.partition_service import SensorPartitionService
+from app.services.rollup_service import SensorRollupService
+from app.services.upload_service import UploadPipeline
+
+HOUR = models.SensorRollupHour.__table__
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sensors.db'}")
+    models.SensorData.__table__.create(engine)
+    for model in ROLLUP_MODELS.values():
+        model.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def partitioned(db, tmp_path, monkeypatch):
+    """One reading on the 10th of every month of 2025, moved to partition files"""
+    db.execute(
+        models.SensorData.__table__.insert(),
+        [{"machine_id": 1, "timestamp": datetime(2025, month, 10, 6), "temperature": float(month)}
+         for month in range(1, 13)]
+    )
+    db.commit()
+    service = SensorPartitionService(str(tmp_path / "partitions"), hot_months=1, max_attached=3)
+    service.maintain(db, now=datetime(2026, 2, 15))
+    assert len(service.partition_files()) == 12
+    monkeypatch.setattr(aggregation_module, "partition_service", service)
+    monkeypatch.setattr(rollup_module, "partition_service", service)
+    return service
+
+
+def _hourly(db):
+    return {
+        (row.bucket, row.sensor): (row.count, row.sum)
+        for row in db.execute(select(HOUR).order_by(HOUR.c.bucket, HOUR.c.sensor))
+    }
+
+
+def test_apply_frame_merges_batches(db):
+    rollups = SensorRollupService()
+    frame = pd.DataFrame({
+        "machine_id": [1, 1, 1],
+        "timestamp": [datetime(2026, 1, 1, 8, 5), datetime(2026, 1, 1, 8, 40), datetime(2026, 1, 1, 9, 1)],
+        "temperature": [10.0, 20.0, 30.0],
+        "vibration": [1.0, None, 2.0],
+    })
+    rollups.apply_frame(db, frame.iloc[:2])
+    rollups.apply_frame(db, frame.iloc[2:])
+    db.commit()
+
+    assert _hourly(db) == {
+        (datetime(2026, 1, 1, 8), "temperature"): (2, 30.0),
+        (datetime(2026, 1, 1, 8), "vibration"): (1, 1.0),
+        (datetime(2026, 1, 1, 9), "temperature"): (1, 30.0),
+        (datetime(2026, 1, 1, 9), "vibration"): (1, 2.0),
+    }
+    row = db.execute(select(HOUR).where(HOUR.c.sensor == "temperature", HOUR.c.count == 2)).one()
+    assert (row.min, row.max) == (10.0, 20.0)
+
+
+def test_upload_frames_update_rollups(db):
+    frame = pd.DataFrame({
+        "timestamp": ["2026-01-01 08:05:00", "2026-01-01 08:40:00", "not a time"],
+        "temperature": [10.0, 20.0, 30.0],
+        "vibration": [1.0, 2.0, 3.0],
+        "pressure": [5.0, 5.0, 5.0],
+        "rpm": [1000, 1000, 1000],
+        "current": [1.0, 1.0, 1.0],
+        "voltage": [230.0, 230.0, 230.0],
+    })
+    assert len(UploadPipeline()._write_frame(db, 7, frame)) == 2
+
+    hourly = _hourly(db)
+    assert hourly[(datetime(2026, 1, 1, 8), "temperature")] == (2, 30.0)
+    assert len(hourly) == 6
+
+
+def test_backfill_reads_partition_files(db, partitioned):
+    stats = SensorRollupService().backfill(
+        db, datetime(2025, 1, 1), datetime(2026, 1, 1), window=timedelta(days=400)
+    )
+    assert stats["rows_read"] == 12
+    assert [count for count, _ in _hourly(db).values()] == [1] * 12
+
+
+def test_raw_aggregation_reads_partition_files(db, partitioned):
+    aggregation = AggregationService()
+    # Percentiles take the NumPy path, which streams every batch
+    buckets = aggregation.aggregate(
+        db, 1, datetime(2025, 1, 1), datetime(2025, 12, 31), interval="month",
+        sensors=["temperature"], functions=("avg", "p95"), use_rollups=False
+    )
+    assert [bucket["timestamp"] for bucket in buckets] == [datetime(2025, month, 1) for month in range(1, 13)]
+    assert [bucket["values"]["temperature"]["avg"] for bucket in buckets] == [float(month) for month in range(1, 13)]
+
+    # A range within one batch is aggregated in SQL over the attached files
+    buckets = aggregation.aggregate(
+        db, 1, datetime(2025, 3, 1), datetime(2025, 4, 30), interval="day",
+        sensors=["temperature"], functions=("avg", "count"), use_rollups=False
+    )
+    assert [(bucket["timestamp"], bucket["count"]) for bucket in buckets] == [
+        (datetime(2025, 3, 10), 1), (datetime(2025, 4, 10), 1)
+    ]
+
+
+def test_backfill_is_idempotent_and_serves_aggregates(db):
+    db.execute(models.SensorData.__table__.insert(), [
+        {"machine_id": 1, "timestamp": datetime(2026, 1, 1) + timedelta(minutes=15 * step), "temperature": float(step)}
+        for step in range(4 * 48)
+    ])
+    db.commit()
+    rollups = SensorRollupService(backfill_chunk_size=50)
+    for _ in range(2):
+        stats = rollups.backfill(db, datetime(2026, 1, 1), datetime(2026, 1, 3))
+    assert (stats["windows"], stats["rows_read"]) == (2, 192)
+    assert all(count == 4 for count, _ in _hourly(db).values())
+
+    aggregation = AggregationService()
+    arguments = (db, 1, datetime(2026, 1, 1), datetime(2026, 1, 2, 23, 59), "day", ["temperature"], ("avg", "min", "max"))
+    assert aggregation.serves_from_rollups("day", ("avg", "min", "max"))
+    assert aggregation.aggregate(*arguments) == aggregation.aggregate(*arguments, use_rollups=False)
@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.api.deps import get_current_active_user
+from app.database import get_db
+from app.routes import prediction
+from app.services import prediction_service as prediction_module
+from app.services.live_state import live_state
+from app.services.prediction_service import prediction_service
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (
+        models.Machine, models.SensorData, models.Prediction, models.Alert,
+        models.SensorRollupMinute, models.SensorRollupHour, models.SensorRollupDay
+    ):
+        model.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(models.Machine.__table__.insert(), [{"id": 1, "name": "mill-1", "status": "operational"}])
+    with Session(engine) as session:
+        yield session
+    live_state.clear()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    machine = SimpleNamespace(id=1, status="operational", current_rul_hours=120.0)
+    monkeypatch.setattr(prediction_module.machine_service, "get_machine", lambda db, machine_id: machine)
+
+    async def no_model(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(prediction_service, "_load_model", no_model)
+
+    app = FastAPI()
+    app.include_router(prediction.router, prefix="/api/predictions")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id=7)
+    return TestClient(app)
+
+
+def test_sensor_prediction_is_stored_and_applied(client, db):
+    # Loaded before the write, so the write has to update it in place
+    assert live_state.health(db, 1).avg_rul is None
+
+    response = client.post(
+        "/api/predictions/sensor/1",
+        json={"machine_id": 1, "timestamp": "2026-10-17T08:30:00", "temperature": 71.5, "vibration": 2.5}
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    # The placeholder model predicts 150.5 hours with 0.92 confidence
+    assert body["rul_hours"] == 150.5
+    assert body["wear_category"] == "moderate"
+    assert body["sensor_data_id"] is not None
+
+    reading = db.execute(select(models.SensorData.__table__)).one()
+    assert (reading.machine_id, reading.temperature, reading.vibration) == (1, 71.5, 2.5)
+    assert db.scalar(select(func.count()).select_from(models.Prediction.__table__)) == 1
+
+    rollups = models.SensorRollupHour.__table__
+    assert db.execute(select(rollups.c.sensor, rollups.c.count).order_by(rollups.c.sensor)).all() == [
+        ("temperature", 1), ("vibration", 1)
+    ]
+
+    health = live_state.health(db, 1)
+    assert health.avg_rul == 150.5
+    assert health.sensor_stats["temperature"]["latest"] == 71.5
+
+
+def test_low_rul_sensor_prediction_raises_alert(client, db, monkeypatch):
+    def short_life(model, batch):
+        return [{"rul_hours": 12.0, "confidence": 0.9} for _ in range(len(batch))]
+
+    monkeypatch.setattr(prediction_service.sensor_batcher, "predict_batch", short_life)
+
+    response = client.post("/api/predictions/sensor/1", json={"machine_id": 1, "timestamp": "2026-10-17T08:30:00"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["wear_category"] == "severe"
+    alerts = db.execute(select(models.Alert.__table__)).all()
+    assert [(alert.title, alert.severity.value) for alert in alerts] == [("Critical RUL Warning", "critical")]
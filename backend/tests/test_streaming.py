@@ -0,0 +1,119 @@
+import asyncio
+import math
+
+import numpy as np
+
+from app.ws.broker import InMemoryBroker
+from app.ws.manager import ConnectionManager
+from app.ws.streaming import FLAG_DELTA, FRAME_HEADER, SensorStreamHub, StreamSubscription
+
+
+def _decode(frame):
+    """Unpack a stream frame the way clients do, undoing delta encoding"""
+    version, flags, sensors, machine_id, points, start = FRAME_HEADER.unpack_from(frame)
+    offset = FRAME_HEADER.size
+    times = np.frombuffer(frame, dtype=np.float32, count=points, offset=offset) + start
+    offset += 4 * points
+    values = np.frombuffer(frame, dtype=np.float32, count=points * sensors, offset=offset).reshape(sensors, points)
+    if flags & FLAG_DELTA:
+        decoded = []
+        for series in values:
+            total, out = math.nan, []
+            for value in series:
+                total = value if math.isnan(total) or math.isnan(value) else total + value
+                out.append(total)
+            decoded.append(out)
+        values = np.array(decoded, dtype=np.float32)
+    return machine_id, times.tolist(), values.tolist()
+
+
+def _feed(subscription, samples):
+    for timestamp, values in samples:
+        subscription.add(timestamp, values)
+    return subscription.take_frame(close_before=math.inf)
+
+
+def test_buckets_keep_min_and_max_in_order():
+    # 2 points per second: one-second buckets, each sent as two points
+    subscription = StreamSubscription("c", 3, ["temperature"], points_per_second=2)
+    frame = _feed(subscription, [
+        (100.1, {"temperature": 5.0}), (100.5, {"temperature": 9.0}), (100.7, {"temperature": 1.0}),
+        (101.2, {"temperature": 4.0}),
+    ])
+    machine_id, times, [temperature] = _decode(frame)
+    assert machine_id == 3
+    assert times == [100.0, 100.5, 101.0, 101.5]
+    # The maximum came before the minimum, so it is sent first
+    assert temperature == [9.0, 1.0, 4.0, 4.0]
+    assert subscription.take_frame() is None
+
+
+def test_delta_frames_restart_after_gaps():
+    samples = [
+        (100.0, {"temperature": 20.0, "vibration": 1.5}),
+        (101.0, {"temperature": 21.0}),
+        (102.0, {"temperature": 23.0}),
+        (103.0, {"vibration": 2.0}),
+        (104.0, {"temperature": 22.0, "vibration": 2.5}),
+    ]
+    plain = _decode(_feed(StreamSubscription("a", 1, ["temperature", "vibration"], 2), samples))
+    delta = StreamSubscription("b", 1, ["temperature", "vibration"], 2, delta=True)
+    frame = _feed(delta, samples)
+
+    assert FRAME_HEADER.unpack_from(frame)[1] & FLAG_DELTA
+    _, _, [temperature, vibration] = _decode(frame)
+    assert np.allclose(temperature, plain[2][0], equal_nan=True)
+    assert np.allclose(vibration, plain[2][1], equal_nan=True)
+    # Readings after a gap are absolute rather than a difference from NaN
+    np.testing.assert_array_equal(vibration, [1.5, 1.5] + [math.nan] * 4 + [2.0, 2.0, 2.5, 2.5])
+
+
+class RecordingBroker(InMemoryBroker):
+    def __init__(self):
+        super().__init__()
+        self.channels = []
+
+    async def publish(self, channel, payload):
+        self.channels.append(channel)
+        await super().publish(channel, payload)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_bytes(self, payload):
+        self.frames.append(payload)
+
+    async def send_text(self, payload):
+        pass
+
+
+def test_hub_streams_only_machines_with_subscribers():
+    broker = RecordingBroker()
+    manager = ConnectionManager(broker)
+    hub = SensorStreamHub(manager, flush_interval=0.01)
+
+    async def run():
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "a")
+        await hub.publish_samples(2, [(100.0, {"temperature": 1.0})])
+        await hub.subscribe("a", 1, ["temperature"], points_per_second=200)
+        await hub.publish_samples(1, [(100.0, {"temperature": 20.0}), (100.001, {"temperature": 22.0})])
+        await asyncio.sleep(0.05)
+        hub.unsubscribe("a")
+        await asyncio.sleep(0.03)
+        await manager.stop()
+        return websocket
+
+    websocket = asyncio.run(run())
+    # Nobody streams machine 2, so its samples never reach the broker
+    assert broker.channels == ["ws:samples:1"]
+    [frame] = websocket.frames
+    machine_id, times, values = _decode(frame)
+    assert machine_id == 1 and np.allclose(times, [100.0, 100.005])
+    assert values == [[20.0, 22.0]]
+    assert not asyncio.run(broker.has_presence("stream:1"))
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.api import deps
+from app.api.api_v1.endpoints import uploads
+from app.models.sensor_rollup import ROLLUP_MODELS
+from app.services.ingest_service import ingest_service
+
+CSV = (
+    "timestamp,temperature,vibration,pressure,rpm,current,voltage\n"
+    "2026-01-01 08:00:00,70.0,1.0,5.0,1000,1.0,230.0\n"
+    "2026-01-01 08:01:00,71.0,1.1,5.0,1000,1.0,230.0\n"
+    "2026-01-01 08:02:00,72.0,1.2,5.0,1000,1.0,230.0"
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (models.Machine, models.SensorData, models.ImageData, *ROLLUP_MODELS.values()):
+        model.__table__.create(engine)
+    return engine
+
+
+@pytest.fixture
+def client(engine, tmp_path, monkeypatch):
+    machine = SimpleNamespace(id=1)
+    monkeypatch.setattr(
+        uploads.machine_service, "get_machine", lambda db, machine_id: machine if machine_id == 1 else None
+    )
+    monkeypatch.setattr(uploads, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(uploads, "CSV_UPLOAD_DIR", tmp_path / "csv")
+    monkeypatch.setattr(uploads, "IMAGE_UPLOAD_DIR", tmp_path / "images")
+    monkeypatch.setattr(uploads.settings, "UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "csv").mkdir()
+    (tmp_path / "images").mkdir()
+
+    app = FastAPI()
+    app.include_router(uploads.router, prefix="/api/v1/uploads")
+    app.dependency_overrides[deps.get_db] = lambda: Session(engine)
+    app.dependency_overrides[deps.get_current_active_user] = lambda: SimpleNamespace(id=7)
+    return TestClient(app)
+
+
+def test_csv_upload_is_ingested_by_a_background_job(client, engine, tmp_path):
+    response = client.post("/api/v1/uploads/csv?machine_id=1", files={"file": ("run.csv", CSV, "text/csv")})
+    assert response.status_code == 202, response.text
+    job_id = response.json()["metadata"]["job_id"]
+
+    # The test client runs background tasks before returning
+    job = client.get(f"/api/v1/uploads/csv/jobs/{job_id}").json()
+    assert job["status"] == "completed", job
+    assert (job["rows_read"], job["rows_written"], job["rows_committed"]) == (3, 3, 3)
+
+    with Session(engine) as db:
+        temperatures = db.scalars(select(models.SensorData.__table__.c.temperature)).all()
+    assert temperatures == [70.0, 71.0, 72.0]
+    # The saved upload is removed once it has been ingested
+    assert list(tmp_path.glob("csv/*")) == []
+
+
+def test_failed_csv_job_leaves_no_rows(client, engine, tmp_path, monkeypatch):
+    original = ingest_service.write_chunk
+    writes = []
+
+    def write_chunk(db, frame):
+        if writes:
+            raise ValueError("disk full")
+        writes.append(len(frame))
+        return original(db, frame)
+
+    monkeypatch.setattr(ingest_service, "write_chunk", write_chunk)
+    # One frame per line of the upload
+    monkeypatch.setattr(uploads.upload_pipeline, "chunk_size", 40)
+
+    response = client.post("/api/v1/uploads/csv?machine_id=1", files={"file": ("run.csv", CSV, "text/csv")})
+    job = client.get(f"/api/v1/uploads/csv/jobs/{response.json()['metadata']['job_id']}").json()
+
+    assert job["status"] == "failed"
+    assert job["error"] == "disk full"
+    assert (job["batches_written"], job["rows_committed"]) == (1, 0)
+    with Session(engine) as db:
+        assert db.execute(select(models.SensorData.__table__)).all() == []
+        assert db.execute(select(ROLLUP_MODELS["hour"].__table__)).all() == []
+    assert list(tmp_path.glob("csv/*")) == []
+
+
+def test_uploads_check_the_machine(client):
+    response = client.post("/api/v1/uploads/csv?machine_id=2", files={"file": ("run.csv", CSV, "text/csv")})
+    assert response.status_code == 404
+
+
+def test_image_upload_is_recorded(client, engine):
+    response = client.post("/api/v1/uploads/images?machine_id=1", files={"file": ("tool.png", b"png", "image/png")})
+    assert response.status_code == 200, response.text
+
+    with Session(engine) as db:
+        row = db.execute(select(models.ImageData.__table__)).one()
+    assert (row.id, row.machine_id, row.file_path) == (response.json()["id"], 1, response.json()["file_path"])
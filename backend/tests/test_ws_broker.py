@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from app.ws.broker import Broker, InMemoryBroker
+from app.ws.manager import ConnectionManager
+
+
+class SharedBroker(Broker):
+    """Delivers every publish to all workers started on it, like Redis pub/sub"""
+
+    def __init__(self, handlers):
+        super().__init__()
+        self.handlers = handlers
+
+    async def start(self, handler):
+        await super().start(handler)
+        self.handlers.append(handler)
+
+    async def publish(self, channel, payload):
+        for handler in self.handlers:
+            await handler(channel, payload)
+
+
+class FailingBroker(InMemoryBroker):
+    async def publish(self, channel, payload):
+        raise ConnectionError("broker unavailable")
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        self.sent.append(json.loads(payload))
+
+    async def send_bytes(self, payload):
+        self.sent.append(payload)
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _connect(manager, client_id, user_id=None, machine_id=None):
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, client_id, user_id)
+    if machine_id is not None:
+        await manager.subscribe_to_machine(client_id, machine_id)
+    return websocket
+
+
+def test_broadcasts_reach_subscribers_on_every_worker():
+    handlers = []
+    first, second = ConnectionManager(SharedBroker(handlers)), ConnectionManager(SharedBroker(handlers))
+
+    async def run():
+        a = await _connect(first, "a", machine_id=1)
+        b = await _connect(second, "b", machine_id=1)
+        c = await _connect(second, "c", user_id=9, machine_id=2)
+        await first.broadcast_to_machine(1, {"type": "machine_update"})
+        await first.send_to_user(9, {"type": "alert"})
+        await second.broadcast_to_machine(1, b"\x00\x01")
+        await asyncio.sleep(0.01)
+        await first.stop()
+        await second.stop()
+        return a, b, c
+
+    a, b, c = asyncio.run(run())
+    assert a.sent == b.sent == [{"type": "machine_update"}, b"\x00\x01"]
+    assert c.sent == [{"type": "alert"}]
+
+
+def test_broker_failure_falls_back_to_local_delivery():
+    manager = ConnectionManager(FailingBroker())
+
+    async def run():
+        websocket = await _connect(manager, "a", machine_id=3)
+        await manager.broadcast_to_machine(3, {"type": "anomaly_detected"})
+        await asyncio.sleep(0.01)
+        await manager.stop()
+        return websocket
+
+    assert asyncio.run(run()).sent == [{"type": "anomaly_detected"}]
+
+
+def test_disconnect_drops_subscriptions():
+    manager = ConnectionManager(InMemoryBroker())
+
+    async def run():
+        await _connect(manager, "a", user_id=1, machine_id=5)
+        manager.disconnect("a")
+        await manager.stop()
+
+    asyncio.run(run())
+    assert manager.machine_subscriptions == {} and manager.user_connections == {}
+    assert manager.stats()["connections"] == 0
+
+
+def test_presence_expires():
+    broker = InMemoryBroker()
+
+    async def run():
+        await broker.set_presence("raw:1", "worker-a", ttl=60)
+        await broker.set_presence("raw:2", "worker-a", ttl=-1)
+        present = await broker.has_presence("raw:1"), await broker.has_presence("raw:2")
+        await broker.clear_presence("raw:1", "worker-a")
+        return present + (await broker.has_presence("raw:1"),)
+
+    assert asyncio.run(run()) == (True, False, False)
@@ -0,0 +1,82 @@
+import asyncio
+
+from app.ws.connection import ClientConnection
+
+
+class FakeWebSocket:
+    def __init__(self, blocked=False):
+        self.sent = []
+        self.closed_with = None
+        self.unblock = asyncio.Event()
+        if not blocked:
+            self.unblock.set()
+
+    async def send_text(self, payload):
+        await self.unblock.wait()
+        self.sent.append(payload)
+
+    async def send_bytes(self, payload):
+        await self.unblock.wait()
+        self.sent.append(payload)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_writer_sends_text_and_binary_in_order():
+    async def run():
+        websocket = FakeWebSocket()
+        connection = ClientConnection(websocket, "a")
+        connection.start()
+        for payload in ("one", b"\x01\x02", "three"):
+            assert connection.enqueue(payload)
+        await asyncio.sleep(0.01)
+        connection.close()
+        return websocket, connection
+
+    websocket, connection = asyncio.run(run())
+    assert websocket.sent == ["one", b"\x01\x02", "three"]
+    assert connection.stats()["sent"] == 3 and connection.depth == 0
+
+
+def test_full_queue_drops_the_oldest_message():
+    async def run():
+        websocket = FakeWebSocket(blocked=True)
+        connection = ClientConnection(websocket, "slow", max_queue=3, stall_timeout=60)
+        connection.start()
+        connection.enqueue("0")
+        await asyncio.sleep(0.01)
+        # The writer holds "0" while its send is blocked
+        for index in range(1, 6):
+            connection.enqueue(str(index))
+        websocket.unblock.set()
+        await asyncio.sleep(0.01)
+        connection.close()
+        return websocket, connection
+
+    websocket, connection = asyncio.run(run())
+    assert websocket.sent == ["0", "3", "4", "5"]
+    assert connection.dropped == 2
+
+
+def test_stalled_client_is_evicted():
+    closed = []
+
+    async def run():
+        websocket = FakeWebSocket(blocked=True)
+        connection = ClientConnection(websocket, "stuck", max_queue=2, stall_timeout=0.01, on_close=closed.append)
+        connection.start()
+        connection.enqueue("a")
+        await asyncio.sleep(0.001)
+        connection.enqueue("b")
+        connection.enqueue("c")
+        await asyncio.sleep(0.02)
+        evicted = not connection.enqueue("d")
+        await asyncio.sleep(0.01)
+        return websocket, connection, evicted
+
+    websocket, connection, evicted = asyncio.run(run())
+    assert evicted and connection.closed
+    assert closed == ["stuck"]
+    assert websocket.closed_with == 1008
+    assert not connection.enqueue("e")
@@ -0,0 +1,41 @@
+import React from 'react';
+import { Grid, Typography } from '@mui/material';
+import { useSensorStream } from '../../hooks/useSensorStream';
+import SensorChart from './SensorChart';
+
+interface LiveSensorChartsProps {
+  machineId: number | string;
+  sensors: string[];
+  pointsPerSecond?: number;
+}
+
+const LiveSensorCharts: React.FC<LiveSensorChartsProps> = ({ machineId, sensors, pointsPerSecond = 20 }) => {
+  const points = useSensorStream(machineId, sensors, pointsPerSecond);
+
+  if (points.length === 0) {
+    return (
+      <Typography variant="body2" color="textSecondary">
+        Waiting for live readings...
+      </Typography>
+    );
+  }
+
+  return (
+    <Grid container spacing={3}>
+      {sensors.map((sensor) => (
+        <Grid sx={{ width: '100%', mb: 3 }} key={sensor}>
+          <SensorChart
+            title={`${sensor} (live)`}
+            data={points}
+            xField="timestamp"
+            yField={sensor}
+            height={200}
+            showLegend={false}
+          />
+        </Grid>
+      ))}
+    </Grid>
+  );
+};
+
+export default LiveSensorCharts;
@@ -27,6 +27,7 @@ import useApi from '../../hooks/useApi';
 import { Machine, SensorData } from '../../types';
 import { Alert } from '../../types/alert';
 import SensorChart from '../charts/SensorChart';
+import LiveSensorCharts from '../charts/LiveSensorCharts';
 import MaintenanceHistory from '../maintenance/MaintenanceHistory';
 import AlertsList from '../alerts/AlertsList';
 import { formatDate } from '../../utils/dateUtils';
@@ -50,6 +51,9 @@ const SectionTitle = styled(Typography)(({ theme }) => ({
   },
 }));
 
+// Sensor columns streamed live on the sensor data tab
+const LIVE_SENSORS = ['temperature', 'vibration', 'rpm'];
+
 const MachineDetail: React.FC = () => {
   const { machineId } = useParams<{ machineId: string }>();
   const navigate = useNavigate();
@@ -307,6 +311,15 @@ const MachineDetail: React.FC = () => {
         </Grid>
       )}
 
+      {activeTab === 1 && (
+        <StyledPaper>
+          <SectionTitle variant="h6">
+            <InfoIcon /> Live Sensor Stream
+          </SectionTitle>
+          <LiveSensorCharts machineId={machine.id} sensors={LIVE_SENSORS} />
+        </StyledPaper>
+      )}
+
       {activeTab === 1 && (
         <StyledPaper>
           <SectionTitle variant="h6">
@@ -0,0 +1,67 @@
+import { useState, useRef, useEffect } from 'react';
+import { WS_BASE_URL } from '../config';
+import { decodeStreamFrame, StreamPoint } from '../utils/streamFrame';
+import { useWebSocket } from './useWebSocket';
+
+const MAX_POINTS = 2000;
+
+/**
+ * Live decimated sensor stream for one machine.
+ * @param machineId - Machine to stream
+ * @param sensors - Sensor columns to stream
+ * @param pointsPerSecond - Upper bound on the points per second the server sends
+ * @param delta - Ask for delta-encoded frames (smaller when values change slowly)
+ * @returns The most recent points, oldest first
+ */
+export const useSensorStream = (
+  machineId: number | string,
+  sensors: string[],
+  pointsPerSecond = 20,
+  delta = true
+) => {
+  const [points, setPoints] = useState<StreamPoint[]>([]);
+  // Frames list values in the sensor order the server acknowledged
+  const acknowledged = useRef<string[] | null>(null);
+  const clientId = useRef(`stream-${Math.random().toString(36).slice(2)}`);
+  const sensorKey = sensors.join(',');
+
+  const streamMessage = () => ({
+    type: 'stream',
+    machine_id: Number(machineId),
+    sensors: sensorKey.split(','),
+    points_per_second: pointsPerSecond,
+    delta,
+  });
+
+  const { send } = useWebSocket(`${WS_BASE_URL}/${clientId.current}`, {
+    onOpen: () => {
+      acknowledged.current = null;
+      send(streamMessage());
+    },
+    onMessage: (message) => {
+      if (message.type === 'stream_update' && message.status === 'streaming') {
+        acknowledged.current = message.sensors;
+      }
+    },
+    onBinary: (data) => {
+      if (!acknowledged.current) return;
+      try {
+        const frame = decodeStreamFrame(data, acknowledged.current);
+        setPoints((current) => current.concat(frame.points).slice(-MAX_POINTS));
+      } catch (error) {
+        console.error('Invalid sensor stream frame:', error);
+      }
+    },
+  });
+
+  // Restart the stream when its parameters change on an open connection
+  useEffect(() => {
+    setPoints([]);
+    acknowledged.current = null;
+    send(streamMessage());
+    return () => send({ type: 'stream_stop', machine_id: Number(machineId) });
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [machineId, sensorKey, pointsPerSecond, delta, send]);
+
+  return points;
+};
@@ -1,10 +1,22 @@
 import { useRef, useCallback, useEffect } from 'react';
 
-export const useWebSocket = (url: string) => {
+interface WebSocketHandlers {
+  // Called on every (re)connect, e.g. to resend subscriptions
+  onOpen?: () => void;
+  // JSON text messages
+  onMessage?: (message: any) => void;
+  // Binary messages, such as sensor stream frames
+  onBinary?: (data: ArrayBuffer) => void;
+}
+
+export const useWebSocket = (url: string, handlers: WebSocketHandlers = {}) => {
   const ws = useRef<WebSocket | null>(null);
   const reconnectAttempts = useRef(0);
   const maxReconnectAttempts = 5;
   const reconnectTimeout = useRef<NodeJS.Timeout | null>(null);
+  // Latest handlers, so callers need not memoize them
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
 
   const connect = useCallback(() => {
     if (ws.current) {
@@ -13,10 +25,24 @@ export const useWebSocket = (url: string) => {
 
     try {
       ws.current = new WebSocket(url);
-      
+      ws.current.binaryType = 'arraybuffer';
+
       ws.current.onopen = () => {
         console.log('WebSocket connected');
         reconnectAttempts.current = 0;
+        handlersRef.current.onOpen?.();
+      };
+
+      ws.current.onmessage = (event: MessageEvent) => {
+        if (event.data instanceof ArrayBuffer) {
+          handlersRef.current.onBinary?.(event.data);
+          return;
+        }
+        try {
+          handlersRef.current.onMessage?.(JSON.parse(event.data));
+        } catch (error) {
+          console.error('Invalid WebSocket message:', error);
+        }
       };
 
       ws.current.onclose = () => {
@@ -42,11 +68,19 @@ export const useWebSocket = (url: string) => {
       clearTimeout(reconnectTimeout.current);
     }
     if (ws.current) {
+      // Closed on purpose; do not reconnect
+      ws.current.onclose = null;
       ws.current.close();
       ws.current = null;
     }
   }, []);
 
+  const send = useCallback((message: object) => {
+    if (ws.current?.readyState === WebSocket.OPEN) {
+      ws.current.send(JSON.stringify(message));
+    }
+  }, []);
+
   useEffect(() => {
     connect();
     return () => {
@@ -57,6 +91,7 @@ export const useWebSocket = (url: string) => {
   return {
     connect,
     disconnect,
+    send,
     readyState: ws.current?.readyState || WebSocket.CLOSED,
   };
-};
\ No newline at end of file
+};
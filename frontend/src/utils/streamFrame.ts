@@ -0,0 +1,63 @@
+/**
+ * Decoding of the binary sensor stream frames sent by the websocket endpoint
+ * (see backend/app/ws/streaming.py for the layout).
+ */
+
+// uint8 version, uint8 flags, uint16 sensor count, uint32 machine id,
+// uint32 point count, float64 start time (unix seconds), little endian
+const HEADER_SIZE = 20;
+export const FLAG_DELTA = 0x01;
+
+export interface StreamPoint {
+  timestamp: Date;
+  // null where the sensor had no reading in that bucket
+  [sensor: string]: number | null | Date;
+}
+
+export interface StreamFrame {
+  machineId: number;
+  points: StreamPoint[];
+}
+
+/**
+ * Decode a frame into one point per timestamp.
+ * @param buffer - Binary websocket message
+ * @param sensors - Sensor names in the order acknowledged by the stream_update message
+ * @returns The machine id and its points, oldest first
+ */
+export const decodeStreamFrame = (buffer: ArrayBuffer, sensors: string[]): StreamFrame => {
+  const view = new DataView(buffer);
+  const flags = view.getUint8(1);
+  const sensorCount = view.getUint16(2, true);
+  const machineId = view.getUint32(4, true);
+  const pointCount = view.getUint32(8, true);
+  const start = view.getFloat64(12, true);
+
+  if (sensorCount !== sensors.length) {
+    throw new Error(`Stream frame has ${sensorCount} sensors, expected ${sensors.length}`);
+  }
+
+  // Copy, since the float32 arrays must start at 4-byte aligned offsets
+  const times = new Float32Array(buffer.slice(HEADER_SIZE, HEADER_SIZE + 4 * pointCount));
+  const values = new Float32Array(buffer.slice(HEADER_SIZE + 4 * pointCount));
+
+  const points: StreamPoint[] = Array.from(times, (offset) => ({
+    timestamp: new Date((start + offset) * 1000),
+  }));
+
+  sensors.forEach((sensor, index) => {
+    const series = values.subarray(index * pointCount, (index + 1) * pointCount);
+    let total = NaN;
+    series.forEach((value, point) => {
+      if (flags & FLAG_DELTA) {
+        // The first value and the first value after a gap are absolute
+        total = Number.isNaN(total) || Number.isNaN(value) ? value : total + value;
+      } else {
+        total = value;
+      }
+      points[point][sensor] = Number.isNaN(total) ? null : total;
+    });
+  });
+
+  return { machineId, points };
+};